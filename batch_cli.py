@@ -0,0 +1,367 @@
+"""
+Headless batch analysis: load -> clean -> statistics -> regression -> figures
+for many CSV files at once, fanned out over a process pool.
+
+    python batch_cli.py data/ "archive/**/*.csv" --out results --target price --jobs 8
+
+Each input gets a results folder with its statistics, the fitted model and
+the figures; summary.json lists every file with per-stage timings, and the
+throughput of each stage is printed at the end. Nothing here imports Qt.
+
+A saved model (model.joblib from a run above, or saved from the app) scores
+new files with --predict; each file is streamed in chunks:
+
+    python batch_cli.py new/ --predict results/train-1a2b3c4d/model.joblib --out scored
+"""
+import os
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from cleaning import default_plan
+from data_loader import available_engines, load_dataframe
+from graphs.render import SeriesIndex, draw_heatmap_figure, draw_series, heatmap_grid, save_figure
+from models.model_selection import cross_validate
+from models.saved_model import load_model, predict_csv, save_model
+from models.sufficient_stats import fit_sufficient, frame_statistics
+from stats.statistics import get_basic_statistics
+from utils.logger import configure_logging
+
+STAGES = ("load", "clean", "statistics", "regression", "figures")
+FIGURE_SIZE = (800, 600)
+
+
+def find_inputs(patterns) -> list:
+    """CSV files named by directories (searched recursively) or glob patterns."""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(glob.glob(os.path.join(pattern, "**", "*.csv"), recursive=True))
+        else:
+            files.extend(glob.glob(pattern, recursive=True))
+    return sorted(dict.fromkeys(os.path.abspath(path) for path in files if os.path.isfile(path)))
+
+
+def output_dir_for(out_dir: str, file_path: str) -> str:
+    # Files with the same name in different folders must not overwrite each other
+    digest = hashlib.blake2b(file_path.encode(), digest_size=4).hexdigest()
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(out_dir, f"{stem}-{digest}")
+
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _write_json(path: str, data):
+    with open(path, "w") as handle:
+        json.dump(data, handle, indent=2, default=_to_json)
+
+
+def _fit_summary(fit) -> dict:
+    return {
+        "model": fit.model,
+        "alpha": fit.alpha,
+        "features": fit.features,
+        "target": fit.target,
+        "coefficients": fit.coef_,
+        "intercept": fit.intercept_,
+        "r2": fit.r2,
+        "residual_variance": fit.residual_variance,
+        "standard_errors": fit.standard_errors,
+        "intercept_standard_error": fit.intercept_se,
+        "rows": fit.n_samples,
+    }
+
+
+def _regression(df: pd.DataFrame, options: dict):
+    """The model summary and its fits, or (None, None) without usable targets and features."""
+    numeric = list(df.select_dtypes(include="number").columns)
+    targets = [col for col in options["targets"] if col in numeric]
+    if not targets:
+        return None, None
+    features = [col for col in options["features"] or numeric if col in numeric and col not in targets]
+    if not features:
+        return None, None
+
+    if options["cv"]:
+        # Files are already spread over processes, so each fit stays single-threaded
+        result = cross_validate(df, options["model"], features, targets,
+                                n_folds=options["folds"], n_jobs=1)
+        return {
+            "fits": [_fit_summary(fit) for fit in result.fits],
+            "cv_mse": dict(zip(result.targets, result.mse.T)),
+            "alphas": result.alphas,
+            "fold_seconds": result.fold_seconds,
+        }, result.fits
+    stats = frame_statistics(df, features + targets)
+    fits = [fit_sufficient(stats, options["model"], features, target, options["alpha"]) for target in targets]
+    return {"fits": [_fit_summary(fit) for fit in fits]}, fits
+
+
+def _figures(df: pd.DataFrame, result_dir: str, model: dict) -> list:
+    numeric = df.select_dtypes(include="number")
+    if numeric.empty:
+        return []
+    width, height = FIGURE_SIZE
+    paths = []
+
+    grid = heatmap_grid(numeric, height, width)
+    path = os.path.join(result_dir, "heatmap.png")
+    save_figure(lambda figure: draw_heatmap_figure(figure, grid), path, width, height)
+    paths.append(path)
+
+    if model is not None:
+        pairs = [(fit["features"][0], fit["target"]) for fit in model["fits"]]
+    else:
+        pairs = [tuple(numeric.columns[:2])] if numeric.shape[1] > 1 else []
+    for x_col, y_col in pairs:
+        index = SeriesIndex(numeric[x_col], numeric[y_col])
+
+        def draw(figure):
+            ax = figure.add_subplot(111)
+            draw_series(ax, index, "Scatter", width, height)
+            ax.set_xlabel(x_col)
+            ax.set_ylabel(y_col)
+            ax.set_title(f"{y_col} vs {x_col}")
+
+        path = os.path.join(result_dir, f"scatter_{x_col}_{y_col}.png")
+        save_figure(draw, path, width, height)
+        paths.append(path)
+    return paths
+
+
+def analyze_file(file_path: str, out_dir: str, options: dict) -> dict:
+    """
+    Run the pipeline on one CSV file and write its results.
+
+    Returns a summary with per-stage timings; failures are reported in the
+    summary's "error" entry instead of being raised, so one bad file does
+    not stop the batch.
+    """
+    configure_logging()  # workers are spawned, so each configures its own handler
+    summary = {"file": file_path, "bytes": os.path.getsize(file_path), "timings": {}, "rows": {},
+               "outputs": [], "error": None}
+    timings = summary["timings"]
+    result_dir = output_dir_for(out_dir, file_path)
+    stage = None
+    try:
+        os.makedirs(result_dir, exist_ok=True)
+
+        stage, start = "load", time.perf_counter()
+        df = load_dataframe(file_path, options["engine"], cache=None)
+        timings[stage] = time.perf_counter() - start
+        summary["rows"]["loaded"] = len(df)
+
+        stage, start = "clean", time.perf_counter()
+        if options["clean"]:
+            # Files already run in parallel processes, so cleaning stays on one thread
+            cleaned = default_plan().run(df, n_jobs=1)
+            df = cleaned.frame
+            summary["cleaning"] = cleaned.report.as_dict()
+        timings[stage] = time.perf_counter() - start
+        summary["rows"]["clean"] = len(df)
+
+        stage, start = "statistics", time.perf_counter()
+        stats = get_basic_statistics(df)
+        if options["format"] == "parquet" and "error" not in stats:
+            path = os.path.join(result_dir, "statistics.parquet")
+            pd.DataFrame(stats).T.rename_axis("column").to_parquet(path)
+        else:
+            path = os.path.join(result_dir, "statistics.json")
+            _write_json(path, stats)
+        summary["outputs"].append(path)
+        timings[stage] = time.perf_counter() - start
+
+        stage, start = "regression", time.perf_counter()
+        model, fits = _regression(df, options)
+        if model is not None:
+            path = os.path.join(result_dir, "model.json")
+            _write_json(path, model)
+            summary["outputs"].append(path)
+            # The fits themselves, for --predict and the app
+            features = fits[0].features
+            roles = {**{col: "Independent" for col in features}, **{fit.target: "Dependent" for fit in fits}}
+            path = os.path.join(result_dir, "model.joblib")
+            save_model(path, fits, roles, file_path, df[features].mean())
+            summary["outputs"].append(path)
+        timings[stage] = time.perf_counter() - start
+
+        stage, start = "figures", time.perf_counter()
+        if options["figures"]:
+            summary["outputs"].extend(_figures(df, result_dir, model))
+        timings[stage] = time.perf_counter() - start
+    except Exception as e:
+        summary["error"] = f"{stage}: {e}"
+        summary["traceback"] = traceback.format_exc()
+    return summary
+
+
+def throughput(summaries: list, wall_seconds: float) -> dict:
+    """Per-stage totals across files: seconds, rows/s and (for loading) MB/s."""
+    report = {"files": len(summaries), "failed": sum(s["error"] is not None for s in summaries),
+              "wall_seconds": wall_seconds, "stages": {}}
+    for stage in STAGES:
+        done = [s for s in summaries if stage in s["timings"]]
+        seconds = sum(s["timings"][stage] for s in done)
+        rows = sum(s["rows"].get("loaded" if stage in ("load", "clean") else "clean", 0) for s in done)
+        entry = {"files": len(done), "seconds": seconds,
+                 "rows_per_second": rows / seconds if seconds else None}
+        if stage == "load":
+            entry["mb_per_second"] = sum(s["bytes"] for s in done) / 1e6 / seconds if seconds else None
+        report["stages"][stage] = entry
+    return report
+
+
+def _print_report(report: dict):
+    print(f"\n{report['files']} files ({report['failed']} failed) in {report['wall_seconds']:.2f} s")
+    print(f"{'stage':<12}{'files':>7}{'seconds':>10}{'rows/s':>14}")
+    for stage, entry in report["stages"].items():
+        rate = f"{entry['rows_per_second']:,.0f}" if entry["rows_per_second"] else "-"
+        line = f"{stage:<12}{entry['files']:>7}{entry['seconds']:>10.2f}{rate:>14}"
+        if entry.get("mb_per_second"):
+            line += f"  ({entry['mb_per_second']:.1f} MB/s)"
+        print(line)
+
+
+def run_batch(files: list, out_dir: str, options: dict, jobs: int = None, progress=print) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    summaries = []
+    # spawn keeps workers clear of threads (BLAS, joblib) started in this process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        futures = [pool.submit(analyze_file, path, out_dir, options) for path in files]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            if progress is not None:
+                status = f"failed ({summary['error']})" if summary["error"] else "ok"
+                progress(f"[{len(summaries)}/{len(files)}] {summary['file']}: {status}")
+
+    summaries.sort(key=lambda s: s["file"])
+    report = throughput(summaries, time.perf_counter() - start)
+    _write_json(os.path.join(out_dir, "summary.json"), {"throughput": report, "files": summaries})
+    if options["format"] == "parquet":
+        rows = [{"file": s["file"], "error": s["error"], **s["rows"],
+                 **{f"{stage}_seconds": s["timings"].get(stage) for stage in STAGES}} for s in summaries]
+        pd.DataFrame(rows).to_parquet(os.path.join(out_dir, "summary.parquet"))
+    return report
+
+
+def predict_file(file_path: str, out_dir: str, model_path: str, options: dict) -> dict:
+    """Score one CSV file with a saved model; failures are reported in "error" as by analyze_file."""
+    configure_logging()
+    summary = {"file": file_path, "bytes": os.path.getsize(file_path), "error": None}
+    try:
+        result_dir = output_dir_for(out_dir, file_path)
+        os.makedirs(result_dir, exist_ok=True)
+        report = predict_csv(load_model(model_path), file_path, os.path.join(result_dir, "predictions.csv"),
+                             keep_columns=options["keep"] or None, fill=options["fill"], engine=options["engine"])
+        summary.update(report.as_dict())
+    except Exception as e:
+        summary["error"] = str(e)
+        summary["traceback"] = traceback.format_exc()
+    return summary
+
+
+def run_predictions(files: list, out_dir: str, model_path: str, options: dict, jobs: int = None,
+                    progress=print) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    summaries = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        futures = [pool.submit(predict_file, path, out_dir, model_path, options) for path in files]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            if progress is not None:
+                status = f"failed ({summary['error']})" if summary["error"] else (
+                    f"{summary['rows']:,} rows, {summary['rows_per_second']:,.0f} rows/s")
+                progress(f"[{len(summaries)}/{len(files)}] {summary['file']}: {status}")
+
+    summaries.sort(key=lambda s: s["file"])
+    done = [s for s in summaries if s["error"] is None]
+    seconds = sum(s["seconds"] for s in done)
+    report = {"files": len(summaries), "failed": len(summaries) - len(done),
+              "wall_seconds": time.perf_counter() - start, "rows": sum(s["rows"] for s in done),
+              "seconds": seconds}
+    report["rows_per_second"] = report["rows"] / seconds if seconds else None
+    _write_json(os.path.join(out_dir, "summary.json"), {"model": model_path, "throughput": report,
+                                                        "files": summaries})
+    return report
+
+
+def _print_prediction_report(report: dict):
+    print(f"\n{report['files']} files ({report['failed']} failed) in {report['wall_seconds']:.2f} s")
+    rate = f"{report['rows_per_second']:,.0f}" if report["rows_per_second"] else "-"
+    print(f"{report['rows']:,} rows scored in {report['seconds']:.2f} s ({rate} rows/s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the analysis pipeline over many CSV files.")
+    parser.add_argument("inputs", nargs="+", help="CSV files, directories or glob patterns")
+    parser.add_argument("--out", default="batch_results", help="output directory")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--engine", default="pyarrow" if "pyarrow" in available_engines() else "c",
+                        choices=available_engines(), help="CSV parser")
+    parser.add_argument("--no-clean", dest="clean", action="store_false",
+                        help="keep rows with missing values and duplicates")
+    parser.add_argument("--target", dest="targets", action="append", default=[],
+                        help="dependent variable (repeat for several); regression is skipped without one")
+    parser.add_argument("--feature", dest="features", action="append", default=[],
+                        help="independent variable (repeat; default: all other numeric columns)")
+    parser.add_argument("--model", default="linear", choices=["linear", "ridge", "lasso"])
+    parser.add_argument("--alpha", type=float, default=1.0, help="regularization strength")
+    parser.add_argument("--cv", action="store_true", help="choose alpha by k-fold cross-validation")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--format", default="json", choices=["json", "parquet"],
+                        help="format of the statistics and summary tables")
+    parser.add_argument("--no-figures", dest="figures", action="store_false", help="skip the PNG figures")
+    parser.add_argument("--predict", metavar="MODEL",
+                        help="score the inputs with a saved model instead of analyzing them")
+    parser.add_argument("--keep", action="append", default=[],
+                        help="input column copied next to the predictions (repeat; default: all)")
+    parser.add_argument("--fill", default="none", choices=["none", "mean"],
+                        help="missing features: leave the row unpredicted or use the training mean")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    configure_logging()
+    files = find_inputs(args.inputs)
+    if not files:
+        print("No CSV files matched.", file=sys.stderr)
+        return 2
+    if args.predict:
+        options = {key: getattr(args, key) for key in ("engine", "keep", "fill")}
+        report = run_predictions(files, args.out, args.predict, options, args.jobs)
+        _print_prediction_report(report)
+        return 1 if report["failed"] else 0
+    options = {key: getattr(args, key) for key in
+               ("engine", "clean", "targets", "features", "model", "alpha", "cv", "folds", "format", "figures")}
+    report = run_batch(files, args.out, options, args.jobs)
+    _print_report(report)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
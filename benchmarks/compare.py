@@ -0,0 +1,93 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/abc123.json benchmarks/results/def456.json
+
+Benchmarks are matched on (name, rows, shape). A benchmark regresses when
+its median time grows by more than --threshold (relative) and by more than
+--min-seconds (absolute, so timer noise on fast paths is not flagged), or
+when its peak memory grows by more than --threshold and --min-mb. The exit
+status is 1 when anything regressed, so the comparison can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MIN_SECONDS = 0.005
+DEFAULT_MIN_MB = 1.0
+
+
+def load_results(path: str) -> dict:
+    with open(path) as handle:
+        report = json.load(handle)
+    report["results"] = {(r["name"], r["rows"], r["shape"]): r for r in report["results"]}
+    return report
+
+
+def _grew(old: float, new: float, threshold: float, floor: float) -> bool:
+    return new - old > floor and new > old * (1 + threshold)
+
+
+def compare(baseline: dict, candidate: dict, threshold: float = DEFAULT_THRESHOLD,
+            min_seconds: float = DEFAULT_MIN_SECONDS, min_mb: float = DEFAULT_MIN_MB) -> list:
+    """
+    One row per benchmark present in both result sets.
+
+    Each row holds the key, both medians and peaks, their ratios and a
+    "regressed" list naming the metrics ("time", "memory") that got worse.
+    """
+    rows = []
+    for key in sorted(baseline["results"].keys() & candidate["results"].keys()):
+        old, new = baseline["results"][key], candidate["results"][key]
+        regressed = []
+        if _grew(old["median"], new["median"], threshold, min_seconds):
+            regressed.append("time")
+        if _grew(old["peak_mb"], new["peak_mb"], threshold, min_mb):
+            regressed.append("memory")
+        rows.append({
+            "key": key,
+            "old_median": old["median"], "new_median": new["median"],
+            "time_ratio": new["median"] / old["median"] if old["median"] else float("inf"),
+            "old_peak_mb": old["peak_mb"], "new_peak_mb": new["peak_mb"],
+            "memory_ratio": new["peak_mb"] / old["peak_mb"] if old["peak_mb"] else float("inf"),
+            "regressed": regressed,
+        })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Flag benchmark regressions between two result files.")
+    parser.add_argument("baseline", help="result JSON of the reference commit")
+    parser.add_argument("candidate", help="result JSON of the commit under test")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown or memory growth that counts as a regression")
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS,
+                        help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--min-mb", type=float, default=DEFAULT_MIN_MB,
+                        help="ignore memory growth smaller than this many MB")
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load_results(args.baseline), load_results(args.candidate)
+    rows = compare(baseline, candidate, args.threshold, args.min_seconds, args.min_mb)
+
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+    print(f"{'benchmark':<20}{'rows':>12}{'shape':>8}{'old s':>10}{'new s':>10}{'x':>7}"
+          f"{'old MB':>10}{'new MB':>10}{'x':>7}")
+    for row in rows:
+        name, n_rows, shape = row["key"]
+        flag = f"  REGRESSED ({', '.join(row['regressed'])})" if row["regressed"] else ""
+        print(f"{name:<20}{n_rows:>12,}{shape:>8}{row['old_median']:>10.3f}{row['new_median']:>10.3f}"
+              f"{row['time_ratio']:>7.2f}{row['old_peak_mb']:>10.1f}{row['new_peak_mb']:>10.1f}"
+              f"{row['memory_ratio']:>7.2f}{flag}")
+
+    unmatched = baseline["results"].keys() ^ candidate["results"].keys()
+    if unmatched:
+        print(f"{len(unmatched)} benchmarks appear in only one file and were not compared.")
+    regressions = sum(bool(row["regressed"]) for row in rows)
+    print(f"{regressions} regression(s) at a {args.threshold:.0%} threshold.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
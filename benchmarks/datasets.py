@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# (numeric columns, text columns) per shape
+SHAPES = {"narrow": (6, 2), "wide": (60, 4)}
+
+
+def parse_rows(text: str) -> int:
+    """'10k' -> 10000, '1M' -> 1000000, '2500' -> 2500."""
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def make_dataset(rows: int, shape: str = "narrow", na_ratio: float = 0.01,
+                 dup_ratio: float = 0.01, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic table with numeric and text columns, missing cells and duplicate rows.
+
+    Parameters:
+    - rows: int, number of rows.
+    - shape: "narrow" (8 columns) or "wide" (64 columns).
+    - na_ratio: fraction of cells set to missing.
+    - dup_ratio: fraction of rows replaced by copies of other rows.
+    - seed: random seed, so every run benchmarks the same data.
+    """
+    n_numeric, n_text = SHAPES[shape]
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i in range(n_numeric):
+        values = rng.normal(loc=i, scale=1 + i % 5, size=rows)
+        columns[f"x{i}"] = np.round(values, 4) if i % 3 else np.cumsum(values)
+    categories = np.array(["alpha", "beta", "gamma", "delta", "epsilon"])
+    for i in range(n_text):
+        columns[f"label{i}"] = categories[rng.integers(len(categories), size=rows)]
+
+    # Duplicates first, so missing cells are spread over originals and copies alike
+    n_dups = int(rows * dup_ratio)
+    if n_dups:
+        targets = rng.choice(rows, size=n_dups, replace=False)
+        sources = rng.integers(rows, size=n_dups)
+        for name, values in columns.items():
+            values[targets] = values[sources]
+
+    df = pd.DataFrame(columns)
+    n_missing = int(rows * df.shape[1] * na_ratio)
+    if n_missing:
+        cells = rng.integers(rows * df.shape[1], size=n_missing)
+        row_positions, col_positions = cells % rows, cells // rows
+        for col in range(df.shape[1]):
+            df.iloc[row_positions[col_positions == col], col] = np.nan
+    return df
+
+
+def dataset_path(rows: int, shape: str = "narrow", na_ratio: float = 0.01,
+                 dup_ratio: float = 0.01, seed: int = 0, data_dir: str = DATA_DIR) -> str:
+    """Path of the generated CSV for these parameters, writing it on first use."""
+    name = f"{shape}_{rows}_na{na_ratio:g}_dup{dup_ratio:g}_s{seed}.csv"
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        partial = path + ".partial"
+        make_dataset(rows, shape, na_ratio, dup_ratio, seed).to_csv(partial, index=False)
+        os.replace(partial, path)
+    return path
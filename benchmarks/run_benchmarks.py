@@ -0,0 +1,248 @@
+"""
+Time and memory-profile the data, statistics, plotting and modeling hot paths.
+
+    python -m benchmarks.run_benchmarks --sizes 10k,1M --shape narrow --repeat 3
+    python -m benchmarks.run_benchmarks --sizes 10M --only load_csv,basic_statistics
+
+Results are written as JSON (by default benchmarks/results/<commit>.json);
+compare two runs with benchmarks/compare.py. Widgets run offscreen, and each
+benchmark starts from an empty result cache so memoization does not hide
+the work being measured.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("MPLBACKEND", "Agg")
+os.environ.setdefault("DATA_ANALYZER_NO_WARMUP", "1")
+
+from benchmarks.datasets import SHAPES, dataset_path, parse_rows
+from data_loader import clean_data, load_csv
+from stats.statistics import get_basic_statistics
+from utils.result_cache import get_result_cache
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+WIDGET_TIMEOUT_SECONDS = 600
+
+
+class Context:
+    """Data and long-lived Qt objects shared by the benchmarks of one dataset."""
+
+    def __init__(self, path: str, engine: str):
+        self.path = path
+        self.engine = engine
+        self.df = load_csv(path, engine, use_cache=False)
+        numeric = list(self.df.select_dtypes(include="number").columns)
+        self.features, self.target = numeric[:-1], numeric[-1]
+        self._app = None
+        self._window = None
+
+    @property
+    def app(self):
+        if self._app is None:
+            from PyQt6.QtWidgets import QApplication
+            self._app = QApplication.instance() or QApplication(sys.argv[:1])
+        return self._app
+
+    @property
+    def window(self):
+        if self._window is None:
+            self.app
+            from ui.main_window import MainWindow
+            self._window = MainWindow()
+        return self._window
+
+    def wait(self, done):
+        # Widgets compute on the thread pool and deliver through the event loop
+        deadline = time.perf_counter() + WIDGET_TIMEOUT_SECONDS
+        while not done():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Widget did not finish in time.")
+            self.app.processEvents()
+            time.sleep(0.001)
+
+
+# Each benchmark prepares its inputs untimed and returns the callable to time
+
+def bench_load_csv(ctx):
+    return lambda: load_csv(ctx.path, ctx.engine, use_cache=False)
+
+
+def bench_clean_data(ctx):
+    return lambda: clean_data(ctx.df)
+
+
+def load_window(ctx):
+    """Load the frame into the window and wait for its background row index, so runs do not overlap it."""
+    window = ctx.window
+    window.store.load(ctx.df)
+    ctx.wait(lambda: not window.tasks.is_busy("quality_index"))
+    return window
+
+
+def bench_validate_dataframe(ctx):
+    return load_window(ctx)._validate_dataframe
+
+
+def bench_populate_table(ctx):
+    window = load_window(ctx)
+
+    def run():
+        window._populate_table()
+        window.table_view.resize(1200, 800)
+        window.table_view.grab()
+    return run
+
+
+def bench_basic_statistics(ctx):
+    return lambda: get_basic_statistics(ctx.df)
+
+
+def bench_group_statistics(ctx):
+    from stats.grouping import group_statistics
+    keys = [col for col in ctx.df.columns if col.startswith("label")][:2]
+    return lambda: group_statistics(ctx.df, keys, quantiles=(25, 75), n_jobs=-1)
+
+
+def bench_heatmap(ctx):
+    from dataset import Dataset
+    from graphs.heat_map import HeatmapWidget
+
+    def run():
+        widget = HeatmapWidget(Dataset(ctx.df))
+        widget.resize(1000, 700)
+        ctx.wait(lambda: widget.canvas.pixmap() is not None and not widget.canvas.pixmap().isNull())
+        widget.deleteLater()
+    return run
+
+
+def bench_plot(ctx):
+    from dataset import Dataset
+    from graphs.plot_generator import PlotWidget
+
+    def run():
+        widget = PlotWidget(Dataset(ctx.df))
+        widget.y_selector.setCurrentIndex(min(1, widget.y_selector.count() - 1))
+        ctx.wait(lambda: widget.artist is not None and not widget.tasks.is_busy("series_index"))
+        widget.canvas.draw()
+        widget.deleteLater()
+    return run
+
+
+def bench_regression(ctx):
+    from dataset import Dataset
+    from models.regression_models import RegressionModelWidget
+    ctx.app
+
+    def run():
+        widget = RegressionModelWidget(Dataset(ctx.df), ctx.features, [ctx.target])
+        widget.run_regression()
+        ctx.wait(lambda: widget.model is not None or "failed" in widget.result_label.text())
+        if widget.model is None:
+            raise RuntimeError(widget.result_label.text())
+        widget.deleteLater()
+    return run
+
+
+BENCHMARKS = {
+    "load_csv": bench_load_csv,
+    "clean_data": bench_clean_data,
+    "validate_dataframe": bench_validate_dataframe,
+    "populate_table": bench_populate_table,
+    "basic_statistics": bench_basic_statistics,
+    "group_statistics": bench_group_statistics,
+    "heatmap": bench_heatmap,
+    "plot": bench_plot,
+    "regression": bench_regression,
+}
+
+
+def measure(benchmark, ctx, repeat: int) -> dict:
+    """Median wall time over repeat runs, then one traced run for the peak allocation."""
+    seconds = []
+    for _ in range(repeat):
+        get_result_cache().clear()
+        run = benchmark(ctx)
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+
+    # Tracing slows allocation-heavy code, so it gets a run of its own
+    get_result_cache().clear()
+    run = benchmark(ctx)
+    gc.collect()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": seconds, "median": statistics.median(seconds), "peak_mb": peak / 1e6}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(RESULTS_DIR)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(sizes, shape, na_ratio, dup_ratio, repeat, names, engine, progress=print) -> dict:
+    results = []
+    for rows in sizes:
+        path = dataset_path(rows, shape, na_ratio, dup_ratio)
+        ctx = Context(path, engine)
+        for name in names:
+            entry = {"name": name, "rows": rows, "shape": shape, **measure(BENCHMARKS[name], ctx, repeat)}
+            results.append(entry)
+            if progress is not None:
+                progress(f"{name:<20}{rows:>12,}{entry['median']:>10.3f} s{entry['peak_mb']:>10.1f} MB")
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"shape": shape, "na_ratio": na_ratio, "dup_ratio": dup_ratio,
+                   "repeat": repeat, "engine": engine},
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--sizes", default="10k,1M", help="comma-separated row counts, e.g. 10k,1M,10M")
+    parser.add_argument("--shape", default="narrow", choices=list(SHAPES))
+    parser.add_argument("--na-ratio", type=float, default=0.01)
+    parser.add_argument("--dup-ratio", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="comma-separated benchmark names: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--engine", default="c", help="CSV parser used by load_csv")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    sizes = [parse_rows(size) for size in args.sizes.split(",")]
+
+    report = run_suite(sizes, args.shape, args.na_ratio, args.dup_ratio, args.repeat, names, args.engine)
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""
+Composable cleaning plans run as one fused pass.
+
+    plan = (CleaningPlan()
+            .mark_missing(["n/a", "-"])
+            .coerce(["price"], "numeric")
+            .fill(["quantity"], "median")
+            .drop_missing()
+            .drop_duplicates(["order_id"]))
+    result = plan.run(df)
+    result.frame, result.dropped, result.report
+
+Value rules (mark_missing, coerce, fill) rewrite cells and run first, in
+plan order, each column once over its whole length; untouched columns are
+shared with df, not copied. Row rules (drop_missing, drop_duplicates) then
+run in plan order on what the earlier row rules kept. Their per-row masks
+and 64-bit row hashes are computed chunk by chunk on worker threads, and
+duplicates are found in one global hash table over all chunks, so a row
+duplicating one in an earlier chunk is caught. The only full-frame copy is
+the final selection of the kept rows.
+"""
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from data_quality import hash_rows
+from utils.logger import span
+
+# Rows per chunk of the row-rule pass
+DEFAULT_CHUNK_ROWS = 250_000
+FILL_STRATEGIES = ("value", "mean", "median", "mode", "ffill", "bfill")
+
+
+def _describe_columns(columns) -> str:
+    return "all columns" if columns is None else ", ".join(str(col) for col in columns)
+
+
+class _ValueRule:
+    """Rewrites the cells of some columns; returns the new column and the cells it changed."""
+
+    def __init__(self, columns):
+        self.columns = None if columns is None else list(columns)
+
+    def targets(self, df: pd.DataFrame) -> list:
+        return list(df.columns) if self.columns is None else self.columns
+
+    def apply(self, series: pd.Series):
+        raise NotImplementedError
+
+
+class _MarkMissing(_ValueRule):
+    def __init__(self, values, columns):
+        super().__init__(columns)
+        self.values = list(values)
+
+    def __str__(self):
+        return f"mark_missing({self.values!r}; {_describe_columns(self.columns)})"
+
+    def targets(self, df):
+        # Only text can hold the markers; numeric columns were parsed already
+        return [col for col in super().targets(df)
+                if not pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+
+    def apply(self, series):
+        hits = series.isin(self.values).to_numpy(dtype=bool)
+        if not hits.any():
+            return series, 0
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series.cat.remove_categories([v for v in self.values if v in series.cat.categories]), int(hits.sum())
+        return series.mask(hits), int(hits.sum())
+
+
+class _Coerce(_ValueRule):
+    def __init__(self, columns, to):
+        super().__init__(columns)
+        self.to = to
+
+    def __str__(self):
+        return f"coerce({self.to}; {_describe_columns(self.columns)})"
+
+    def apply(self, series):
+        was_missing = series.isna().to_numpy(dtype=bool)
+        if self.to == "numeric":
+            converted = pd.to_numeric(series, errors="coerce")
+        elif self.to == "datetime":
+            converted = pd.to_datetime(series, errors="coerce")
+        elif self.to == "string":
+            converted = series.astype("str").mask(was_missing)
+        else:
+            converted = series.astype(self.to)
+        # Cells that could not be converted became missing
+        return converted, int((converted.isna().to_numpy(dtype=bool) & ~was_missing).sum())
+
+
+class _Fill(_ValueRule):
+    def __init__(self, columns, strategy, value):
+        super().__init__(columns)
+        self.strategy = strategy
+        self.value = value
+
+    def __str__(self):
+        how = f"value={self.value!r}" if self.strategy == "value" else self.strategy
+        return f"fill({how}; {_describe_columns(self.columns)})"
+
+    def apply(self, series):
+        missing = series.isna().to_numpy(dtype=bool)
+        if not missing.any():
+            return series, 0
+        if self.strategy in ("ffill", "bfill"):
+            filled = series.ffill() if self.strategy == "ffill" else series.bfill()
+        else:
+            if self.strategy == "value":
+                value = self.value
+            elif self.strategy == "mode":
+                modes = series.mode()
+                value = modes.iloc[0] if len(modes) else None
+            elif not pd.api.types.is_numeric_dtype(series):
+                raise ValueError(f"Cannot fill the {self.strategy} of non-numeric column {series.name!r}.")
+            else:
+                value = series.mean() if self.strategy == "mean" else series.median()
+            if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+                return series, 0
+            if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+                # Compacted text columns are categorical; fillna only takes an existing category
+                series = series.cat.add_categories([value])
+            filled = series.fillna(value)
+        return filled, int(missing.sum() - filled.isna().to_numpy(dtype=bool).sum())
+
+
+class _DropMissing:
+    def __init__(self, columns):
+        self.columns = None if columns is None else list(columns)
+
+    def __str__(self):
+        return f"drop_missing({_describe_columns(self.columns)})"
+
+    def chunk_values(self, chunk: pd.DataFrame) -> np.ndarray:
+        """True for rows this rule removes."""
+        block = chunk if self.columns is None else chunk[self.columns]
+        return block.isna().to_numpy().any(axis=1)
+
+
+class _DropDuplicates:
+    def __init__(self, columns, keep):
+        self.columns = None if columns is None else list(columns)
+        self.keep = keep
+
+    def __str__(self):
+        return f"drop_duplicates({_describe_columns(self.columns)}; keep={self.keep})"
+
+    def chunk_values(self, chunk: pd.DataFrame) -> np.ndarray:
+        """64-bit content hash per row; equal rows hash equal in every chunk."""
+        return hash_rows(chunk if self.columns is None else chunk[self.columns])
+
+
+class CleaningReport:
+    """Rows in and out, and per rule the rows it removed or the cells it changed."""
+
+    def __init__(self, rows_before: int):
+        self.rows_before = rows_before
+        self.rows_after = rows_before
+        self.rules = []
+
+    def add(self, rule, rows: int = None, cells: int = None):
+        """Record a row rule's removed rows or a value rule's changed cells."""
+        entry = {"rule": str(rule)}
+        entry.update({"rows": rows} if rows is not None else {"cells": cells})
+        self.rules.append(entry)
+
+    def as_dict(self) -> dict:
+        return {"rows_before": self.rows_before, "rows_after": self.rows_after, "rules": list(self.rules)}
+
+    def __str__(self):
+        lines = [f"{self.rows_before:,} rows in, {self.rows_after:,} rows out"]
+        for entry in self.rules:
+            affected = f"{entry['rows']:,} rows removed" if "rows" in entry else f"{entry['cells']:,} cells changed"
+            lines.append(f"  {entry['rule']}: {affected}")
+        return "\n".join(lines)
+
+
+class CleaningResult:
+    """
+    Outcome of CleaningPlan.run.
+
+    dropped holds the index labels of removed rows, e.g. for tombstoning
+    them in a Dataset instead of building the cleaned frame; frame is built
+    on first access.
+    """
+
+    def __init__(self, rewritten: pd.DataFrame, keep: np.ndarray, report: CleaningReport):
+        self._rewritten = rewritten
+        self._keep = keep
+        self._frame = None
+        self.report = report
+        self.dropped = rewritten.index[~keep]
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = self._rewritten if self._keep.all() else self._rewritten[self._keep]
+        return self._frame
+
+
+class CleaningPlan:
+    """An ordered list of cleaning rules; each method adds one and returns the plan."""
+
+    def __init__(self):
+        self.value_rules = []
+        self.row_rules = []
+
+    def mark_missing(self, values, columns=None) -> "CleaningPlan":
+        """Treat text cells equal to one of values (e.g. "nan", "n/a") as missing."""
+        self.value_rules.append(_MarkMissing(values, columns))
+        return self
+
+    def coerce(self, columns, to: str) -> "CleaningPlan":
+        """
+        Convert columns to "numeric", "datetime", "string", "category" or any
+        dtype astype() accepts; unparsable numeric/datetime cells become missing.
+        """
+        self.value_rules.append(_Coerce(columns, to))
+        return self
+
+    def fill(self, columns=None, strategy: str = "value", value=None) -> "CleaningPlan":
+        """Fill missing cells with value, the column's mean, median or mode, or the previous/next cell."""
+        if strategy not in FILL_STRATEGIES:
+            raise ValueError(f"Unknown fill strategy {strategy!r}; expected one of {FILL_STRATEGIES}.")
+        if strategy == "value" and value is None:
+            raise ValueError("fill(strategy='value') needs a value.")
+        self.value_rules.append(_Fill(columns, strategy, value))
+        return self
+
+    def drop_missing(self, columns=None) -> "CleaningPlan":
+        """Remove rows with a missing cell in columns (default: any column)."""
+        self.row_rules.append(_DropMissing(columns))
+        return self
+
+    def drop_duplicates(self, columns=None, keep="first") -> "CleaningPlan":
+        """Remove rows repeating the content of columns (default: all), as DataFrame.drop_duplicates."""
+        if keep not in ("first", "last", False):
+            raise ValueError("keep must be 'first', 'last' or False.")
+        self.row_rules.append(_DropDuplicates(columns, keep))
+        return self
+
+    def _apply_value_rules(self, df: pd.DataFrame, report: CleaningReport) -> pd.DataFrame:
+        changed = {}
+        for rule in self.value_rules:
+            cells = 0
+            for col in rule.targets(df):
+                if col not in df.columns:
+                    raise KeyError(f"Column not found: {col!r}")
+                series, count = rule.apply(changed.get(col, df[col]))
+                if count or series is not changed.get(col, df[col]):
+                    changed[col] = series
+                cells += count
+            report.add(rule, cells=cells)
+        if not changed:
+            return df
+        # Copy-on-write: only the replaced columns are new
+        rewritten = df.copy(deep=False)
+        for col, series in changed.items():
+            rewritten[col] = series
+        return rewritten
+
+    def _row_masks(self, frame: pd.DataFrame, chunk_rows: int, n_jobs: int) -> list:
+        # Per chunk, one missing mask or hash array per row rule
+        def scan(start):
+            chunk = frame.iloc[start:start + chunk_rows]
+            return [rule.chunk_values(chunk) for rule in self.row_rules]
+
+        starts = range(0, len(frame), chunk_rows)
+        if len(starts) > 1 and n_jobs != 1:
+            # pandas' hashing and isna release the GIL for most of their work
+            scanned = Parallel(n_jobs=n_jobs, prefer="threads")(delayed(scan)(start) for start in starts)
+        else:
+            scanned = [scan(start) for start in starts]
+        if not scanned:
+            return [np.empty(0, dtype=bool) for _ in self.row_rules]
+        return [np.concatenate([chunk[i] for chunk in scanned]) for i in range(len(self.row_rules))]
+
+    def run(self, df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS, n_jobs: int = -1) -> CleaningResult:
+        """
+        Apply the plan to df without modifying it.
+
+        Parameters:
+        - df: pandas.DataFrame to clean.
+        - chunk_rows: int, rows per chunk of the row-rule pass.
+        - n_jobs: joblib thread count for the chunks, -1 for all cores.
+        """
+        report = CleaningReport(len(df))
+        with span("clean_data", rows=len(df), rules=len(self.value_rules) + len(self.row_rules)) as s:
+            frame = self._apply_value_rules(df, report)
+            keep = np.ones(len(df), dtype=bool)
+            for rule, values in zip(self.row_rules, self._row_masks(frame, chunk_rows, n_jobs)):
+                if isinstance(rule, _DropDuplicates):
+                    # One global hash table over all chunks, in row order
+                    alive = np.flatnonzero(keep)
+                    duplicated = pd.Series(values[alive]).duplicated(keep=rule.keep).to_numpy()
+                    removed = alive[duplicated]
+                else:
+                    removed = np.flatnonzero(keep & values)
+                keep[removed] = False
+                report.add(rule, rows=len(removed))
+            report.rows_after = int(keep.sum())
+            s.fields["removed"] = report.rows_before - report.rows_after
+        return CleaningResult(frame, keep, report)
+
+
+def default_plan(drop_missing: bool = True, drop_duplicates: bool = True) -> CleaningPlan:
+    """The app's standard cleaning: rows with missing cells, then repeated rows."""
+    plan = CleaningPlan()
+    if drop_missing:
+        plan.drop_missing()
+    if drop_duplicates:
+        plan.drop_duplicates()
+    return plan
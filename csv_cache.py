@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "data_analyzer", "csv")
+DEFAULT_MAX_BYTES = 2 << 30
+
+_INDEX_FILE = "index.json"
+_SAMPLE_BLOCK = 64 << 10
+_SAMPLE_COUNT = 16
+
+
+def _content_digest(file_path: str, size: int) -> str:
+    """
+    Hash the head, the tail and evenly spaced blocks of a file.
+
+    Hashing every byte of a multi-GB file would cost more than the cache saves,
+    so this samples a fixed amount of data; together with the size and mtime
+    checks it catches in-place rewrites of the source file.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(size).encode())
+    with open(file_path, "rb") as f:
+        if size <= _SAMPLE_BLOCK * (_SAMPLE_COUNT + 2):
+            digest.update(f.read())
+        else:
+            step = (size - _SAMPLE_BLOCK) // (_SAMPLE_COUNT + 1)
+            for i in range(_SAMPLE_COUNT + 2):
+                f.seek(min(i * step, size - _SAMPLE_BLOCK))
+                digest.update(f.read(_SAMPLE_BLOCK))
+    return digest.hexdigest()
+
+
+class CsvCache:
+    """
+    On-disk cache of parsed CSV files stored as uncompressed Arrow IPC (Feather v2).
+
+    Entries are keyed by the absolute source path and validated against its
+    size, mtime and content digest, and against the parser engine that made
+    them, since engines differ in dtypes and NA handling. Cached files are
+    memory-mapped on read and the least recently used ones are evicted once
+    max_bytes is exceeded.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        self.cache_dir = cache_dir or os.environ.get("DATA_ANALYZER_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("DATA_ANALYZER_CACHE_BYTES", DEFAULT_MAX_BYTES))
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return pa is not None and self.max_bytes > 0
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, _INDEX_FILE)
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._index_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path())
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()
+
+    @staticmethod
+    def _source_state(file_path: str) -> dict:
+        stat = os.stat(file_path)
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "digest": _content_digest(file_path, stat.st_size),
+        }
+
+    def _remove_entry(self, index: dict, key: str):
+        entry = index.pop(key, None)
+        if entry is not None:
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except OSError:
+                pass
+
+    def get(self, file_path: str, engine: str = "c") -> pd.DataFrame:
+        if not self.enabled:
+            return None
+
+        key = self._key(file_path)
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is None or entry.get("engine") != engine:
+                # Parsed by another engine: put() replaces it after this parse
+                return None
+
+            state = self._source_state(file_path)
+            if any(entry[field] != state[field] for field in ("size", "mtime_ns", "digest")):
+                # The source changed since it was cached
+                self._remove_entry(index, key)
+                self._save_index(index)
+                return None
+
+            try:
+                # The table's buffers point straight into the mapped file
+                source = pa.memory_map(os.path.join(self.cache_dir, entry["file"]))
+                table = pa.ipc.open_file(source).read_all()
+            except (OSError, pa.ArrowInvalid):
+                self._remove_entry(index, key)
+                self._save_index(index)
+                return None
+
+            entry["last_access"] = time.time()
+            self._save_index(index)
+
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def put(self, file_path: str, df: pd.DataFrame, engine: str = "c") -> bool:
+        if not self.enabled or df is None:
+            return False
+
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            # Mixed-type object columns cannot be stored as Arrow
+            return False
+
+        key = self._key(file_path)
+        file_name = f"{key}.arrow"
+        state = self._source_state(file_path)
+
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            target = os.path.join(self.cache_dir, file_name)
+            tmp_target = f"{target}.{os.getpid()}.tmp"
+            with pa.OSFile(tmp_target, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_target, target)
+
+            index = self._load_index()
+            index[key] = dict(
+                state,
+                source=os.path.abspath(file_path),
+                engine=engine,
+                file=file_name,
+                bytes=os.path.getsize(target),
+                last_access=time.time(),
+            )
+            self._evict(index)
+            self._save_index(index)
+        return key in index
+
+    def _evict(self, index: dict):
+        total = sum(entry["bytes"] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]["bytes"]
+            self._remove_entry(index, key)
+
+    def invalidate(self, file_path: str):
+        with self._lock:
+            index = self._load_index()
+            self._remove_entry(index, self._key(file_path))
+            self._save_index(index)
+
+    def clear(self):
+        with self._lock:
+            index = self._load_index()
+            for key in list(index):
+                self._remove_entry(index, key)
+            self._save_index(index)
+
+    def total_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self._load_index().values())
+
+
+_default_cache = None
+
+
+def get_default_cache() -> CsvCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = CsvCache()
+    return _default_cache
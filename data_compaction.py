@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from utils.logger import span
+
+# Text columns with at most this many distinct values per non-missing cell become categoricals
+CATEGORY_RATIO = 0.5
+# Rows checked before counting the distinct values of a whole text column
+_CATEGORY_SAMPLE = 10_000
+# No int8: a column of small counts is exactly where arithmetic on it would wrap around
+_INT_TYPES = (np.int16, np.int32, np.int64)
+
+
+def _is_nullable(dtype) -> bool:
+    return isinstance(dtype, pd.api.extensions.ExtensionDtype)
+
+
+def _compact_integers(series: pd.Series) -> pd.Series:
+    values = series.dropna()
+    if values.empty:
+        return series
+    low, high = int(values.min()), int(values.max())
+    for int_type in _INT_TYPES:
+        # Within half the type's range, so the sum or difference of two such columns still fits
+        limit = np.iinfo(int_type).max // 2
+        if -limit <= low and high <= limit:
+            break
+    else:
+        return series
+    if np.dtype(int_type).itemsize >= series.dtype.itemsize:
+        return series
+    bits = np.iinfo(int_type).bits
+    return series.astype(f"Int{bits}" if _is_nullable(series.dtype) else int_type)
+
+
+def _compact_floats(series: pd.Series) -> pd.Series:
+    if series.dtype.itemsize <= 4:
+        return series
+    narrow = series.astype("Float32" if _is_nullable(series.dtype) else np.float32)
+    # Only when every value survives the round trip, so results do not change
+    original = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    if np.array_equal(narrow.to_numpy(dtype=np.float64, na_value=np.nan), original, equal_nan=True):
+        return narrow
+    return series
+
+
+def _compact_text(series: pd.Series, category_ratio: float) -> pd.Series:
+    sample = series.iloc[:_CATEGORY_SAMPLE]
+    if sample.nunique() <= category_ratio * max(sample.count(), 1):
+        if series.nunique() <= category_ratio * max(series.count(), 1):
+            return series.astype("category")
+    if series.dtype == object:
+        return series.astype("str")
+    return series
+
+
+def compact_column(series: pd.Series, category_ratio: float = CATEGORY_RATIO) -> pd.Series:
+    """Smallest lossless dtype for one column; the series itself when nothing is saved."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        return _compact_integers(series)
+    if pd.api.types.is_float_dtype(dtype):
+        return _compact_floats(series)
+    if dtype == object and pd.api.types.infer_dtype(series, skipna=True) != "string":
+        # Mixed content (numbers and text, dates, ...) is left as it was parsed
+        return series
+    if pd.api.types.is_string_dtype(dtype):
+        return _compact_text(series, category_ratio)
+    return series
+
+
+def compact_dataframe(df: pd.DataFrame, category_ratio: float = CATEGORY_RATIO) -> pd.DataFrame:
+    """
+    Shrink a loaded frame without changing its values.
+
+    - Integers are downcast to the smallest of int16/int32 that holds twice
+      their range, nullable ones (Int64) to a smaller nullable type. Sums
+      and differences of two compacted columns cannot wrap around; products
+      and running totals can, so cast to int64 first for those.
+    - Floats become float32 only if every value round-trips exactly.
+    - Text columns with few distinct values become categoricals; other
+      object-dtype text becomes the (Arrow-backed, when pyarrow is installed) str dtype.
+
+    Missing values stay missing in their column's own NA representation
+    (NaN for numpy dtypes, pd.NA for nullable ones), so isna(), dropna()
+    and duplicated() give the same answers as on the original frame.
+    Unchanged columns are shared with df, not copied.
+    """
+    if df is None or df.empty:
+        return df
+    with span("compact_dataframe", columns=df.shape[1], rows=len(df)):
+        columns = {col: compact_column(df[col], category_ratio) for col in df.columns}
+        return pd.DataFrame(columns, index=df.index)
+
+
+def memory_usage_report(before: pd.DataFrame, after: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Per-column dtypes and memory in bytes before and after compaction.
+
+    Without after, both sides describe before. The saved column is the
+    fraction of the original bytes that compaction freed.
+    """
+    after = before if after is None else after
+    bytes_before = before.memory_usage(index=False, deep=True)
+    bytes_after = after.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "bytes_before": bytes_before,
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_after": bytes_after,
+    })
+    report["saved"] = 1 - report["bytes_after"] / report["bytes_before"].where(report["bytes_before"] > 0)
+    report.index.name = "column"
+    return report
@@ -1,16 +1,127 @@
-import pandas as pd
-from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem
-from PyQt6.QtGui import QColor, QBrush, QFont
-from PyQt6.QtCore import Qt
+import os
 
+import pandas as pd
 
-def load_csv(file_path: str) -> pd.DataFrame:
+from csv_cache import CsvCache, get_default_cache
+from utils.logger import get_logger, span
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+NA_VALUES = ["", " ", "nan", "NaN"]
+DEFAULT_CHUNK_SIZE = 100_000
+
+# pyarrow replaces its null list instead of extending it, so mirror pandas' defaults
+_PYARROW_NULL_VALUES = sorted(set(NA_VALUES) | {
+    "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "None", "n/a", "null",
+})
+_PYARROW_BLOCK_SIZE = 16 << 20
+_ARROW_ERRORS = (pa.ArrowInvalid,) if pa is not None else ()
+
+log = get_logger(__name__)
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+def available_engines():
+    engines = ["c", "python"]
+    if pa_csv is not None:
+        engines.append("pyarrow")
+    return engines
+
+
+def iter_csv_chunks(file_path: str, engine: str = "c", chunksize: int = DEFAULT_CHUNK_SIZE,
+                    progress=None, is_cancelled=None):
+    """
+    Parse a CSV file chunk by chunk.
+
+    Parameters:
+    - file_path: str, path of the CSV file.
+    - engine: str, "c", "python" or "pyarrow" (see available_engines()).
+    - chunksize: int, rows per chunk for the pandas engines.
+    - progress: optional callable(bytes_read, total_bytes, rows_read).
+    - is_cancelled: optional callable returning True to abort with LoadCancelled.
+
+    Yields:
+    - pandas.DataFrame chunks with NA markers already converted to missing values.
+    """
+    if engine == "pyarrow" and pa_csv is None:
+        raise ValueError("The pyarrow engine requires pyarrow to be installed.")
+
+    total_bytes = os.path.getsize(file_path)
+    rows_read = 0
+
+    with open(file_path, "rb") as handle:
+        if engine == "pyarrow":
+            reader = pa_csv.open_csv(
+                handle,
+                read_options=pa_csv.ReadOptions(block_size=_PYARROW_BLOCK_SIZE),
+                convert_options=pa_csv.ConvertOptions(
+                    null_values=_PYARROW_NULL_VALUES, strings_can_be_null=True
+                ),
+            )
+            chunks = (batch.to_pandas() for batch in reader)
+        else:
+            chunks = pd.read_csv(handle, engine=engine, na_values=NA_VALUES, chunksize=chunksize)
+
+        for chunk in chunks:
+            if is_cancelled is not None and is_cancelled():
+                raise LoadCancelled(file_path)
+            rows_read += len(chunk)
+            if progress is not None:
+                progress(min(handle.tell(), total_bytes), total_bytes, rows_read)
+            yield chunk
+
+
+def read_csv_chunked(file_path: str, engine: str = "c", chunksize: int = DEFAULT_CHUNK_SIZE,
+                     progress=None, is_cancelled=None) -> pd.DataFrame:
     try:
-        df = pd.read_csv(file_path, na_values=["", " ", "nan", "NaN"])
-        df.replace("nan", pd.NA, inplace=True)
+        chunks = list(iter_csv_chunks(file_path, engine, chunksize, progress, is_cancelled))
+    except _ARROW_ERRORS as e:
+        # The streaming reader infers types from the first block; a later block
+        # that does not fit them is re-read with the pandas parser.
+        log.warning("pyarrow could not parse %s (%s), falling back to the C engine", file_path, e)
+        return read_csv_chunked(file_path, "c", chunksize, progress, is_cancelled)
+
+    if not chunks:
+        return pd.read_csv(file_path, na_values=NA_VALUES)
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def load_dataframe(file_path: str, engine: str = "c", chunksize: int = DEFAULT_CHUNK_SIZE,
+                   progress=None, is_cancelled=None, cache: CsvCache = None) -> pd.DataFrame:
+    with span("load_csv", file=os.path.basename(file_path), engine=engine) as s:
+        if cache is not None and cache.enabled:
+            df = cache.get(file_path, engine)
+            if df is not None:
+                s.fields.update(rows=len(df), cached=True)
+                if progress is not None:
+                    size = os.path.getsize(file_path)
+                    progress(size, size, len(df))
+                return df
+
+        df = read_csv_chunked(file_path, engine, chunksize, progress, is_cancelled)
+        s.fields.update(rows=len(df), cached=False)
+
+        if cache is not None and cache.enabled:
+            cache.put(file_path, df, engine)
         return df
+
+
+def load_csv(file_path: str, engine: str = "c", use_cache: bool = True) -> pd.DataFrame:
+    try:
+        return load_dataframe(file_path, engine, cache=get_default_cache() if use_cache else None)
     except Exception as e:
-        print(f"Error loading CSV: {e}")
+        log.error("Error loading CSV %s: %s", file_path, e)
         return None
 
 
@@ -18,31 +129,15 @@ def init_column_roles(columns):
     return {col: "Unused" for col in columns}
 
 
-def populate_table_widget(table_widget: QTableWidget, df: pd.DataFrame, column_roles: dict):
+def populate_table_view(table_view: "QTableView", df: pd.DataFrame, column_roles: dict):
     if df is None or df.empty:
         return
 
-    table_widget.setRowCount(len(df))
-    table_widget.setColumnCount(len(df.columns))
-    table_widget.setHorizontalHeaderLabels(df.columns)
-
-    for row_idx, row in df.iterrows():
-        for col_idx, col in enumerate(df.columns):
-            value = row[col]
-            item = QTableWidgetItem(str(value))
-            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+    # Qt is only imported by the table helpers, so loading works headless
+    from ui.table_model import DataFrameTableModel
 
-            role = column_roles.get(col, "Unused")
-            font = QFont()
-            if role == "Independent":
-                font.setBold(True)
-                item.setForeground(QBrush(QColor("green")))
-            elif role == "Dependent":
-                font.setItalic(True)
-                item.setForeground(QBrush(QColor("darkred")))
-            item.setFont(font)
-
-            table_widget.setItem(row_idx, col_idx, item)
+    # Cells are read lazily by the model, so this costs the same for any row count
+    table_view.setModel(DataFrameTableModel(df, column_roles, show_actions=False, parent=table_view))
 
 
 def toggle_column_role(column_name: str, column_roles: dict) -> str:
@@ -50,7 +145,8 @@ def toggle_column_role(column_name: str, column_roles: dict) -> str:
     new_role = {
         "Unused": "Independent",
         "Independent": "Dependent",
-        "Dependent": "Unused"
+        "Dependent": "Group By",
+        "Group By": "Unused"
     }[current_role]
     column_roles[column_name] = new_role
     return new_role
@@ -62,34 +158,33 @@ def extract_variable_roles(column_roles: dict):
     return independent_vars, dependent_vars
 
 
-def highlight_data_issues(table_widget: QTableWidget, df: pd.DataFrame):
-    df_numeric = df.replace("nan", pd.NA)
-    missing_mask = df_numeric.isnull()
-    duplicate_mask = df_numeric.duplicated(keep=False)
+def extract_group_columns(column_roles: dict):
+    return [col for col, role in column_roles.items() if role == "Group By"]
+
 
-    for row in range(df_numeric.shape[0]):
-        is_dup_row = duplicate_mask.iloc[row]
-        for col in range(df_numeric.shape[1]):
-            item = table_widget.item(row, col)
-            if item is None:
-                continue
+def highlight_data_issues(table_view: "QTableView", df: pd.DataFrame):
+    from cleaning import CleaningPlan
+    from ui.table_model import DataFrameTableModel
 
-            is_missing = missing_mask.iloc[row, col]
-            if is_missing:
-                item.setBackground(QBrush(QColor(255, 255, 0)))  # Yellow for missing
-            elif is_dup_row:
-                item.setBackground(QBrush(QColor(255, 200, 200)))  # Light red for duplicate row
+    model = table_view.model()
+    if not isinstance(model, DataFrameTableModel):
+        return
 
+    # Every copy of a duplicated row is an issue, not just the later ones
+    plan = CleaningPlan().mark_missing(["nan"]).drop_missing().drop_duplicates(keep=False)
+    model.set_problematic_rows(plan.run(df).dropped)
 
 
-def clean_data_on_confirmation(table_widget: QTableWidget, df: pd.DataFrame) -> pd.DataFrame:
-    df_cleaned = df.replace("nan", pd.NA).dropna().drop_duplicates()
+def clean_data_on_confirmation(table_view: "QTableView", df: pd.DataFrame) -> pd.DataFrame:
+    from cleaning import CleaningPlan
+    from ui.table_model import DataFrameTableModel
 
-    # Clear and reset the table to match cleaned DataFrame
-    table_widget.clear()
-    table_widget.setRowCount(0)
-    table_widget.setColumnCount(0)
-    table_widget.setHorizontalHeaderLabels([])
+    df_cleaned = CleaningPlan().mark_missing(["nan"]).drop_missing().drop_duplicates().run(df).frame
+
+    # Clear the table; the caller repopulates it from the cleaned DataFrame
+    model = table_view.model()
+    if isinstance(model, DataFrameTableModel):
+        model.set_dataset(None)
 
     return df_cleaned
 
@@ -104,9 +199,9 @@ def suggest_data_cleaning(df: pd.DataFrame) -> str:
     return "\n".join(messages) if messages else "No cleaning needed."
 
 def clean_data(df: pd.DataFrame, drop_missing=True, drop_duplicates=True) -> pd.DataFrame:
-    if drop_missing:
-        df = df.dropna()
-    if drop_duplicates:
-        df = df.drop_duplicates()
-    return df
+    """df.dropna().drop_duplicates() in one pass; see cleaning.CleaningPlan for other rules."""
+    # Imported here: joblib is not needed to load data
+    from cleaning import default_plan
+
+    return default_plan(drop_missing, drop_duplicates).run(df).frame
 
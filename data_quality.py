@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """64-bit content hash per row; rows equal under df.duplicated() hash equal."""
+    floats = df.select_dtypes(include="floating").columns
+    if len(floats):
+        # -0.0 == 0.0 but their bytes differ; adding 0.0 turns -0.0 into 0.0
+        df = df.copy(deep=False)
+        df[floats] = df[floats] + 0.0
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+class DataQualityIndex:
+    """
+    Persistent index of rows with missing values or duplicate content.
+
+    Rows are identified by the DataFrame's integer index labels, which act as
+    stable row ids. The index keeps:
+    - a 64-bit content hash per row (hash_rows),
+    - a hash -> rows multimap for duplicate detection, split into a sorted
+      array built once and a small dict for rows hashed afterwards,
+    - a packed missing-cell bitmap and a per-row "has missing" flag.
+
+    A row is problematic when it has a missing cell or when an earlier row
+    (smaller id) has the same content, matching
+    df.isnull().any(axis=1) | df.duplicated(). Removing, editing or appending
+    k rows costs O(k) plus the size of the affected duplicate groups, and
+    membership tests are O(1).
+    """
+
+    # Rows hashed after build() are folded into the sorted arrays once they
+    # outnumber this fraction of them
+    EXTRA_ROWS_RATIO = 0.25
+
+    def __init__(self, df: pd.DataFrame = None):
+        self.build(df)
+
+    def build(self, df: pd.DataFrame):
+        if df is None or df.empty:
+            ids = np.empty(0, dtype=np.int64)
+            hashes = np.empty(0, dtype=np.uint64)
+            missing = np.empty((0, 0), dtype=bool)
+        else:
+            ids = self._row_ids(df.index)
+            hashes = hash_rows(df)
+            missing = df.isna().to_numpy()
+
+        capacity = int(ids.max()) + 1 if len(ids) else 0
+        self._hashes = np.zeros(capacity, dtype=np.uint64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._row_missing = np.zeros(capacity, dtype=bool)
+        self._problematic = np.zeros(capacity, dtype=bool)
+        self._missing_bits = np.zeros((capacity, (missing.shape[1] + 7) // 8), dtype=np.uint8)
+
+        self._hashes[ids] = hashes
+        self._alive[ids] = True
+        self._row_missing[ids] = missing.any(axis=1)
+        self._missing_bits[ids] = np.packbits(missing, axis=1)
+
+        order = np.lexsort((ids, hashes))
+        self._sorted_hashes = hashes[order]
+        self._sorted_ids = ids[order]
+        self._extra_rows = {}
+
+        duplicated = np.zeros(len(ids), dtype=bool)
+        duplicated[order[1:]] = self._sorted_hashes[1:] == self._sorted_hashes[:-1]
+        self._problematic[ids] = self._row_missing[ids] | duplicated
+
+    @staticmethod
+    def _row_ids(labels) -> np.ndarray:
+        ids = np.asarray(labels)
+        if ids.dtype.kind not in "iu" or (len(ids) and ids.min() < 0):
+            raise ValueError("DataQualityIndex requires non-negative integer row labels.")
+        return ids.astype(np.int64, copy=False)
+
+    def __contains__(self, row_id) -> bool:
+        try:
+            return bool(self._problematic[row_id] and self._alive[row_id])
+        except (IndexError, TypeError):
+            return False
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._problematic & self._alive))
+
+    def problematic_rows(self) -> np.ndarray:
+        return np.flatnonzero(self._problematic & self._alive)
+
+    def missing_rows(self) -> np.ndarray:
+        return np.flatnonzero(self._row_missing & self._alive)
+
+    def duplicate_rows(self) -> np.ndarray:
+        return np.flatnonzero(self._problematic & ~self._row_missing & self._alive)
+
+    def missing_count(self) -> int:
+        """Number of missing cells, as df.isnull().sum().sum()."""
+        bits = self._missing_bits[self._alive]
+        return int(np.unpackbits(bits, axis=1).sum()) if bits.size else 0
+
+    def missing_mask(self, row_ids, n_columns: int) -> np.ndarray:
+        bits = self._missing_bits[self._row_ids(row_ids)]
+        return np.unpackbits(bits, axis=1, count=n_columns).astype(bool)
+
+    def _rows_with_hashes(self, values: np.ndarray) -> np.ndarray:
+        """Live row ids whose current hash is one of values."""
+        lo = np.searchsorted(self._sorted_hashes, values, side="left")
+        hi = np.searchsorted(self._sorted_hashes, values, side="right")
+        counts = hi - lo
+        # Expand every [lo, hi) run into positions without a Python loop
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = self._sorted_ids[np.repeat(lo, counts) + offsets]
+
+        if self._extra_rows:
+            extra = [row for value in values.tolist() for row in self._extra_rows.get(value, ())]
+            rows = np.unique(np.concatenate((rows, np.asarray(extra, dtype=np.int64))))
+
+        return rows[self._alive[rows] & np.isin(self._hashes[rows], values)]
+
+    def _refresh_groups(self, values):
+        """Recompute the duplicate flags of every row sharing one of the given hashes."""
+        values = np.unique(np.asarray(values, dtype=np.uint64))
+        if not len(values):
+            return
+        rows = self._rows_with_hashes(values)
+        rows = rows[np.lexsort((rows, self._hashes[rows]))]
+        hashes = self._hashes[rows]
+        is_first = np.ones(len(rows), dtype=bool)
+        is_first[1:] = hashes[1:] != hashes[:-1]
+        self._problematic[rows] = self._row_missing[rows] | ~is_first
+
+    def remove_rows(self, row_ids):
+        ids = self._row_ids(row_ids)
+        ids = ids[ids < len(self._alive)]
+        affected = self._hashes[ids[self._alive[ids]]]
+        self._alive[ids] = False
+        self._refresh_groups(affected)
+
+    def update_rows(self, df: pd.DataFrame, row_ids):
+        """Re-index rows whose values changed; df must contain them under the same labels."""
+        ids = self._row_ids(row_ids)
+        if not len(ids):
+            return
+        changed = df.loc[ids]
+        new_hashes = hash_rows(changed)
+        missing = changed.isna().to_numpy()
+
+        affected = self._hashes[ids[self._alive[ids]]]
+        self._hashes[ids] = new_hashes
+        self._row_missing[ids] = missing.any(axis=1)
+        self._missing_bits[ids] = np.packbits(missing, axis=1)
+        self._alive[ids] = True
+        for row, value in zip(ids.tolist(), new_hashes.tolist()):
+            self._extra_rows.setdefault(value, set()).add(row)
+        self._refresh_groups(np.concatenate((affected, new_hashes)))
+
+    def add_rows(self, df: pd.DataFrame):
+        """Index new rows, e.g. ones appended to the frame; df holds just those rows."""
+        ids = self._row_ids(df.index)
+        if not len(ids):
+            return
+        self._reserve(int(ids.max()) + 1, df.shape[1])
+        self.update_rows(df, ids)
+        extra = sum(len(rows) for rows in self._extra_rows.values())
+        if extra > self.EXTRA_ROWS_RATIO * max(len(self._sorted_ids), 1024):
+            self._fold_extra_rows()
+
+    def _reserve(self, capacity: int, n_columns: int):
+        """Grow the per-row arrays geometrically so repeated appends stay amortized O(k)."""
+        old = len(self._alive)
+        if self._missing_bits.shape[1] != (n_columns + 7) // 8:
+            if old and self._alive.any():
+                raise ValueError("Rows added to a DataQualityIndex must have the indexed columns.")
+            self._missing_bits = np.zeros((old, (n_columns + 7) // 8), dtype=np.uint8)
+        if capacity <= old:
+            return
+        capacity = max(capacity, 2 * old)
+        grow = capacity - old
+        self._hashes = np.concatenate((self._hashes, np.zeros(grow, dtype=np.uint64)))
+        self._alive = np.concatenate((self._alive, np.zeros(grow, dtype=bool)))
+        self._row_missing = np.concatenate((self._row_missing, np.zeros(grow, dtype=bool)))
+        self._problematic = np.concatenate((self._problematic, np.zeros(grow, dtype=bool)))
+        self._missing_bits = np.concatenate(
+            (self._missing_bits, np.zeros((grow, self._missing_bits.shape[1]), dtype=np.uint8))
+        )
+
+    def _fold_extra_rows(self):
+        ids = np.flatnonzero(self._alive)
+        hashes = self._hashes[ids]
+        order = np.lexsort((ids, hashes))
+        self._sorted_hashes = hashes[order]
+        self._sorted_ids = ids[order]
+        self._extra_rows = {}
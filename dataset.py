@@ -0,0 +1,299 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from utils.result_cache import get_result_cache
+
+# Fraction of tombstoned rows above which the frame is compacted right away
+COMPACT_RATIO = 0.25
+
+_dataset_ids = itertools.count(1)
+# Versions are unique across datasets, so a task that finishes after its
+# Dataset was switched to other data cannot file a result under that data's key
+_versions = itertools.count(1)
+
+
+class Dataset:
+    """
+    Holds the loaded DataFrame and deletes rows through a tombstone mask.
+
+    Index labels are stable row ids: removing rows only flips bits in the
+    mask, and the frame itself is compacted later (when too many rows are
+    dead, or when a consumer asks for the live frame), never reindexed.
+    "View rows" are positions among the live rows, as shown by the table.
+
+    Every change to the live rows bumps version, and results derived from the
+    data are memoized in the shared ResultCache under (id, version, operation,
+    params), so panes reuse them until the data changes. Appending rows keeps
+    the older results, so memoize() can extend them with just the new rows.
+    """
+
+    def __init__(self, df: pd.DataFrame = None):
+        self.id = next(_dataset_ids)
+        self.version = next(_versions)
+        self._frame = df
+        self._alive = None
+        self._positions = None
+        self._next_id = _next_row_id(df)
+        # (version before, version after, row count) of each append since the last other change
+        self._appends = []
+
+    def _bump_version(self, appended: int = 0):
+        before, self.version = self.version, next(_versions)
+        if appended:
+            self._appends.append((before, self.version, appended))
+            return
+        self._appends = []
+        dataset_id, version = self.id, self.version
+        get_result_cache().discard(lambda key: key[0] == dataset_id and key[1] < version)
+
+    def reload(self, df: pd.DataFrame, results: tuple = None, keep_results: bool = False):
+        """
+        Replace the frame in place, so holders of this Dataset see the new data.
+
+        results: results_key() of an earlier state holding exactly these rows,
+        e.g. a workspace tab shown again, whose cached results are reused.
+        keep_results leaves the replaced frame's results in the cache, to be
+        picked up that way later.
+        """
+        if not keep_results:
+            self.discard_results()
+        self._frame = df
+        self._alive = None
+        self._positions = None
+        self._next_id = _next_row_id(df)
+        self._appends = []
+        if results is not None:
+            self.id, self.version = results
+        else:
+            self.id, self.version = next(_dataset_ids), next(_versions)
+
+    def results_key(self) -> tuple:
+        """(id, version) under which the current rows' results are cached."""
+        return self.id, self.version
+
+    def append(self, df: pd.DataFrame) -> pd.Index:
+        """
+        Add rows after the last one and return the row ids they were given.
+
+        df must have the frame's columns; its values are converted to the
+        frame's column types where that loses nothing, so appends do not
+        keep widening the columns. Values that do not fit widen the column
+        as reloading the file would, e.g. text in a numeric column.
+        """
+        if not len(df):
+            return pd.RangeIndex(self._next_id, self._next_id)
+        if self._frame is None:
+            raise ValueError("Cannot append rows to an empty dataset; load a frame first.")
+        if list(df.columns) != list(self._frame.columns):
+            raise ValueError(f"Appended rows have columns {list(df.columns)}, expected {list(self._frame.columns)}.")
+        row_ids = pd.RangeIndex(self._next_id, self._next_id + len(df))
+        df = df.set_axis(row_ids)
+        frame, columns = self._frame, {}
+        for col in df.columns:
+            current, columns[col] = _conform(self._frame[col], df[col])
+            if current is not self._frame[col]:
+                # A new object: background tasks may still be reading the old frame
+                if frame is self._frame:
+                    frame = frame.copy(deep=False)
+                frame[col] = current
+        df = pd.DataFrame(columns, index=row_ids)
+
+        start = len(frame)
+        self._frame = pd.concat([frame, df])
+        if self._alive is not None:
+            self._alive = np.concatenate((self._alive, np.ones(len(df), dtype=bool)))
+            self._positions = np.concatenate((self._positions, np.arange(start, len(self._frame))))
+        self._next_id += len(df)
+        # A widened column changes what earlier results were computed over; recompute them
+        widened = not self._frame.dtypes.equals(frame.dtypes)
+        self._bump_version(appended=0 if widened else len(df))
+        return row_ids
+
+    def discard_results(self):
+        discard_results(self.id)
+
+    def memoize(self, operation: str, params, compute, version: int = None, extend=None):
+        """
+        Return compute() for this data version, reusing a cached result if any.
+
+        Background tasks pass the version their snapshot of the frame was taken
+        at, so a result that finishes after an edit is not filed as current.
+
+        extend: optional callable(previous, n_rows) that updates a result of
+        an earlier version with the last n_rows rows of the frame. It is used
+        instead of compute() when only appends happened since that result.
+        """
+        version = self.version if version is None else version
+        key = (self.id, version, operation, params)
+        cache = get_result_cache()
+        if extend is not None and key not in cache:
+            base, previous, appended = self._appended_since(operation, params, version)
+            if previous is not None:
+                result = extend(previous, appended)
+                cache.put(key, result)
+                dataset_id = self.id
+                cache.discard(lambda k: k[0] == dataset_id and k[2] == operation and k[3] == params
+                              and k[1] < version)
+                return result
+        return cache.get_or_compute(key, compute)
+
+    def _appended_since(self, operation, params, version):
+        """The newest result cached before version with only appends after it, and the rows appended since."""
+        cache = get_result_cache()
+        appends = [(before, v, count) for before, v, count in self._appends if v <= version]
+        if not appends or appends[-1][1] != version:
+            # Not an append of this data, e.g. a task that started before a reload
+            return None, None, 0
+        appended = 0
+        for before, v, count in reversed(appends):
+            appended += count
+            previous = cache.get((self.id, before, operation, params))
+            if previous is not None:
+                return before, previous, appended
+        return None, None, 0
+
+    def __len__(self):
+        if self._frame is None:
+            return 0
+        if self._positions is not None:
+            return len(self._positions)
+        return len(self._frame)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def columns(self):
+        return self._frame.columns if self._frame is not None else pd.Index([])
+
+    @property
+    def next_row_id(self) -> int:
+        """Id of the next appended row; for a frame read from a file, the rows read so far."""
+        return self._next_id
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The live rows, compacting pending deletions first."""
+        self.compact()
+        return self._frame
+
+    def tombstone_count(self) -> int:
+        if self._alive is None:
+            return 0
+        return len(self._frame) - len(self._positions)
+
+    def compact(self):
+        if self._alive is not None:
+            self._frame = self._frame[self._alive]
+            self._alive = None
+            self._positions = None
+
+    def maybe_compact(self, ratio: float = COMPACT_RATIO):
+        if self._frame is not None and self.tombstone_count() > ratio * len(self._frame):
+            self.compact()
+
+    def _position(self, view_row):
+        return view_row if self._positions is None else self._positions[view_row]
+
+    def value(self, view_row: int, column: int):
+        return self._frame.iat[self._position(view_row), column]
+
+    def row_id(self, view_row: int):
+        return self._frame.index[self._position(view_row)]
+
+    def row_ids(self, view_rows) -> pd.Index:
+        view_rows = np.asarray(view_rows, dtype=np.int64)
+        return self._frame.index[self._position(view_rows)]
+
+    def view_rows(self, row_ids) -> np.ndarray:
+        """Sorted, unique view rows of the live rows among row_ids."""
+        if self._frame is None:
+            return np.empty(0, dtype=np.int64)
+        positions = self._frame.index.get_indexer(pd.Index(row_ids).unique())
+        positions = positions[positions >= 0]
+        if self._alive is not None:
+            positions = positions[self._alive[positions]]
+            return np.searchsorted(self._positions, np.sort(positions))
+        return np.sort(positions)
+
+    def remove_view_rows(self, first: int, last: int):
+        """Tombstone the contiguous view rows first..last (inclusive)."""
+        if self._alive is None:
+            self._alive = np.ones(len(self._frame), dtype=bool)
+            self._positions = np.arange(len(self._frame))
+        self._alive[self._positions[first:last + 1]] = False
+        self._positions = np.delete(self._positions, np.s_[first:last + 1])
+        self._bump_version()
+
+    def remove_rows(self, row_ids) -> np.ndarray:
+        """Tombstone rows by id and return the view rows they occupied."""
+        view_rows = self.view_rows(row_ids)
+        if len(view_rows):
+            if self._alive is None:
+                self._alive = np.ones(len(self._frame), dtype=bool)
+            self._alive[self._position(view_rows)] = False
+            self._positions = np.flatnonzero(self._alive)
+            self._bump_version()
+        return view_rows
+
+
+def _next_row_id(df) -> int:
+    if df is None or not len(df):
+        return 0
+    if pd.api.types.is_integer_dtype(df.index):
+        return int(df.index.max()) + 1
+    return len(df)
+
+
+def _conform(current: pd.Series, added: pd.Series):
+    """
+    Bring an appended column to the type of the existing one.
+
+    Returns (current, added): categories new to the existing column are
+    added to it, and numbers are narrowed to its type when they fit.
+    Anything else is returned unchanged for concat to upcast.
+    """
+    if current.dtype == added.dtype:
+        return current, added
+    if isinstance(current.dtype, pd.CategoricalDtype):
+        new = pd.Index(added.dropna().unique()).difference(current.cat.categories)
+        if len(new):
+            current = current.cat.add_categories(new)
+        return current, added.astype(current.dtype)
+    if pd.api.types.is_numeric_dtype(current.dtype) and not pd.api.types.is_bool_dtype(current.dtype):
+        if not pd.api.types.is_numeric_dtype(added.dtype):
+            # Text in a numeric column: reading the whole file would have made it a text column too
+            return current, added
+        try:
+            narrowed = added.astype(current.dtype)
+        except (TypeError, ValueError):
+            return current, added
+        widened = narrowed.astype(np.float64) if narrowed.dtype.kind == "f" else narrowed
+        same = (widened == added) | (added.isna() & narrowed.isna())
+        return current, narrowed if same.all() else added
+    if pd.api.types.is_string_dtype(current.dtype):
+        # e.g. a chunk of a text column that happened to hold only numbers
+        return current, added.astype(current.dtype)
+    return current, added
+
+
+def discard_results(dataset_id: int):
+    """Drop every cached result of the Dataset (or results_key()) with this id."""
+    get_result_cache().discard(lambda key: key[0] == dataset_id)
+
+
+def as_dataset(data) -> Dataset:
+    return data if isinstance(data, Dataset) else Dataset(data)
+
+
+def contiguous_ranges(rows: np.ndarray) -> list:
+    """Split sorted rows into (first, last) runs of consecutive values."""
+    if not len(rows):
+        return []
+    breaks = np.flatnonzero(np.diff(rows) != 1)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]]))
+    return list(zip(starts.tolist(), ends.tolist()))
@@ -0,0 +1,143 @@
+"""
+Follow a CSV file that another program keeps appending to.
+
+    follower = CsvFollower.after_rows("log.csv", len(df))
+    rows = follower.poll()    # rows appended since the last poll, or None
+
+Only the bytes after the read offset are parsed; a trailing line without
+its newline yet is left for the next poll. A file that shrank below the
+offset, was replaced by another file (new inode) or no longer holds the
+bytes just before the offset raises FileReset, and the caller decides
+whether to reload it or stop (RESET_POLICIES).
+
+Row counts are mapped to byte offsets by counting line breaks, so quoted
+fields containing newlines are not supported.
+"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import NA_VALUES
+from utils.logger import span
+
+BLOCK_BYTES = 1 << 20
+# Most bytes parsed by one poll; a larger burst is read over several polls
+MAX_POLL_BYTES = 64 << 20
+# Bytes before the offset re-read on each poll to notice a rewritten file
+FINGERPRINT_BYTES = 64
+RESET_POLICIES = ("reload", "stop")
+
+
+class FileReset(Exception):
+    """The followed file was truncated or replaced, so the offset is meaningless."""
+
+
+def _read_header(handle) -> bytes:
+    header = handle.readline()
+    if not header.endswith(b"\n"):
+        raise ValueError("The file has no complete header line yet.")
+    return header
+
+
+def offset_after_rows(file_path: str, n_rows: int) -> int:
+    """
+    Byte offset just past the first n_rows data rows, skipping blank lines as
+    the CSV parser does. Raises ValueError if the file has fewer rows.
+    """
+    with open(file_path, "rb") as handle:
+        header = _read_header(handle)
+        offset = len(header)
+        remaining = n_rows
+        # Line starts are tracked across blocks to recognize blank lines
+        line_start, previous_byte = offset, b"\n"[0]
+        while remaining > 0:
+            block = handle.read(BLOCK_BYTES)
+            if not block:
+                # A last row without its newline was parsed too
+                if remaining == 1 and line_start < offset:
+                    return offset
+                raise ValueError(f"{os.path.basename(file_path)} has fewer than {n_rows} rows.")
+            data = np.frombuffer(block, dtype=np.uint8)
+            newlines = np.flatnonzero(data == 10)
+            starts = np.concatenate(([line_start - offset], newlines[:-1] + 1))
+            lengths = newlines - starts
+            # Empty lines and lone "\r" lines hold no row
+            last = np.where(newlines > 0, data[np.maximum(newlines - 1, 0)], previous_byte)
+            rows = ~((lengths == 0) | ((lengths == 1) & (last == 13)))
+            counted = np.cumsum(rows)
+            if len(counted) and counted[-1] >= remaining:
+                return offset + int(newlines[np.searchsorted(counted, remaining)]) + 1
+            remaining -= int(counted[-1]) if len(counted) else 0
+            if len(newlines):
+                line_start = offset + int(newlines[-1]) + 1
+            previous_byte = int(data[-1])
+            offset += len(block)
+    return offset
+
+
+class CsvFollower:
+    """
+    Reads the rows appended to a CSV file since the last poll.
+
+    Rows are parsed with the file's header line prepended, so they get the
+    same column names; Dataset.append brings them to the loaded types.
+    """
+
+    def __init__(self, file_path: str, offset: int):
+        self.file_path = file_path
+        with open(file_path, "rb") as handle:
+            self._header = _read_header(handle)
+            self._inode = os.fstat(handle.fileno()).st_ino
+            start = max(offset - FINGERPRINT_BYTES, 0)
+            handle.seek(start)
+            self._fingerprint = handle.read(offset - start)
+        self.offset = offset
+        self.rows_read = 0
+
+    @classmethod
+    def after_rows(cls, file_path: str, n_rows: int) -> "CsvFollower":
+        """Follow a file whose first n_rows rows are already loaded."""
+        return cls(file_path, offset_after_rows(file_path, n_rows))
+
+    def _check(self, handle, size: int):
+        name = os.path.basename(self.file_path)
+        if os.fstat(handle.fileno()).st_ino != self._inode:
+            raise FileReset(f"{name} was replaced by another file.")
+        if size < self.offset:
+            raise FileReset(f"{name} was truncated.")
+        handle.seek(self.offset - len(self._fingerprint))
+        if handle.read(len(self._fingerprint)) != self._fingerprint:
+            raise FileReset(f"{name} was rewritten.")
+
+    def poll(self) -> pd.DataFrame:
+        """The complete rows appended since the last poll, or None if there are none."""
+        try:
+            handle = open(self.file_path, "rb")
+        except FileNotFoundError:
+            # Rotated away and not recreated yet
+            return None
+        with handle:
+            size = os.fstat(handle.fileno()).st_size
+            self._check(handle, size)
+            if size == self.offset:
+                return None
+            data = handle.read(min(size - self.offset, MAX_POLL_BYTES))
+            end = data.rfind(b"\n")
+            if end < 0 and len(data) == MAX_POLL_BYTES:
+                # One line longer than a poll's budget
+                data += handle.read(size - self.offset - len(data))
+                end = data.rfind(b"\n")
+        if end < 0:
+            # The last line is still being written
+            return None
+
+        data = data[:end + 1]
+        with span("follow_csv", file=os.path.basename(self.file_path), bytes=len(data)) as s:
+            rows = pd.read_csv(io.BytesIO(self._header + data), na_values=NA_VALUES)
+            s.fields["rows"] = len(rows)
+        self.offset += len(data)
+        self._fingerprint = (self._fingerprint + data)[-FINGERPRINT_BYTES:]
+        self.rows_read += len(rows)
+        return rows if len(rows) else None
@@ -1,81 +1,201 @@
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QMessageBox
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+import numpy as np
+from PyQt6.QtCore import QStringListModel, Qt, QTimer
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QMessageBox, QLineEdit, QCompleter,
+    QSizePolicy
+)
+from graphs.render import draw_heatmap_figure, heatmap_grid, render_figure
+from ui.dataset_store import as_store
+from utils.task_scheduler import TaskScheduler
+
+# Completions offered per keystroke in the row search box
+MAX_ROW_COMPLETIONS = 50
+# Delay before re-rendering after the pane is resized, in milliseconds
+RESIZE_DEBOUNCE_MS = 150
+
+
+def _to_pixmap(rgba: np.ndarray) -> QPixmap:
+    height, width = rgba.shape[:2]
+    image = QImage(rgba.data, width, height, rgba.strides[0], QImage.Format.Format_RGBA8888)
+    return QPixmap.fromImage(image.copy())
+
 
 class HeatmapWidget(QWidget):
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, data):
         super().__init__()
 
-        self.df = df
-        self.numeric_df = self.df.select_dtypes(include='number')
+        self.store = as_store(data, parent=self)
+        self.dataset = self.store.dataset
 
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
 
-        # Dropdown selectors
+        # Selectors
         self.selector_layout = QHBoxLayout()
-        self.row_selector = QComboBox()
+        self.row_search = QLineEdit()
+        self.row_search.setPlaceholderText("(All Rows) - type a row label")
+        self.row_search.setClearButtonEnabled(True)
         self.col_selector = QComboBox()
+        self.agg_selector = QComboBox()
 
-        self.row_selector.addItem("(All Rows)")
-        self.col_selector.addItem("(All Columns)")
-
-        for col in self.numeric_df.columns:
-            self.col_selector.addItem(col)
+        # Row labels are only stringified once the user starts searching
+        self.row_completions = QStringListModel(self)
+        self.row_completer = QCompleter(self.row_completions, self)
+        self.row_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.row_search.setCompleter(self.row_completer)
 
-        self.row_index_map = {}
-        for idx in self.numeric_df.index:
-            idx_str = str(idx)
-            self.row_selector.addItem(idx_str)
-            self.row_index_map[idx_str] = idx
+        self._fill_column_selector()
+        self.agg_selector.addItems(["Mean", "Max"])
 
-        self.row_selector.currentIndexChanged.connect(self.plot_heatmap)
+        self.row_search.textEdited.connect(self._update_row_completions)
+        self.row_search.editingFinished.connect(self.plot_heatmap)
+        self.row_completer.activated.connect(lambda _: self.plot_heatmap())
         self.col_selector.currentIndexChanged.connect(self.plot_heatmap)
+        self.agg_selector.currentIndexChanged.connect(self.plot_heatmap)
 
         self.selector_layout.addWidget(QLabel("Select Row (optional):"))
-        self.selector_layout.addWidget(self.row_selector)
+        self.selector_layout.addWidget(self.row_search)
         self.selector_layout.addWidget(QLabel("Select Column (optional):"))
         self.selector_layout.addWidget(self.col_selector)
+        self.selector_layout.addWidget(QLabel("Aggregate:"))
+        self.selector_layout.addWidget(self.agg_selector)
         self.layout.addLayout(self.selector_layout)
 
-        self.canvas = FigureCanvas(plt.Figure(figsize=(10, 6)))
+        # The figure is rendered to an image on a worker thread
+        self.canvas = QLabel("Rendering heatmap...")
+        self.canvas.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.canvas.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+        self.canvas.setMinimumSize(200, 150)
         self.layout.addWidget(self.canvas)
 
+        self.tasks = TaskScheduler(self)
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(RESIZE_DEBOUNCE_MS)
+        self.resize_timer.timeout.connect(self.plot_heatmap)
+        # Data changes re-render after the same short delay as resizes
+        self.store.reloaded.connect(self._fill_column_selector)
+        self.store.data_changed.connect(self._on_data_changed)
+
+        self._last_selection = None
         self.plot_heatmap()
 
-    def plot_heatmap(self):
-        if self.numeric_df.empty:
-            QMessageBox.warning(self, "No Data", "No numeric data available to generate a heatmap.")
+    @property
+    def numeric_df(self) -> pd.DataFrame:
+        # Selected on demand from the live frame, so no stale copy is kept
+        return self.dataset.memoize(
+            "numeric_frame", (), lambda: self.dataset.frame.select_dtypes(include='number')
+        )
+
+    def _numeric_columns(self) -> list:
+        if self.store.source is not None:
+            return self.store.source.numeric_columns
+        return list(self.numeric_df.columns)
+
+    def _has_numeric_data(self) -> bool:
+        return self.store.has_data and bool(self._numeric_columns())
+
+    def _fill_column_selector(self):
+        # Out-of-core sources have no row index to search
+        out_of_core = self.store.source is not None
+        self.row_search.setEnabled(not out_of_core)
+        if out_of_core:
+            self.row_search.clear()
+        current = self.col_selector.currentText()
+        self.col_selector.blockSignals(True)
+        self.col_selector.clear()
+        self.col_selector.addItem("(All Columns)")
+        self.col_selector.addItems(self._numeric_columns())
+        if self.col_selector.findText(current) >= 0:
+            self.col_selector.setCurrentText(current)
+        self.col_selector.blockSignals(False)
+
+    def _on_data_changed(self):
+        self._last_selection = None
+        self.row_completions.setStringList([])
+        if not self._has_numeric_data():
+            self.tasks.cancel("heatmap")
+            self.canvas.setText("No numeric data available to generate a heatmap.")
             return
+        self.resize_timer.start()
 
-        row_filter = self.row_selector.currentText()
-        col_filter = self.col_selector.currentText()
+    def _row_labels(self) -> pd.Series:
+        return self.dataset.memoize(
+            "row_labels", (), lambda: pd.Series(self.numeric_df.index.astype(str), dtype="string")
+        )
 
-        filtered_df = self.numeric_df
+    def _update_row_completions(self, text):
+        if not text:
+            self.row_completions.setStringList([])
+            return
+        labels = self._row_labels()
+        matches = labels[labels.str.startswith(text)].head(MAX_ROW_COMPLETIONS)
+        self.row_completions.setStringList(matches.tolist())
 
-        if row_filter != "(All Rows)":
-            try:
-                real_index = self.row_index_map[row_filter]
-                filtered_df = filtered_df.loc[[real_index]]
-            except KeyError:
-                QMessageBox.warning(self, "Invalid Row", f"Row '{row_filter}' not found.")
-                return
+    def _find_row(self, text):
+        positions = np.flatnonzero((self._row_labels() == text).to_numpy(dtype=bool, na_value=False))
+        return self.numeric_df.index[positions[0]] if len(positions) else None
+
+    def _canvas_size(self):
+        return max(self.canvas.width(), 200), max(self.canvas.height(), 150)
 
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resize_timer.start()
+
+    def _filter_data(self, row_filter, col_filter):
+        filtered_df = self.numeric_df
+        if row_filter != "(All Rows)":
+            filtered_df = filtered_df.loc[[self._find_row(row_filter)]]
         if col_filter != "(All Columns)":
             filtered_df = filtered_df[[col_filter]]
+        return filtered_df
+
+    def plot_heatmap(self):
+        if not self._has_numeric_data():
+            QMessageBox.warning(self, "No Data", "No numeric data available to generate a heatmap.")
+            return
 
-        self.canvas.figure.clear()
-        ax = self.canvas.figure.subplots()
+        row_filter = self.row_search.text().strip() or "(All Rows)"
+        col_filter = self.col_selector.currentText()
+        how = self.agg_selector.currentText().lower()
+        width, height = self._canvas_size()
 
-        if filtered_df.empty:
-            ax.text(0.5, 0.5, "No numeric data available for heatmap.",
-                    ha='center', va='center', transform=ax.transAxes)
+        selection = (row_filter, col_filter, how, width, height)
+        # editingFinished also fires on focus changes; skip unchanged selections
+        if selection == self._last_selection:
+            return
+        self._last_selection = selection
+
+        if row_filter != "(All Rows)" and self._find_row(row_filter) is None:
+            QMessageBox.warning(self, "Invalid Row", f"Row '{row_filter}' not found.")
+            return
+
+        # One heatmap cell per pixel at most
+        max_rows, max_cols = height, width
+        dataset, version, source = self.dataset, self.dataset.version, self.store.source
+        if source is not None:
+            # Binned by the query engine; only the grid is fetched
+            columns = self._numeric_columns() if col_filter == "(All Columns)" else [col_filter]
+            compute = lambda: source.heatmap_grid(columns, max_rows, max_cols, how)
         else:
-            sns.heatmap(filtered_df, cmap="YlGnBu", ax=ax, annot=True)
-            ax.set_title("Heatmap of Selected Data")
-            ax.set_xlabel("Columns")
-            ax.set_ylabel("Rows")
+            filtered_df = self._filter_data(row_filter, col_filter)
+            compute = lambda: heatmap_grid(filtered_df, max_rows, max_cols, how)
+
+        def render(token):
+            grid = dataset.memoize(
+                "heatmap_grid", (row_filter, col_filter, how, max_rows, max_cols), compute, version=version
+            )
+            token.check()
+            return render_figure(lambda figure: draw_heatmap_figure(figure, grid, how), width, height)
+
+        self.tasks.submit("heatmap", render, self._show_image, self._show_error)
+
+    def _show_image(self, rgba):
+        self.canvas.setPixmap(_to_pixmap(rgba))
 
-        self.canvas.draw()
+    def _show_error(self, message):
+        self._last_selection = None
+        self.canvas.setText(f"Could not render heatmap: {message}")
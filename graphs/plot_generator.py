@@ -1,64 +1,195 @@
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
+import numpy as np
+from graphs.render import SeriesIndex, draw_series
+from ui.dataset_store import CHANGE_DEBOUNCE_MS, as_store
+from utils.logger import timed
+from utils.task_scheduler import TaskScheduler
+
+DECIMATION_METHODS = {"Min/Max": "minmax", "LTTB": "lttb"}
+
 
 class PlotWidget(QWidget):
-    def __init__(self, df):
+    def __init__(self, data):
         super().__init__()
 
-        self.df = df
+        self.store = as_store(data, parent=self)
+        self.dataset = self.store.dataset
         self.layout = QVBoxLayout(self)
-        
+
         # Dropdowns
         self.selector_layout = QHBoxLayout()
         self.x_selector = QComboBox()
         self.y_selector = QComboBox()
-        self.plot_type_selector = QComboBox()  # <-- Add this line
+        self.plot_type_selector = QComboBox()
+        self.decimation_selector = QComboBox()
 
-        for col in df.select_dtypes(include='number').columns:
-            self.x_selector.addItem(col)
-            self.y_selector.addItem(col)
-
-        self.plot_type_selector.addItems(["Line", "Bar", "Scatter"])  # <-- Add this line
+        self._fill_column_selectors()
+        self.plot_type_selector.addItems(["Line", "Bar", "Scatter"])
+        self.decimation_selector.addItems(list(DECIMATION_METHODS))
 
         self.x_selector.currentIndexChanged.connect(self.update_plot)
         self.y_selector.currentIndexChanged.connect(self.update_plot)
-        self.plot_type_selector.currentIndexChanged.connect(self.update_plot)  # <-- Add this line
+        self.plot_type_selector.currentIndexChanged.connect(self.update_plot)
+        self.decimation_selector.currentIndexChanged.connect(self.update_plot)
 
         # Add to layout
         self.selector_layout.addWidget(QLabel("X Axis:"))
         self.selector_layout.addWidget(self.x_selector)
         self.selector_layout.addWidget(QLabel("Y Axis:"))
         self.selector_layout.addWidget(self.y_selector)
-        self.selector_layout.addWidget(QLabel("Plot Type:"))  # <-- Add this line
-        self.selector_layout.addWidget(self.plot_type_selector)  # <-- Add this line
+        self.selector_layout.addWidget(QLabel("Plot Type:"))
+        self.selector_layout.addWidget(self.plot_type_selector)
+        self.selector_layout.addWidget(QLabel("Decimation:"))
+        self.selector_layout.addWidget(self.decimation_selector)
         self.layout.addLayout(self.selector_layout)
 
         # Matplotlib Figure
         self.figure = Figure(figsize=(5, 3))
         self.canvas = FigureCanvas(self.figure)
+        self.toolbar = NavigationToolbar(self.canvas, self)
+        self.layout.addWidget(self.toolbar)
         self.layout.addWidget(self.canvas)
 
+        self.series_index = None
+        self.artist = None
+        self._updating_view = False
+        self.tasks = TaskScheduler(self)
+
+        self.change_timer = QTimer(self)
+        self.change_timer.setSingleShot(True)
+        self.change_timer.setInterval(CHANGE_DEBOUNCE_MS)
+        self.change_timer.timeout.connect(self.update_plot)
+        self.store.data_changed.connect(self.change_timer.start)
+        self.store.reloaded.connect(self._fill_column_selectors)
+
         self.update_plot()
 
+    def _numeric_columns(self):
+        if self.store.source is not None:
+            return self.store.source.numeric_columns
+        # Appended rows take the frame's column types, so the selection stays valid
+        return self.dataset.memoize(
+            "numeric_columns", (), lambda: list(self.dataset.frame.select_dtypes(include='number').columns),
+            extend=lambda previous, n: previous,
+        )
+
+    def _fill_column_selectors(self):
+        columns = self._numeric_columns()
+        for selector in (self.x_selector, self.y_selector):
+            current = selector.currentText()
+            selector.blockSignals(True)
+            selector.clear()
+            selector.addItems(columns)
+            if current in columns:
+                selector.setCurrentText(current)
+            selector.blockSignals(False)
+
+    def _series_index(self, df, x_col, y_col, version=None, source=None):
+        if source is not None:
+            # Out-of-core: small series are fetched, large ones answered by queries
+            compute = lambda: source.series(x_col, y_col)
+        else:
+            # Sorting once per column pair lets zoom/pan slice the visible range;
+            # appended rows are merged into the sorted arrays instead
+            x, y = df[x_col], df[y_col]
+            compute = lambda: SeriesIndex(x, y)
+            extend = lambda previous, n: previous.extended(x.iloc[len(x) - n:], y.iloc[len(y) - n:])
+            return self.dataset.memoize("series_index", (x_col, y_col), compute, version=version, extend=extend)
+        return self.dataset.memoize("series_index", (x_col, y_col), compute, version=version)
+
+    def _canvas_size(self):
+        return max(self.canvas.width(), 100), max(self.canvas.height(), 100)
+
     def update_plot(self):
+        x_col = self.x_selector.currentText()
+        y_col = self.y_selector.currentText()
+        plot_type = self.plot_type_selector.currentText()
+        if not (x_col and y_col):
+            self._draw(None, x_col, y_col, plot_type)
+            return
+
+        # Sorting the series is the slow part; it runs off the GUI thread and
+        # a newer selection cancels the one in flight
+        df, version, source = self.dataset.frame, self.dataset.version, self.store.source
+        self.tasks.submit(
+            "series_index",
+            lambda token: self._series_index(df, x_col, y_col, version, source),
+            lambda index: self._draw(index, x_col, y_col, plot_type),
+            self._show_error,
+        )
+
+    @timed("PlotWidget.draw")
+    def _draw(self, index, x_col, y_col, plot_type):
+        self.figure.clear()
+        ax = self.figure.add_subplot(111)
+        self.series_index = index
+        self.artist = None
+        self.tasks.cancel("view")
+
+        if index is not None:
+            width, height = self._canvas_size()
+            self.artist = draw_series(ax, index, plot_type, width, height,
+                                      DECIMATION_METHODS[self.decimation_selector.currentText()])
+            ax.callbacks.connect("xlim_changed", self._on_view_changed)
+            ax.callbacks.connect("ylim_changed", self._on_view_changed)
+
+        ax.set_xlabel(x_col)
+        ax.set_ylabel(y_col)
+        ax.set_title(f"{plot_type} Plot")
+
+        self.canvas.draw_idle()
+
+    def _show_error(self, message):
         self.figure.clear()
+        self.series_index = None
+        self.artist = None
         ax = self.figure.add_subplot(111)
+        ax.set_axis_off()
+        ax.text(0.5, 0.5, f"Could not plot: {message}", ha="center", va="center", wrap=True)
+        self.canvas.draw_idle()
 
-        x = self.df[self.x_selector.currentText()]
-        y = self.df[self.y_selector.currentText()]
+    def _on_view_changed(self, ax):
+        """Re-decimate or re-rasterize the visible range after a zoom or pan."""
+        if self._updating_view or self.artist is None:
+            return
+        width, height = self._canvas_size()
         plot_type = self.plot_type_selector.currentText()
+        if plot_type == "Scatter" and not hasattr(self.artist, "set_extent"):
+            return
+        index, artist = self.series_index, self.artist
+        method = DECIMATION_METHODS[self.decimation_selector.currentText()]
+        xlim, ylim = ax.get_xlim(), ax.get_ylim()
 
-        if plot_type == "Line":
-            ax.plot(x, y)
-        elif plot_type == "Bar":
-            ax.bar(x, y)
-        elif plot_type == "Scatter":
-            ax.scatter(x, y)
+        def compute():
+            if plot_type == "Line":
+                return index.line(width, xlim, method)
+            if plot_type == "Scatter":
+                return index.density((max(width // 2, 1), max(height // 2, 1)), xlim, ylim)
+            return None
 
-        ax.set_xlabel(self.x_selector.currentText())
-        ax.set_ylabel(self.y_selector.currentText())
-        ax.set_title(f"{plot_type} Plot")
+        if isinstance(index, SeriesIndex):
+            self._apply_view(artist, plot_type, compute())
+        else:
+            # Out-of-core series re-query the file, so that runs off the GUI thread
+            self.tasks.submit("view", lambda token: compute(), lambda view: self._apply_view(artist, plot_type, view),
+                              self._show_error)
 
-        self.canvas.draw()
+    def _apply_view(self, artist, plot_type, view):
+        if view is None or artist is not self.artist:
+            return
+        self._updating_view = True
+        try:
+            if plot_type == "Line":
+                artist.set_data(*view)
+            else:
+                counts, extent = view
+                artist.set_data(np.ma.masked_equal(counts, 0))
+                artist.set_extent(extent)
+                artist.autoscale()
+            self.canvas.draw_idle()
+        finally:
+            self._updating_view = False
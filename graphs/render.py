@@ -0,0 +1,313 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+
+from utils.logger import span, timed
+
+# Heatmaps with more cells than this are drawn without per-cell text
+ANNOTATION_CELL_LIMIT = 400
+
+
+def _bin_axis(values: np.ndarray, size: int, how: str, axis: int):
+    n = values.shape[axis]
+    if n <= size:
+        return values, 1
+
+    factor = -(-n // size)
+    n_bins = -(-n // factor)
+    pad = n_bins * factor - n
+    if pad:
+        pad_shape = list(values.shape)
+        pad_shape[axis] = pad
+        values = np.concatenate((values, np.full(pad_shape, np.nan)), axis=axis)
+
+    if axis == 0:
+        blocks = values.reshape(n_bins, factor, values.shape[1])
+    else:
+        blocks = values.reshape(values.shape[0], n_bins, factor)
+    reduce = np.nanmax if how == "max" else np.nanmean
+    with warnings.catch_warnings():
+        # All-NaN bins are expected and stay NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return reduce(blocks, axis=axis + 1), factor
+
+
+def bin_matrix(values: np.ndarray, max_rows: int, max_cols: int, how: str = "mean"):
+    """
+    Aggregate a 2D array down to at most max_rows x max_cols cells.
+
+    Parameters:
+    - values: 2D float array; NaNs are ignored by the aggregation.
+    - max_rows, max_cols: int, target grid size (e.g. the canvas size in pixels).
+    - how: str, "mean" or "max".
+
+    Returns:
+    - (binned array, rows per bin, columns per bin)
+    """
+    binned, row_factor = _bin_axis(np.asarray(values, dtype=np.float64), max_rows, how, axis=0)
+    binned, col_factor = _bin_axis(binned, max_cols, how, axis=1)
+    return binned, row_factor, col_factor
+
+
+@timed()
+def heatmap_grid(df: pd.DataFrame, max_rows: int, max_cols: int, how: str = "mean") -> dict:
+    """Bin the numeric values of df into a render-ready grid with tick labels."""
+    values = df.to_numpy(dtype=np.float64, na_value=np.nan)
+    binned, row_factor, col_factor = bin_matrix(values, max_rows, max_cols, how)
+    return {
+        "values": binned,
+        "row_factor": row_factor,
+        "col_factor": col_factor,
+        "row_labels": [str(label) for label in df.index[::row_factor]],
+        "col_labels": [str(label) for label in df.columns[::col_factor]],
+    }
+
+
+def _set_ticks(set_ticks, set_labels, labels, max_ticks=20):
+    step = max(1, -(-len(labels) // max_ticks))
+    positions = np.arange(0, len(labels), step)
+    set_ticks(positions)
+    set_labels([labels[i] for i in positions])
+
+
+def draw_heatmap(figure, ax, grid: dict, cmap: str = "YlGnBu",
+                 annotate_limit: int = ANNOTATION_CELL_LIMIT):
+    """Draw a binned grid as a single image artist, annotating only small grids."""
+    values = np.ma.masked_invalid(grid["values"])
+    image = ax.imshow(values, cmap=cmap, aspect="auto", interpolation="nearest")
+    figure.colorbar(image, ax=ax)
+
+    _set_ticks(ax.set_yticks, ax.set_yticklabels, grid["row_labels"])
+    _set_ticks(ax.set_xticks, ax.set_xticklabels, grid["col_labels"])
+    ax.tick_params(axis="x", labelrotation=90)
+
+    if values.size <= annotate_limit:
+        threshold = np.nanmean(grid["values"]) if values.count() else 0
+        for (row, col), value in np.ndenumerate(grid["values"]):
+            if not np.isnan(value):
+                ax.text(col, row, f"{value:.2f}", ha="center", va="center", fontsize=8,
+                        color="white" if value > threshold else "black")
+    return image
+
+
+def draw_heatmap_figure(figure, grid: dict, how: str = "mean"):
+    """Fill a figure with a titled heatmap of a heatmap_grid() result."""
+    ax = figure.subplots()
+    if grid["values"].size == 0:
+        ax.text(0.5, 0.5, "No numeric data available for heatmap.",
+                ha='center', va='center', transform=ax.transAxes)
+        return
+    draw_heatmap(figure, ax, grid)
+    title = "Heatmap of Selected Data"
+    if grid["row_factor"] > 1 or grid["col_factor"] > 1:
+        title += f" ({how} of {grid['row_factor']}x{grid['col_factor']} cell bins)"
+    ax.set_title(title)
+    ax.set_xlabel("Columns")
+    ax.set_ylabel("Rows")
+    figure.tight_layout()
+
+
+def render_figure(draw, width_px: int, height_px: int, dpi: int = 100) -> np.ndarray:
+    """
+    Draw a figure offscreen with Agg and return its pixels as an RGBA array.
+
+    Each call builds its own Figure and canvas, so worker threads can render
+    concurrently without touching pyplot or any on-screen canvas.
+    """
+    with span("render_figure", width=width_px, height=height_px):
+        figure = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+        canvas = FigureCanvasAgg(figure)
+        draw(figure)
+        canvas.draw()
+        return np.array(canvas.buffer_rgba())
+
+
+def save_figure(draw, path: str, width_px: int, height_px: int, dpi: int = 100):
+    """Draw a figure offscreen with Agg and write it to path (format from the extension)."""
+    with span("save_figure", file=os.path.basename(path)):
+        figure = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+        FigureCanvasAgg(figure)
+        draw(figure)
+        figure.savefig(path, dpi=dpi)
+
+
+# Above this many points a scatter plot is drawn as a density image
+SCATTER_DENSITY_THRESHOLD = 50_000
+# Bars per pixel column budget before bar plots are aggregated
+MAX_BARS = 200
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, n_bins: int):
+    """Keep the min and max y of each of n_bins equal-count buckets, in x order."""
+    n = len(x)
+    if n <= 2 * n_bins:
+        return x, y
+    size = -(-n // n_bins)
+    n_bins = -(-n // size)
+    padded = np.concatenate((y, np.full(n_bins * size - n, np.nan))).reshape(n_bins, size)
+    base = np.arange(n_bins) * size
+    picks = np.sort(np.stack((base + np.nanargmin(padded, axis=1),
+                              base + np.nanargmax(padded, axis=1)), axis=1), axis=1).ravel()
+    return x[picks], y[picks]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int):
+    """Largest-Triangle-Three-Buckets downsampling of an x-sorted series."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # n_out - 2 buckets over the interior points; the ends are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    picks = np.empty(n_out, dtype=np.int64)
+    picks[0], picks[-1] = 0, n - 1
+    anchor = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[anchor] - avg_x) * (y[start:end] - y[anchor])
+                      - (x[anchor] - x[start:end]) * (avg_y - y[anchor]))
+        anchor = start + int(np.argmax(area))
+        picks[i + 1] = anchor
+    return x[picks], y[picks]
+
+
+def aggregate_bars(x: np.ndarray, y: np.ndarray, max_bars: int = MAX_BARS):
+    """
+    Average y over equal-width x intervals when there are more than max_bars bars.
+
+    Returns:
+    - (centers, heights, width), or None when no aggregation is needed.
+    """
+    if len(x) <= max_bars:
+        return None
+    lo, hi = float(x.min()), float(x.max())
+    if lo == hi:
+        return np.array([lo]), np.array([y.mean()]), 0.8
+    edges = np.linspace(lo, hi, max_bars + 1)
+    bins = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, max_bars - 1)
+    counts = np.bincount(bins, minlength=max_bars)
+    sums = np.bincount(bins, weights=y, minlength=max_bars)
+    keep = counts > 0
+    centers = (edges[:-1] + edges[1:]) / 2
+    return centers[keep], sums[keep] / counts[keep], edges[1] - edges[0]
+
+
+class SeriesIndex:
+    """
+    An x-sorted copy of an (x, y) series with NaN pairs removed.
+
+    Visible ranges are located with binary search, so decimating or
+    rasterizing the current view costs only the points inside it.
+    rows holds each point's position in the input, so a line with nothing
+    to decimate can still be drawn in row order.
+    """
+
+    def __init__(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        rows = np.flatnonzero(valid)
+        x, y = x[valid], y[valid]
+        order = np.argsort(x, kind="stable")
+        self.x = x[order]
+        self.y = y[order]
+        self.rows = rows[order]
+        self.n_rows = len(valid)
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def nbytes(self) -> int:
+        return self.x.nbytes + self.y.nbytes + self.rows.nbytes
+
+    def extended(self, x, y) -> "SeriesIndex":
+        """
+        A new index that also holds the given points, e.g. appended rows.
+
+        Only the new points are sorted; they are merged in after equal x
+        values, the order a stable sort of all rows would give them.
+        """
+        added = SeriesIndex(x, y)
+        positions = np.searchsorted(self.x, added.x, side="right")
+        index = SeriesIndex.__new__(SeriesIndex)
+        index.x = np.insert(self.x, positions, added.x)
+        index.y = np.insert(self.y, positions, added.y)
+        index.rows = np.insert(self.rows, positions, added.rows + self.n_rows)
+        index.n_rows = self.n_rows + added.n_rows
+        return index
+
+    def visible(self, xlim=None):
+        if xlim is None:
+            return self.x, self.y
+        lo = max(np.searchsorted(self.x, min(xlim), side="left") - 1, 0)
+        hi = np.searchsorted(self.x, max(xlim), side="right") + 1
+        return self.x[lo:hi], self.y[lo:hi]
+
+    def line(self, n_pixels: int, xlim=None, method: str = "minmax"):
+        """
+        The points of a line plot: every point in row order when there are at
+        most two per pixel column, else the visible range decimated in x order.
+        """
+        if len(self) <= 2 * n_pixels:
+            # As plotted without decimation; matplotlib clips to the view itself
+            order = np.argsort(self.rows)
+            return self.x[order], self.y[order]
+        x, y = self.visible(xlim)
+        if method == "lttb":
+            return lttb(x, y, 2 * n_pixels)
+        return minmax_decimate(x, y, n_pixels)
+
+    def density(self, bins, xlim=None, ylim=None):
+        x, y = self.visible(xlim)
+        if xlim is None:
+            xlim = (self.x[0], self.x[-1]) if len(self.x) else (0, 1)
+        if ylim is None:
+            ylim = (self.y.min(), self.y.max()) if len(self.y) else (0, 1)
+        x_range = sorted(xlim) if xlim[0] != xlim[1] else (xlim[0] - 0.5, xlim[0] + 0.5)
+        y_range = sorted(ylim) if ylim[0] != ylim[1] else (ylim[0] - 0.5, ylim[0] + 0.5)
+        counts, _, _ = np.histogram2d(x, y, bins=bins, range=(x_range, y_range))
+        return counts.T, (x_range[0], x_range[1], y_range[0], y_range[1])
+
+    def bars(self, max_bars: int):
+        return aggregate_bars(self.x, self.y, max_bars)
+
+
+@timed()
+def draw_series(ax, index: SeriesIndex, kind: str, width_px: int, height_px: int,
+                method: str = "minmax"):
+    """
+    Draw a line, bar or scatter plot of an indexed series at screen resolution.
+
+    index is a SeriesIndex, or a query_source.QuerySeries for out-of-core data.
+
+    Returns the artist that later zoom/pan updates modify.
+    """
+    if kind == "Line":
+        x, y = index.line(width_px, method=method)
+        return ax.plot(x, y)[0]
+
+    if kind == "Bar":
+        aggregated = index.bars(min(MAX_BARS, max(width_px // 4, 1)))
+        if aggregated is None:
+            return ax.bar(index.x, index.y)
+        centers, heights, width = aggregated
+        return ax.bar(centers, heights, width=width)
+
+    if len(index) <= SCATTER_DENSITY_THRESHOLD:
+        return ax.scatter(index.x, index.y)
+
+    counts, extent = index.density((max(width_px // 2, 1), max(height_px // 2, 1)))
+    image = ax.imshow(np.ma.masked_equal(counts, 0), extent=extent, origin="lower",
+                      aspect="auto", interpolation="nearest", cmap="viridis", norm=LogNorm())
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    return image
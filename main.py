@@ -1,8 +1,12 @@
 import sys
+from PyQt6.QtCore import QThreadPool
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import MainWindow
+from utils.logger import configure_logging
 
 def main():
+    configure_logging()
+
     # Create application instance
     app = QApplication(sys.argv)
     app.setApplicationName("Data Analyzer")
@@ -12,7 +16,11 @@ def main():
     window.show()
 
     # Start the event loop
-    sys.exit(app.exec())
+    exit_code = app.exec()
+
+    # Pending pane tasks were cancelled on quit; let the workers wind down
+    QThreadPool.globalInstance().waitForDone()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,201 @@
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from models.sufficient_stats import SufficientStatistics, lasso_coordinate_descent
+from utils.logger import timed
+
+DEFAULT_ALPHAS = np.logspace(-3, 3, 13)
+DEFAULT_FOLDS = 5
+
+
+class BudgetExceeded(Exception):
+    """The wall-clock budget ran out before a fold finished."""
+
+
+@timed()
+def fold_statistics(df: pd.DataFrame, columns, n_folds: int = DEFAULT_FOLDS, seed: int = 0,
+                    n_jobs: int = -1) -> list:
+    """
+    Shuffle the rows into n_folds folds and accumulate SufficientStatistics per fold.
+
+    This is the only pass over the rows: training sets are merges of the
+    other folds, and held-out folds are scored from their own statistics.
+    """
+    columns = list(dict.fromkeys(columns))
+    if len(df) < n_folds:
+        raise ValueError(f"Need at least {n_folds} rows for {n_folds}-fold cross-validation.")
+    folds = np.array_split(np.random.default_rng(seed).permutation(len(df)), n_folds)
+    block = df[columns]
+
+    def accumulate(rows):
+        stats = SufficientStatistics(columns)
+        stats.update(block.iloc[np.sort(rows)])
+        return stats
+
+    # numpy releases the GIL in the matrix products, so threads spread over
+    # cores without copying the frame into worker processes
+    return Parallel(n_jobs=n_jobs, prefer="threads")(delayed(accumulate)(rows) for rows in folds)
+
+
+def ridge_path(sxx: np.ndarray, sxy: np.ndarray, alphas) -> np.ndarray:
+    """
+    Ridge coefficients for every alpha from one eigendecomposition of sxx.
+
+    Returns an (alphas, features, targets) array.
+    """
+    eigenvalues, vectors = np.linalg.eigh(sxx)
+    projected = vectors.T @ sxy
+    return np.stack([vectors @ (projected / (eigenvalues + alpha)[:, None]) for alpha in alphas])
+
+
+def lasso_path(gram: np.ndarray, xy: np.ndarray, alphas, deadline: float = None) -> np.ndarray:
+    """
+    Lasso coefficients along alphas, each solve warm-started from the previous one.
+
+    alphas are visited from the largest (sparsest) to the smallest and the
+    result is returned in the caller's order as (alphas, features, targets).
+    """
+    alphas = np.asarray(alphas, dtype=np.float64)
+    order = np.argsort(alphas)[::-1]
+    path = np.empty((len(alphas),) + xy.shape)
+    coef = None
+    for i in order:
+        if deadline is not None and time.perf_counter() > deadline:
+            raise BudgetExceeded()
+        coef = lasso_coordinate_descent(gram, xy, alphas[i], coef)
+        path[i] = coef
+    return path
+
+
+def _coefficient_path(stats: SufficientStatistics, model: str, features, targets, alphas, deadline=None):
+    sxx, sxy, _, mean_x, mean_y = stats._system(features, targets)
+    if model == "linear":
+        path = np.linalg.lstsq(sxx, sxy, rcond=None)[0][None]
+    elif model == "ridge":
+        path = ridge_path(sxx, sxy, alphas)
+    elif model == "lasso":
+        path = lasso_path(sxx / stats.count, sxy / stats.count, alphas, deadline)
+    else:
+        raise ValueError(f"Unknown model: {model}")
+    intercepts = mean_y - np.einsum("j,ajt->at", mean_x, path)
+    return path, intercepts
+
+
+def _score_fold(index, folds, model, features, targets, alphas, deadline):
+    start = time.perf_counter()
+    if deadline is not None and start > deadline:
+        return index, None, 0.0
+    train = SufficientStatistics(folds[index].columns)
+    for other, stats in enumerate(folds):
+        if other != index:
+            train.merge(stats)
+    try:
+        path, intercepts = _coefficient_path(train, model, features, targets, alphas, deadline)
+    except BudgetExceeded:
+        return index, None, time.perf_counter() - start
+    held_out = folds[index]
+    mse = np.stack([
+        held_out.sse(features, targets, coef, intercept) / max(held_out.count, 1)
+        for coef, intercept in zip(path, intercepts)
+    ])
+    return index, mse, time.perf_counter() - start
+
+
+def _score_fold_in_process(index, folds, model, features, targets, alphas, wall_deadline):
+    # perf_counter values are not comparable across processes; the deadline travels as wall time
+    deadline = None if wall_deadline is None else time.perf_counter() + (wall_deadline - time.time())
+    return _score_fold(index, folds, model, features, targets, alphas, deadline)
+
+
+class CrossValidationResult:
+    """
+    Outcome of cross_validate: the error curve, the chosen alphas and final fits.
+
+    mse is (alphas, targets), averaged over the folds that finished within
+    the budget; fold_seconds holds the time spent on each fold, None for
+    folds that were skipped or cut off.
+    """
+
+    def __init__(self, model, alphas, targets, mse, fold_seconds, fits):
+        self.model = model
+        self.alphas = alphas
+        self.targets = targets
+        self.mse = mse
+        self.fold_seconds = fold_seconds
+        self.fits = fits
+
+    @property
+    def folds_completed(self) -> int:
+        return sum(seconds is not None for seconds in self.fold_seconds)
+
+    @property
+    def best_alphas(self) -> dict:
+        return {target: fit.alpha for target, fit in zip(self.targets, self.fits)}
+
+
+@timed()
+def cross_validate(df: pd.DataFrame, model: str, features, targets, alphas=DEFAULT_ALPHAS,
+                   n_folds: int = DEFAULT_FOLDS, budget_seconds: float = None, n_jobs: int = -1,
+                   seed: int = 0, folds: list = None) -> CrossValidationResult:
+    """
+    K-fold cross-validation of a linear model over an alpha grid, for all targets at once.
+
+    Parameters:
+    - df: DataFrame holding the feature and target columns.
+    - model: "linear", "ridge" or "lasso"; "linear" ignores alphas.
+    - features, targets: lists of numeric column names.
+    - alphas: regularization strengths to try (sklearn's Ridge/Lasso scaling).
+    - n_folds: int, number of folds.
+    - budget_seconds: optional wall-clock limit, counted from the call; folds
+      that do not finish in time are left out of the averaged error.
+    - n_jobs: joblib worker count, -1 for all cores.
+    - folds: optional precomputed fold_statistics() to reuse across models.
+
+    Returns:
+    - CrossValidationResult, with each target refitted on all rows at its best alpha.
+    """
+    deadline = None if budget_seconds is None else time.perf_counter() + budget_seconds
+    targets = list(targets)
+    alphas = np.array([0.0]) if model == "linear" else np.asarray(alphas, dtype=np.float64)
+    if folds is None:
+        folds = fold_statistics(df, list(features) + targets, n_folds, seed, n_jobs)
+
+    if model == "lasso":
+        # Coordinate descent is a Python loop that holds the GIL, so threads would
+        # run the folds one at a time; worker processes only need the small fold statistics
+        wall_deadline = None if deadline is None else time.time() + (deadline - time.perf_counter())
+        scored = Parallel(n_jobs=n_jobs, prefer="processes")(
+            delayed(_score_fold_in_process)(index, folds, model, features, targets, alphas, wall_deadline)
+            for index in range(len(folds))
+        )
+    else:
+        # The linear and ridge solves are LAPACK calls, which release the GIL
+        scored = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(_score_fold)(index, folds, model, features, targets, alphas, deadline)
+            for index in range(len(folds))
+        )
+    fold_seconds = [None] * len(folds)
+    errors = []
+    for index, mse, seconds in scored:
+        if mse is not None:
+            fold_seconds[index] = seconds
+            errors.append(mse)
+    if not errors:
+        raise BudgetExceeded("No fold finished within the time budget.")
+    mse = np.mean(errors, axis=0)
+
+    full = SufficientStatistics(folds[0].columns)
+    for stats in folds:
+        full.merge(stats)
+    fits = []
+    for t, target in enumerate(targets):
+        alpha = float(alphas[np.argmin(mse[:, t])])
+        if model == "lasso":
+            fit = full.solve_lasso(features, target, alpha)
+        else:
+            fit = full.solve(features, target, alpha)
+        fits.append(fit)
+    return CrossValidationResult(model, alphas, targets, mse, fold_seconds, fits)
@@ -1,17 +1,50 @@
+import os
+
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox, QMessageBox
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QMessageBox,
+    QCheckBox, QProgressBar, QSpinBox, QDoubleSpinBox, QFileDialog
 )
-from PyQt6.QtCore import Qt
-from sklearn.linear_model import LinearRegression, Ridge, Lasso
-import pandas as pd
+from PyQt6.QtCore import Qt, QTimer
+import numpy as np
+from models.model_selection import DEFAULT_FOLDS, cross_validate, fold_statistics
+from models.saved_model import as_saved_model, predict_csv, save_model
+from models.sufficient_stats import dataset_statistics, fit_csv, fit_sufficient
+from ui.dataset_store import CHANGE_DEBOUNCE_MS, as_store
+from utils.task_scheduler import TaskScheduler
+
+# Selector labels and the model names used by the out-of-core fit
+MODEL_TYPES = {"Linear Regression": "linear", "Ridge Regression": "ridge", "Lasso Regression": "lasso"}
+MODEL_FILE_FILTER = "Saved Models (*.joblib);;All Files (*)"
+
+
+def ask_prediction_paths(parent, model_name: str = "model"):
+    """Ask for a CSV file to score and where to write its predictions; (None, None) if cancelled."""
+    input_path, _ = QFileDialog.getOpenFileName(
+        parent, f"Score CSV File with the {model_name}", "", "CSV Files (*.csv);;All Files (*)"
+    )
+    if not input_path:
+        return None, None
+    stem, _ = os.path.splitext(input_path)
+    output_path, _ = QFileDialog.getSaveFileName(
+        parent, "Write Predictions To", f"{stem}_predictions.csv", "CSV Files (*.csv);;All Files (*)"
+    )
+    return (input_path, output_path) if output_path else (None, None)
+
 
 class RegressionModelWidget(QWidget):
-    def __init__(self, df, independent_vars, dependent_vars):
+    def __init__(self, data, independent_vars, dependent_vars, file_path: str = None, engine: str = "c"):
         super().__init__()
-        self.df = df
+        self.store = as_store(data, parent=self)
+        self.dataset = self.store.dataset
         self.independent_vars = independent_vars
         self.dependent_vars = dependent_vars
+        self.file_path = file_path
+        self.engine = engine
         self.model = None
+        # How the shown result was produced: "fit", "cv", "stream" or None
+        self._last_run = None
+        self._last_model_type = None
+        self.tasks = TaskScheduler(self)
 
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
@@ -20,39 +53,325 @@ class RegressionModelWidget(QWidget):
         self.layout.addWidget(self.label)
 
         self.model_selector = QComboBox()
-        self.model_selector.addItems(["Linear Regression", "Ridge Regression", "Lasso Regression"])
+        self.model_selector.addItems(list(MODEL_TYPES))
         self.layout.addWidget(self.model_selector)
 
+        # Out-of-core mode streams the source file instead of the loaded rows
+        self.stream_checkbox = QCheckBox("Stream rows from the source file (out-of-core)")
+        self._update_stream_option()
+        self.layout.addWidget(self.stream_checkbox)
+
+        # Model selection: k-fold CV over an alpha grid on the loaded rows
+        cv_layout = QHBoxLayout()
+        self.cv_checkbox = QCheckBox("Choose alpha by cross-validation")
+        self.cv_checkbox.setToolTip("Uses the loaded rows, even when streaming is selected.")
+        self.folds_spinbox = QSpinBox()
+        self.folds_spinbox.setRange(2, 20)
+        self.folds_spinbox.setValue(DEFAULT_FOLDS)
+        self.budget_spinbox = QDoubleSpinBox()
+        self.budget_spinbox.setRange(0.0, 3600.0)
+        self.budget_spinbox.setSuffix(" s")
+        self.budget_spinbox.setSpecialValueText("No limit")
+        cv_layout.addWidget(self.cv_checkbox)
+        cv_layout.addWidget(QLabel("Folds:"))
+        cv_layout.addWidget(self.folds_spinbox)
+        cv_layout.addWidget(QLabel("Time budget:"))
+        cv_layout.addWidget(self.budget_spinbox)
+        self.layout.addLayout(cv_layout)
+
+        button_layout = QHBoxLayout()
         self.run_button = QPushButton("Run Regression")
         self.run_button.clicked.connect(self.run_regression)
-        self.layout.addWidget(self.run_button)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_regression)
+        self.cancel_button.setEnabled(False)
+        button_layout.addWidget(self.run_button)
+        button_layout.addWidget(self.cancel_button)
+        self.layout.addLayout(button_layout)
+
+        # The fitted model outlives the dock as a file, and scores other files
+        model_layout = QHBoxLayout()
+        self.save_button = QPushButton("Save Model...")
+        self.save_button.clicked.connect(self.save_model)
+        self.predict_button = QPushButton("Predict File...")
+        self.predict_button.clicked.connect(self.predict_file)
+        model_layout.addWidget(self.save_button)
+        model_layout.addWidget(self.predict_button)
+        self.layout.addLayout(model_layout)
+        self._update_model_buttons()
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setVisible(False)
+        self.layout.addWidget(self.progress_bar)
 
         self.result_label = QLabel("Results will appear here.")
         self.result_label.setWordWrap(True)
         self.layout.addWidget(self.result_label)
 
+        self.change_timer = QTimer(self)
+        self.change_timer.setSingleShot(True)
+        self.change_timer.setInterval(CHANGE_DEBOUNCE_MS)
+        self.change_timer.timeout.connect(self._on_data_changed)
+        self.store.data_changed.connect(self.change_timer.start)
+        self.store.reloaded.connect(self._on_reloaded)
+        self.store.roles_changed.connect(self.set_variables)
+
+        self._warm_gram()
+
+    def _update_stream_option(self):
+        # An out-of-core source is already fitted without loading the rows
+        streamable = self.file_path is not None and self.store.source is None
+        self.stream_checkbox.setVisible(streamable)
+        if not streamable:
+            self.stream_checkbox.setChecked(False)
+        else:
+            self.stream_checkbox.setToolTip(
+                f"Fit on {os.path.basename(self.file_path)} chunk by chunk. Rows removed in the table are not excluded."
+            )
+
+    def _on_reloaded(self):
+        self.tasks.cancel("regression")
+        self._end_progress()
+        self.model = None
+        self._last_run = None
+        self._update_model_buttons()
+        self.result_label.setText("Results will appear here.")
+        self.file_path = self.store.file_path
+        self._update_stream_option()
+
+    def _on_data_changed(self):
+        # In-memory fits are answered from the Gram matrix, so they follow the
+        # data right away; cross-validation is too slow to rerun unasked
+        if self._last_run == "fit" and self.independent_vars and self.dependent_vars:
+            self._run_fit(self._last_model_type)
+        elif self._last_run == "cv":
+            self.result_label.setText(self.result_label.text() + "\nThe data changed since this run.")
+            self._last_run = None
+        else:
+            self._warm_gram()
+
+    def _warm_gram(self):
+        # Build the Gram matrix while the user picks a model
+        if self.dataset.empty or self.store.source is not None:
+            return
+        df, version = self.dataset.frame, self.dataset.version
+        self.tasks.submit(
+            "gram",
+            lambda token: dataset_statistics(self.dataset, df, [], version),
+            lambda stats: None,
+        )
+
+    def set_variables(self, independent_vars, dependent_vars):
+        """Follow column role changes made in the table header."""
+        self.independent_vars = independent_vars
+        self.dependent_vars = dependent_vars
+
+    def _targets(self):
+        # A single dependent variable keeps sklearn's 1D coefficient layout
+        return self.dependent_vars[0] if len(self.dependent_vars) == 1 else list(self.dependent_vars)
+
+    def _statistics(self, df, version, source):
+        columns = self.independent_vars + self.dependent_vars
+        if source is None:
+            # Solved from the Gram matrix cached for this dataset version, so
+            # trying other column subsets does not touch the rows again
+            return dataset_statistics(self.dataset, df, columns, version)
+        non_numeric = [col for col in columns if col not in source.numeric_columns]
+        if non_numeric:
+            raise ValueError(f"Regression needs numeric columns: {non_numeric}")
+        return self.dataset.memoize(
+            "source_statistics", tuple(dict.fromkeys(columns)),
+            lambda: source.sufficient_statistics(columns), version=version
+        )
+
+    def _fit(self, df, version, model_type, source=None):
+        stats = self._statistics(df, version, source)
+        return fit_sufficient(stats, MODEL_TYPES[model_type], self.independent_vars, self._targets())
+
+    def _fit_streaming(self, token, model_type):
+        return fit_csv(
+            self.file_path, MODEL_TYPES[model_type], self.independent_vars, self._targets(),
+            engine=self.engine, progress=token.report, is_cancelled=lambda: token.cancelled,
+        )
+
+    def _cross_validate(self, df, version, model_type, n_folds, budget, source=None):
+        columns = self.independent_vars + self.dependent_vars
+        if source is not None:
+            compute = lambda: source.fold_statistics(columns, n_folds)
+        else:
+            compute = lambda: fold_statistics(df, columns, n_folds)
+        folds = self.dataset.memoize("cv_folds", (tuple(columns), n_folds), compute, version=version)
+        return cross_validate(df, MODEL_TYPES[model_type], self.independent_vars, self.dependent_vars,
+                              n_folds=n_folds, budget_seconds=budget, folds=folds)
+
     def run_regression(self):
         if not self.independent_vars or not self.dependent_vars:
             QMessageBox.warning(self, "Missing Variables", "Please define both independent and dependent variables.")
             return
 
-        X = self.df[self.independent_vars]
-        y = self.df[self.dependent_vars[0]]  # Only handle one target for now
-
         model_type = self.model_selector.currentText()
+        if self.cv_checkbox.isChecked():
+            df, version, source = self.dataset.frame, self.dataset.version, self.store.source
+            n_folds = self.folds_spinbox.value()
+            budget = self.budget_spinbox.value() or None
+            self.result_label.setText(f"Cross-validating {model_type} ({n_folds} folds)...")
+            self.tasks.submit(
+                "regression",
+                lambda token: self._cross_validate(df, version, model_type, n_folds, budget, source),
+                self._show_cv_result,
+                self._show_error,
+            )
+            return
+
+        if self.stream_checkbox.isChecked():
+            self.result_label.setText(f"Fitting {model_type} on {os.path.basename(self.file_path)}...")
+            self.progress_bar.setValue(0)
+            self.progress_bar.setVisible(True)
+            self.cancel_button.setEnabled(True)
+            self.tasks.submit(
+                "regression",
+                lambda token: self._fit_streaming(token, model_type),
+                lambda model: self._show_result(model, "stream", model_type),
+                self._show_error,
+                self._on_progress,
+            )
+            return
+
+        self._run_fit(model_type)
+
+    def _run_fit(self, model_type):
+        df, version, source = self.dataset.frame, self.dataset.version, self.store.source
+        self.result_label.setText(f"Fitting {model_type}...")
+        self.tasks.submit(
+            "regression",
+            lambda token: self._fit(df, version, model_type, source),
+            lambda model: self._show_result(model, "fit", model_type),
+            self._show_error,
+        )
+
+    def _update_model_buttons(self):
+        self.save_button.setEnabled(self.model is not None)
+        self.predict_button.setEnabled(self.model is not None)
+
+    def _saved_model(self):
+        """A callable building the SavedModel of the shown fit, for a worker thread."""
+        model, roles, file_path = self.model, dict(self.store.column_roles), self.file_path
+        features = list((model if not isinstance(model, list) else model[0]).features)
+        df, source, streamed = self.dataset.frame, self.store.source, self._last_run == "stream"
+
+        def build():
+            # Training means of the features, for filling missing cells when scoring
+            if source is not None:
+                statistics = self.dataset.memoize("basic_statistics", (), source.basic_statistics)
+                means = {col: statistics[col]["mean"] for col in features}
+            else:
+                means = None if streamed else df[features].mean()
+            return as_saved_model(model, roles, file_path, means)
+        return build
+
+    def save_model(self):
+        if self.model is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save Model", "model.joblib", MODEL_FILE_FILTER)
+        if not path:
+            return
+        build = self._saved_model()
+        self.tasks.submit(
+            "save_model",
+            lambda token: save_model(path, build()),
+            lambda saved: self.result_label.setText(f"Saved {saved.describe()} to {path}"),
+            lambda message: self.result_label.setText(f"Could not save the model: {message}"),
+        )
+
+    def predict_file(self):
+        if self.model is None:
+            return
+        input_path, output_path = ask_prediction_paths(self, "fitted model")
+        if input_path is None:
+            return
+        build, engine = self._saved_model(), self.engine
+        self.result_label.setText(f"Scoring {os.path.basename(input_path)}...")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.cancel_button.setEnabled(True)
+        self.tasks.submit(
+            "prediction",
+            lambda token: predict_csv(build(), input_path, output_path, engine=engine,
+                                      progress=token.report, is_cancelled=lambda: token.cancelled),
+            self._show_prediction,
+            self._show_prediction_error,
+            self._on_prediction_progress,
+        )
+
+    def _on_prediction_progress(self, bytes_read, total_bytes, rows_read):
+        if total_bytes:
+            self.progress_bar.setValue(int(1000 * bytes_read / total_bytes))
+        self.result_label.setText(f"Scoring... {rows_read:,} rows")
+
+    def _show_prediction(self, report):
+        self._end_progress()
+        self.result_label.setText(f"{report}\nWritten to {report.output_path}")
+
+    def _show_prediction_error(self, message):
+        self._end_progress()
+        self.result_label.setText(f"Prediction failed: {message}")
+
+    def cancel_regression(self):
+        self.tasks.cancel("regression")
+        self.tasks.cancel("prediction")
+        self._end_progress()
+        self.result_label.setText("Cancelled.")
+
+    def _on_progress(self, bytes_read, total_bytes, rows_read):
+        if total_bytes:
+            self.progress_bar.setValue(int(1000 * bytes_read / total_bytes))
+        self.result_label.setText(f"Fitting... {rows_read:,} rows read")
+
+    def _end_progress(self):
+        self.progress_bar.setVisible(False)
+        self.cancel_button.setEnabled(False)
+
+    def _show_error(self, message):
+        self._end_progress()
+        self.result_label.setText(f"Regression failed: {message}")
+
+    def _show_result(self, model, run, model_type):
+        self._end_progress()
+        self.model = model
+        self._last_run, self._last_model_type = run, model_type
+        self._update_model_buttons()
+        self.result_label.setText(_describe_fit(model))
 
-        if model_type == "Linear Regression":
-            self.model = LinearRegression()
-        elif model_type == "Ridge Regression":
-            self.model = Ridge()
-        elif model_type == "Lasso Regression":
-            self.model = Lasso()
+    def _show_cv_result(self, cv):
+        self.model = cv.fits[0] if len(cv.fits) == 1 else cv.fits
+        self._last_run = "cv"
+        self._update_model_buttons()
+        lines = []
+        for t, fit in enumerate(cv.fits):
+            best = int(np.argmin(cv.mse[:, t]))
+            lines.append(f"{fit.target}: alpha = {fit.alpha:.4g}, CV MSE = {cv.mse[best, t]:.4g}")
+            lines.append(_describe_fit(fit))
+        timings = ", ".join("skipped" if s is None else f"{s * 1000:.1f} ms" for s in cv.fold_seconds)
+        lines.append(f"Folds completed: {cv.folds_completed}/{len(cv.fold_seconds)} ({timings})")
+        self.result_label.setText("\n".join(lines))
 
-        self.model.fit(X, y)
 
-        score = self.model.score(X, y)
-        coef = self.model.coef_
-        intercept = self.model.intercept_
+def _describe_fit(model) -> str:
+    targets = [model.target] if isinstance(model.target, str) else model.target
+    coefs = np.atleast_2d(model.coef_)
+    per_target = [np.atleast_1d(value) for value in
+                  (model.r2, model.intercept_, model.residual_variance, model.intercept_se)]
+    errors = None if model.standard_errors is None else np.atleast_2d(model.standard_errors)
 
-        result = f"R^2 Score: {score:.4f}\nCoefficients: {coef}\nIntercept: {intercept}"
-        self.result_label.setText(result)
+    blocks = []
+    for t, target in enumerate(targets):
+        r2, intercept, residual_variance, intercept_se = (value[t] for value in per_target)
+        text = f"R^2 Score: {r2:.4f}\nCoefficients: {coefs[t]}\nIntercept: {intercept}"
+        if errors is not None:
+            text += f"\nStd. Errors: {errors[t]}\nIntercept Std. Error: {intercept_se:.4g}"
+        if not np.isnan(residual_variance):
+            text += f"\nResidual Variance: {residual_variance:.4g}"
+        blocks.append(text if len(targets) == 1 else f"[{target}]\n{text}")
+    blocks.append(f"Rows used: {model.n_samples:,}")
+    return "\n".join(blocks)
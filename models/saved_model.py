@@ -0,0 +1,223 @@
+"""
+Fitted models saved to disk and applied to new CSV files.
+
+    save_model("price.joblib", fit, column_roles=store.column_roles, source_file=path)
+    model = load_model("price.joblib")
+    report = predict_csv(model, "new.csv", "scored.csv")
+    report.rows_per_second
+
+A saved model is a joblib file holding the LinearFit(s), the column roles
+the fit was made with and how its rows were prepared. Prediction streams
+the input chunk by chunk and appends each scored chunk to the output, so
+memory stays at one chunk however large the file is.
+"""
+import os
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from data_loader import DEFAULT_CHUNK_SIZE, iter_csv_chunks
+from utils.logger import get_logger, span
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+FORMAT_VERSION = 1
+FILL_STRATEGIES = ("none", "mean")
+PREDICTION_SUFFIX = "_predicted"
+_ARROW_ERRORS = (pa.ArrowInvalid,) if pa is not None else ()
+
+log = get_logger(__name__)
+
+
+class SavedModel:
+    """
+    A loaded model file: fits (one LinearFit per target group), the feature
+    and target columns, and the metadata written by save_model.
+    """
+
+    def __init__(self, fits, column_roles=None, source_file=None, preprocessing=None, created=None):
+        self.fits = list(fits)
+        self.features = list(self.fits[0].features)
+        if any(list(fit.features) != self.features for fit in self.fits):
+            raise ValueError("All fits of a saved model must use the same features.")
+        self.column_roles = dict(column_roles or {})
+        self.source_file = source_file
+        self.preprocessing = dict(preprocessing or {})
+        self.created = created
+
+    @property
+    def targets(self) -> list:
+        return [target for fit in self.fits
+                for target in ([fit.target] if isinstance(fit.target, str) else fit.target)]
+
+    @property
+    def prediction_columns(self) -> list:
+        return [f"{target}{PREDICTION_SUFFIX}" for target in self.targets]
+
+    def feature_matrix(self, chunk: pd.DataFrame, fill: str = "none") -> np.ndarray:
+        """The features of chunk as float64; with fill="mean", missing cells get the training means."""
+        missing = [col for col in self.features if col not in chunk.columns]
+        if missing:
+            raise KeyError(f"Columns not found: {missing}")
+        # Coerced as the fit did; anything unparsable is missing
+        X = np.column_stack([
+            pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            for col in self.features
+        ]) if self.features else np.empty((len(chunk), 0))
+        if fill == "mean":
+            means = self.preprocessing.get("feature_means")
+            if means is None:
+                raise ValueError("This model was saved without training means to fill missing values with.")
+            X = np.where(np.isfinite(X), X, np.asarray([means[col] for col in self.features]))
+        return X
+
+    def predict_frame(self, chunk: pd.DataFrame, fill: str = "none") -> pd.DataFrame:
+        """One prediction column per target; rows with a missing feature are predicted as missing."""
+        X = self.feature_matrix(chunk, fill)
+        complete = np.isfinite(X).all(axis=1)
+        predictions = np.column_stack([
+            np.asarray(fit.predict(X)).reshape(len(X), 1 if isinstance(fit.target, str) else len(fit.target))
+            for fit in self.fits
+        ])
+        predictions[~complete] = np.nan
+        return pd.DataFrame(predictions, index=chunk.index, columns=self.prediction_columns)
+
+    def describe(self) -> str:
+        fit = self.fits[0]
+        alpha = f", alpha {fit.alpha:.4g}" if fit.model != "linear" else ""
+        return (f"{fit.model}{alpha}: {', '.join(self.targets)} from {', '.join(self.features)} "
+                f"({fit.n_samples:,} training rows)")
+
+
+def as_saved_model(model, column_roles: dict = None, source_file: str = None,
+                   feature_means: dict = None) -> SavedModel:
+    """
+    A fitted model with its metadata, ready to save or to predict with.
+
+    Parameters:
+    - model: a LinearFit, or a list of them (one per target, as cross-validation returns).
+    - column_roles: the column roles the model was fitted with.
+    - source_file: the file the training rows came from, if any.
+    - feature_means: training mean per feature, which predict_csv(fill="mean") puts into missing cells.
+    """
+    fits = model if isinstance(model, (list, tuple)) else [model]
+    features = fits[0].features
+    return SavedModel(fits, column_roles, source_file, {
+        # The fit used the rows complete in every feature and target
+        "rows": "complete cases",
+        "training_rows": int(fits[0].n_samples),
+        "feature_means": None if feature_means is None else {col: float(feature_means[col]) for col in features},
+    }, datetime.now(timezone.utc).isoformat(timespec="seconds"))
+
+
+def save_model(path: str, model, column_roles: dict = None, source_file: str = None,
+               feature_means: dict = None) -> SavedModel:
+    """Write a SavedModel, or a fit with the metadata as_saved_model takes, to path with joblib."""
+    saved = model if isinstance(model, SavedModel) else as_saved_model(model, column_roles, source_file,
+                                                                       feature_means)
+    with span("save_model", file=os.path.basename(path)):
+        joblib.dump({
+            "format": FORMAT_VERSION,
+            "fits": saved.fits,
+            "column_roles": saved.column_roles,
+            "source_file": saved.source_file,
+            "preprocessing": saved.preprocessing,
+            "created": saved.created,
+        }, path, compress=3)
+    return saved
+
+
+def load_model(path: str) -> SavedModel:
+    contents = joblib.load(path)
+    if not isinstance(contents, dict) or "fits" not in contents:
+        raise ValueError(f"{os.path.basename(path)} is not a saved model.")
+    if contents.get("format", 0) > FORMAT_VERSION:
+        raise ValueError(f"{os.path.basename(path)} was saved by a newer version "
+                         f"(format {contents['format']}).")
+    return SavedModel(contents["fits"], contents.get("column_roles"), contents.get("source_file"),
+                      contents.get("preprocessing"), contents.get("created"))
+
+
+class PredictionReport:
+    """Rows read and predicted by predict_csv, and how fast."""
+
+    def __init__(self, output_path: str, rows: int, predicted: int, seconds: float):
+        self.output_path = output_path
+        self.rows = rows
+        self.predicted = predicted
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else float("nan")
+
+    def as_dict(self) -> dict:
+        return {"output": self.output_path, "rows": self.rows, "predicted": self.predicted,
+                "seconds": self.seconds, "rows_per_second": self.rows_per_second}
+
+    def __str__(self):
+        return (f"{self.rows:,} rows scored in {self.seconds:.2f} s ({self.rows_per_second:,.0f} rows/s); "
+                f"{self.rows - self.predicted:,} without a prediction")
+
+
+def predict_csv(model: SavedModel, input_path: str, output_path: str, keep_columns=None, fill: str = "none",
+                engine: str = "c", chunksize: int = DEFAULT_CHUNK_SIZE, progress=None,
+                is_cancelled=None) -> PredictionReport:
+    """
+    Score a CSV file chunk by chunk and write the predictions to output_path.
+
+    Parameters:
+    - keep_columns: input columns copied to the output next to the predictions
+      (default: all of them; [] for the predictions only).
+    - fill: "none" leaves rows with a missing feature unpredicted, "mean"
+      fills the cells with the training means saved with the model.
+    - engine, chunksize, progress, is_cancelled: as for iter_csv_chunks.
+
+    The output is written to a temporary file next to output_path and moved
+    there when complete, so a failed or cancelled run leaves no partial file.
+    """
+    if fill not in FILL_STRATEGIES:
+        raise ValueError(f"Unknown fill strategy {fill!r}; expected one of {FILL_STRATEGIES}.")
+    partial = f"{output_path}.partial"
+    start = time.perf_counter()
+    with span("predict_csv", file=os.path.basename(input_path), engine=engine) as s:
+        try:
+            try:
+                rows, predicted = _write_predictions(model, input_path, partial, keep_columns, fill, engine,
+                                                     chunksize, progress, is_cancelled)
+            except _ARROW_ERRORS as e:
+                # The streaming reader infers types from the first block; start over with the C parser
+                log.warning("pyarrow could not parse %s (%s), falling back to the C engine", input_path, e)
+                rows, predicted = _write_predictions(model, input_path, partial, keep_columns, fill, "c",
+                                                     chunksize, progress, is_cancelled)
+            os.replace(partial, output_path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        s.fields.update(rows=rows, predicted=predicted)
+    return PredictionReport(output_path, rows, predicted, time.perf_counter() - start)
+
+
+def _write_predictions(model, input_path, output_path, keep_columns, fill, engine, chunksize, progress,
+                       is_cancelled):
+    rows = predicted = 0
+    with open(output_path, "w", newline="") as handle:
+        for chunk in iter_csv_chunks(input_path, engine, chunksize, progress, is_cancelled):
+            predictions = model.predict_frame(chunk, fill)
+            kept = chunk if keep_columns is None else chunk[list(keep_columns)]
+            pd.concat([kept, predictions], axis=1).to_csv(handle, header=rows == 0, index=False)
+            rows += len(chunk)
+            predicted += int(predictions.notna().all(axis=1).sum())
+        if rows == 0:
+            # An input without rows still gets the header
+            header = pd.read_csv(input_path, nrows=0)
+            kept = header if keep_columns is None else header[list(keep_columns)]
+            pd.concat([kept, model.predict_frame(header)], axis=1).to_csv(handle, index=False)
+    return rows, predicted
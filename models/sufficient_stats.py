@@ -0,0 +1,306 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import iter_csv_chunks
+from utils.logger import span, timed
+from utils.result_cache import get_result_cache
+
+LASSO_MAX_ITER = 10_000
+LASSO_TOL = 1e-10
+
+
+class LinearFit:
+    """
+    A linear model solved from sufficient statistics.
+
+    Uses the sklearn attribute names (coef_, intercept_) so it can stand in
+    for a fitted LinearRegression/Ridge/Lasso wherever only those are read.
+    With several targets, coef_ is (targets, features) and the per-target
+    attributes are arrays, as sklearn does for a 2D y.
+    """
+
+    def __init__(self, features, target, coef, intercept, r2, n_samples, model="linear", alpha=0.0,
+                 residual_variance=np.nan, standard_errors=None, intercept_se=np.nan):
+        self.features = list(features)
+        self.target = target
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.r2 = r2
+        self.n_samples = n_samples
+        self.model = model
+        self.alpha = alpha
+        self.residual_variance = residual_variance
+        self.standard_errors = standard_errors
+        self.intercept_se = intercept_se
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_.T + self.intercept_
+
+    def squeezed(self, single: bool) -> "LinearFit":
+        """Drop the target axis for a single-target fit, like sklearn with a 1D y."""
+        if single:
+            self.target = self.target[0]
+            self.coef_ = self.coef_[0]
+            self.intercept_ = self.intercept_[0]
+            self.r2 = self.r2[0]
+            self.residual_variance = self.residual_variance[0]
+            self.intercept_se = self.intercept_se[0]
+            if self.standard_errors is not None:
+                self.standard_errors = self.standard_errors[0]
+        return self
+
+
+class SufficientStatistics:
+    """
+    Row count, column means and centered co-moment matrix of numeric columns.
+
+    Chunks are combined with the parallel (Chan et al.) update, so the Gram
+    matrix of any column subset comes out exactly as if all rows had been in
+    memory at once. Rows with a missing value in any tracked column are
+    skipped, which is the complete-case data an in-memory fit would need.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    @classmethod
+    def from_moments(cls, columns, count: int, mean: np.ndarray, comoment: np.ndarray) -> "SufficientStatistics":
+        """Statistics computed elsewhere, e.g. by a database query."""
+        stats = cls(columns)
+        stats.count = count
+        stats.mean = np.asarray(mean, dtype=np.float64)
+        stats.comoment = np.asarray(comoment, dtype=np.float64)
+        return stats
+
+    @property
+    def nbytes(self) -> int:
+        return self.mean.nbytes + self.comoment.nbytes
+
+    def _values(self, chunk: pd.DataFrame) -> np.ndarray:
+        missing = [col for col in self.columns if col not in chunk.columns]
+        if missing:
+            raise KeyError(f"Columns not found: {missing}")
+        # Later chunks may infer a column as text; anything unparsable is missing
+        return np.column_stack([
+            pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            for col in self.columns
+        ]) if self.columns else np.empty((len(chunk), 0))
+
+    def update(self, chunk: pd.DataFrame):
+        values = self._values(chunk)
+        values = values[np.isfinite(values).all(axis=1)]
+        if not len(values):
+            return
+        mean = values.mean(axis=0)
+        centered = values - mean
+        self._combine(len(values), mean, centered.T @ centered)
+
+    def _combine(self, count, mean, comoment):
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * (self.count * count / total)
+        self.mean = self.mean + delta * (count / total)
+        self.count = total
+
+    def extended(self, chunk: pd.DataFrame) -> "SufficientStatistics":
+        """A copy updated with chunk, leaving these statistics (e.g. a cached result) as they are."""
+        stats = SufficientStatistics.from_moments(self.columns, self.count, self.mean, self.comoment)
+        stats.update(chunk)
+        return stats
+
+    def merge(self, other: "SufficientStatistics"):
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge statistics computed over different columns.")
+        if other.count:
+            self._combine(other.count, other.mean, other.comoment)
+
+    def _system(self, features, targets):
+        if self.count == 0:
+            raise ValueError("No complete rows to fit.")
+        x = [self.columns.index(col) for col in features]
+        y = [self.columns.index(col) for col in targets]
+        return (self.comoment[np.ix_(x, x)], self.comoment[np.ix_(x, y)],
+                np.diag(self.comoment)[y], self.mean[x], self.mean[y])
+
+    def sse(self, features, targets, coef: np.ndarray, intercept: np.ndarray) -> np.ndarray:
+        """
+        Sum of squared residuals of y = X coef + intercept over these rows, per target.
+
+        coef is (features, targets) and intercept (targets,), so held-out
+        folds can be scored from their statistics alone.
+        """
+        sxx, sxy, syy, mean_x, mean_y = self._system(features, targets)
+        fitted = np.einsum("it,ij,jt->t", coef, sxx, coef)
+        offset = mean_y - mean_x @ coef - intercept
+        return np.maximum(syy - 2 * np.einsum("it,it->t", coef, sxy) + fitted, 0.0) + self.count * offset ** 2
+
+    def _fit(self, features, targets, coef, model, alpha) -> LinearFit:
+        sxx, sxy, syy, mean_x, mean_y = self._system(features, targets)
+        intercept = mean_y - mean_x @ coef
+        rss = self.sse(features, targets, coef, intercept)
+        r2 = np.where(syy > 0, 1.0 - rss / np.where(syy > 0, syy, 1.0), 0.0)
+        dof = self.count - len(features) - 1
+        residual_variance = rss / dof if dof > 0 else np.full(len(targets), np.nan)
+
+        standard_errors, intercept_se = None, np.full(len(targets), np.nan)
+        if model != "lasso" and dof > 0:
+            # Cov(w) = s^2 A^-1 Sxx A^-1 with A = Sxx + alpha I (plain OLS when alpha is 0)
+            inverse = np.linalg.pinv(sxx + alpha * np.eye(len(features)))
+            unscaled = inverse @ sxx @ inverse
+            standard_errors = np.sqrt(np.clip(np.outer(residual_variance, np.diag(unscaled)), 0.0, None))
+            intercept_se = np.sqrt(np.maximum(
+                residual_variance / self.count + residual_variance * (mean_x @ unscaled @ mean_x), 0.0
+            ))
+        return LinearFit(features, targets, coef.T, intercept, r2, self.count, model, alpha,
+                         residual_variance, standard_errors, intercept_se)
+
+    def solve(self, features, target, alpha: float = 0.0) -> LinearFit:
+        """
+        Least squares (alpha=0) or ridge fit of target on features.
+
+        Matches LinearRegression / Ridge(alpha) with an unpenalized intercept.
+        target may be a list of columns, fitted together like a 2D y.
+        """
+        targets, single = _as_targets(target)
+        sxx, sxy, _, _, _ = self._system(features, targets)
+        coef = np.linalg.lstsq(sxx + alpha * np.eye(len(features)), sxy, rcond=None)[0]
+        return self._fit(features, targets, coef, "ridge" if alpha else "linear", alpha).squeezed(single)
+
+    def solve_lasso(self, features, target, alpha: float = 1.0,
+                    max_iter: int = LASSO_MAX_ITER, tol: float = LASSO_TOL) -> LinearFit:
+        """
+        Lasso fit by cyclic coordinate descent on the Gram matrix.
+
+        Minimizes the same objective as sklearn's Lasso(alpha):
+        1 / (2 * n) * ||y - Xw - b||^2 + alpha * ||w||_1
+        """
+        targets, single = _as_targets(target)
+        sxx, sxy, _, _, _ = self._system(features, targets)
+        coef = lasso_coordinate_descent(sxx / self.count, sxy / self.count, alpha, max_iter=max_iter, tol=tol)
+        return self._fit(features, targets, coef, "lasso", alpha).squeezed(single)
+
+
+def _as_targets(target):
+    if isinstance(target, str):
+        return [target], True
+    return list(target), False
+
+
+def lasso_coordinate_descent(gram: np.ndarray, xy: np.ndarray, alpha: float, coef: np.ndarray = None,
+                             max_iter: int = LASSO_MAX_ITER, tol: float = LASSO_TOL) -> np.ndarray:
+    """
+    Solve the lasso for each column of xy given gram = Xc'Xc / n and xy = Xc'yc / n.
+
+    coef (features, targets) warm-starts the descent, e.g. from the previous
+    alpha of a regularization path.
+    """
+    diag = np.diag(gram)
+    coef = np.zeros(xy.shape) if coef is None else coef.copy()
+    for t in range(xy.shape[1]):
+        w = coef[:, t]
+        for _ in range(max_iter):
+            max_step = 0.0
+            for j in range(len(w)):
+                if diag[j] <= 0:
+                    continue
+                rho = xy[j, t] - gram[j] @ w + diag[j] * w[j]
+                new = np.sign(rho) * max(abs(rho) - alpha, 0.0) / diag[j]
+                max_step = max(max_step, abs(new - w[j]))
+                w[j] = new
+            if max_step <= tol * max(np.abs(w).max(initial=0.0), 1.0):
+                break
+    return coef
+
+
+@timed()
+def fit_sufficient(stats: SufficientStatistics, model: str, features, target,
+                   alpha: float = 1.0) -> LinearFit:
+    """Fit "linear", "ridge" or "lasso" from accumulated statistics."""
+    if model == "linear":
+        return stats.solve(features, target)
+    if model == "ridge":
+        return stats.solve(features, target, alpha)
+    if model == "lasso":
+        return stats.solve_lasso(features, target, alpha)
+    raise ValueError(f"Unknown model: {model}")
+
+
+@timed()
+def frame_statistics(df: pd.DataFrame, columns) -> SufficientStatistics:
+    stats = SufficientStatistics(columns)
+    stats.update(df)
+    return stats
+
+
+def dataset_statistics(dataset, df: pd.DataFrame, columns, version: int = None) -> SufficientStatistics:
+    """
+    Statistics covering columns, answered from the dataset's cached Gram matrix.
+
+    The Gram matrix over all numeric columns is computed once per dataset
+    version, so fitting any subset of them costs O(features^2), not O(rows).
+    It only holds rows complete in every numeric column; if a column outside
+    the requested set has missing values, the subset would keep more rows, so
+    its statistics are computed (and cached) separately.
+
+    Parameters:
+    - dataset: Dataset the frame belongs to, used as the cache namespace.
+    - df: the live frame, captured on the GUI thread.
+    - columns: list of column names; all must be numeric.
+    - version: the dataset version df was taken at.
+    """
+    numeric = dataset.memoize(
+        "numeric_columns", (), lambda: list(df.select_dtypes(include='number').columns), version=version,
+        extend=lambda previous, n: previous,
+    )
+    non_numeric = [col for col in columns if col not in numeric]
+    if non_numeric:
+        raise ValueError(f"Regression needs numeric columns: {non_numeric}")
+
+    # After rows are appended, only those rows are scanned and merged in
+    with_missing = dataset.memoize(
+        "columns_with_missing", (), lambda: [col for col in numeric if df[col].isna().any()], version=version,
+        extend=lambda previous, n: [col for col in numeric
+                                    if col in previous or df[col].iloc[len(df) - n:].isna().any()],
+    )
+    if not columns or set(with_missing) <= set(columns):
+        return dataset.memoize("gram", (), lambda: frame_statistics(df, numeric), version=version,
+                               extend=lambda previous, n: previous.extended(df.iloc[len(df) - n:]))
+    columns = list(dict.fromkeys(columns))
+    return dataset.memoize(
+        "gram_subset", tuple(columns), lambda: frame_statistics(df[columns], columns), version=version,
+        extend=lambda previous, n: previous.extended(df[columns].iloc[len(df) - n:]),
+    )
+
+
+def accumulate_csv(file_path: str, columns, engine: str = "c",
+                   progress=None, is_cancelled=None) -> SufficientStatistics:
+    """Stream a CSV file once and accumulate the statistics of columns."""
+    with span("accumulate_csv", file=os.path.basename(file_path), engine=engine) as s:
+        stats = SufficientStatistics(columns)
+        for chunk in iter_csv_chunks(file_path, engine, progress=progress, is_cancelled=is_cancelled):
+            stats.update(chunk)
+        s.fields["rows"] = stats.count
+        return stats
+
+
+def fit_csv(file_path: str, model: str, features, target, alpha: float = 1.0, engine: str = "c",
+            progress=None, is_cancelled=None) -> LinearFit:
+    """
+    Fit a linear model on a CSV file without loading it into memory.
+
+    The statistics are cached per file modification time and column set, so
+    refitting the same columns with another model does not reread the file.
+    """
+    columns = list(dict.fromkeys(list(features) + [target]))
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_mtime_ns, "sufficient_statistics", tuple(columns))
+    stats = get_result_cache().get_or_compute(
+        key, lambda: accumulate_csv(file_path, columns, engine, progress, is_cancelled)
+    )
+    return fit_sufficient(stats, model, features, target, alpha)
@@ -0,0 +1,401 @@
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_loader import NA_VALUES, LoadCancelled
+from graphs.render import SeriesIndex, bin_matrix, lttb
+from models.sufficient_stats import SufficientStatistics
+from stats.grouping import DEFAULT_AGGREGATIONS, quantile_name
+from utils.logger import get_logger, span, timed
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Above this many rows the median is approximated (exact medians hold every value)
+EXACT_MEDIAN_ROWS = 10_000_000
+# Series with at most this many points are fetched into a SeriesIndex
+MATERIALIZE_POINTS = 1_000_000
+# LTTB picks from this many min/max bins per output point
+LTTB_OVERSAMPLING = 4
+_PROGRESS_POLL_SECONDS = 0.1
+_NUMERIC_TYPES = {
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+    "UINTEGER", "UBIGINT", "UHUGEINT", "FLOAT", "DOUBLE",
+}
+
+log = get_logger(__name__)
+
+
+def out_of_core_available() -> bool:
+    return duckdb is not None
+
+
+def _quote(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _number(name) -> str:
+    return f"CAST({_quote(name)} AS DOUBLE)"
+
+
+def _is_numeric(sql_type: str) -> bool:
+    return sql_type in _NUMERIC_TYPES or sql_type.startswith("DECIMAL")
+
+
+def _float(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+class DuckDBSource:
+    """
+    A CSV file copied once into an on-disk DuckDB database and queried in place.
+
+    Nothing here holds the rows in memory: statistics, missing/duplicate
+    counts, heatmap bins, plot samples and regression moments are aggregate
+    queries, and the table fetches pages by row id. DuckDB streams the file
+    and spills to the temporary directory when memory_limit is reached, so
+    files larger than RAM work.
+
+    Queries run on their own cursor, so worker threads can use one source
+    concurrently. Call close() to delete the database.
+    """
+
+    def __init__(self, file_path: str, memory_limit: str = None, temp_dir: str = None):
+        if duckdb is None:
+            raise RuntimeError("Out-of-core mode requires duckdb to be installed.")
+        self.file_path = file_path
+        self.columns = []
+        self.numeric_columns = []
+        self.row_count = 0
+        self._directory = tempfile.mkdtemp(prefix="data_analyzer_", dir=temp_dir)
+        config = {"temp_directory": os.path.join(self._directory, "spill")}
+        if memory_limit:
+            config["memory_limit"] = memory_limit
+        self._connection = duckdb.connect(os.path.join(self._directory, "data.duckdb"), config=config)
+
+    def import_csv(self, progress=None, is_cancelled=None):
+        """
+        Copy the CSV into the database; the only full read of the file.
+
+        progress: optional callable(bytes_read, total_bytes, rows_read), with
+        bytes_read estimated from the query's progress. is_cancelled: optional
+        callable returning True to interrupt the import with LoadCancelled.
+        """
+        if is_cancelled is not None and is_cancelled():
+            raise LoadCancelled(self.file_path)
+        total_bytes = os.path.getsize(self.file_path)
+        failure = []
+
+        def run():
+            try:
+                self._connection.execute(
+                    "CREATE TABLE data AS SELECT * FROM read_csv(?, header = true, nullstr = ?)",
+                    [self.file_path, NA_VALUES],
+                )
+            except Exception as e:
+                failure.append(e)
+
+        with span("import_csv", file=os.path.basename(self.file_path)) as s:
+            worker = threading.Thread(target=run, name="duckdb-import")
+            worker.start()
+            cancelled = False
+            while worker.is_alive():
+                worker.join(_PROGRESS_POLL_SECONDS)
+                if not cancelled and is_cancelled is not None and is_cancelled():
+                    cancelled = True
+                    self._connection.interrupt()
+                elif progress is not None:
+                    percent = self._connection.query_progress()
+                    if percent >= 0:
+                        progress(int(total_bytes * percent / 100), total_bytes, 0)
+            if cancelled:
+                raise LoadCancelled(self.file_path)
+            if failure:
+                raise failure[0]
+
+            described = self._fetchall("DESCRIBE data")
+            self.columns = [row[0] for row in described]
+            self.numeric_columns = [row[0] for row in described if _is_numeric(row[1])]
+            self.row_count = self._fetchall("SELECT count(*) FROM data")[0][0]
+            s.fields["rows"] = self.row_count
+        if progress is not None:
+            progress(total_bytes, total_bytes, self.row_count)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+    def _fetchall(self, sql: str, params=None) -> list:
+        with self._connection.cursor() as cursor:
+            return cursor.execute(sql, params or []).fetchall()
+
+    def _frame(self, sql: str, params=None) -> pd.DataFrame:
+        with self._connection.cursor() as cursor:
+            return cursor.execute(sql, params or []).df()
+
+    def page(self, start: int, count: int) -> pd.DataFrame:
+        """Rows start..start + count - 1, indexed by row id."""
+        frame = self._frame("SELECT * FROM data WHERE rowid >= ? AND rowid < ? ORDER BY rowid",
+                            [start, start + count])
+        frame.index = pd.RangeIndex(start, start + len(frame))
+        return frame
+
+    @timed("DuckDBSource.basic_statistics")
+    def basic_statistics(self) -> dict:
+        """get_basic_statistics() of the whole file; medians are approximate above EXACT_MEDIAN_ROWS."""
+        if not self.row_count:
+            return {"error": "DataFrame is empty or None."}
+        if not self.numeric_columns:
+            return {}
+        exact = self.row_count <= EXACT_MEDIAN_ROWS
+        aggregates = []
+        for col in self.numeric_columns:
+            value = _number(col)
+            median = f"median({value})" if exact else f"approx_quantile({value}, 0.5)"
+            aggregates += [f"avg({value})", median, f"stddev_samp({value})", f"min({value})", f"max({value})"]
+        row = self._fetchall(f"SELECT {', '.join(aggregates)} FROM data")[0]
+        return {
+            col: {name: _float(row[5 * i + j]) for j, name in enumerate(("mean", "median", "std", "min", "max"))}
+            for i, col in enumerate(self.numeric_columns)
+        }
+
+    @timed("DuckDBSource.quality_summary")
+    def quality_summary(self) -> dict:
+        """Missing cells per column, rows with a missing cell and duplicate rows (as df.duplicated())."""
+        if not self.columns:
+            return {"rows": 0, "missing": {}, "rows_with_missing": 0, "duplicate_rows": 0}
+        any_missing = " OR ".join(f"{_quote(col)} IS NULL" for col in self.columns)
+        counts = [f"count(*) - count({_quote(col)})" for col in self.columns]
+        row = self._fetchall(
+            f"SELECT {', '.join(counts)}, count(*) FILTER (WHERE {any_missing}) FROM data"
+        )[0]
+        distinct = self._fetchall("SELECT count(*) FROM (SELECT DISTINCT * FROM data)")[0][0]
+        return {
+            "rows": self.row_count,
+            "missing": dict(zip(self.columns, row[:-1])),
+            "rows_with_missing": row[-1],
+            "duplicate_rows": self.row_count - distinct,
+        }
+
+    @timed("DuckDBSource.heatmap_grid")
+    def heatmap_grid(self, columns, max_rows: int, max_cols: int, how: str = "mean") -> dict:
+        """
+        heatmap_grid() of the given numeric columns over all rows.
+
+        Rows are binned by the query (mean or max per block of consecutive
+        rows); only the binned rows are fetched and the columns are binned
+        here, so a "mean" cell spanning several columns averages their block means.
+        """
+        columns = list(columns)
+        factor = max(-(-self.row_count // max_rows), 1)
+        reduce = "max" if how == "max" else "avg"
+        if not columns or not self.row_count:
+            values, labels = np.empty((0, len(columns))), []
+        else:
+            aggregates = ", ".join(f"{reduce}({_number(col)})" for col in columns)
+            binned = self._frame(
+                f"SELECT rowid // {factor} AS bin, {aggregates} FROM data GROUP BY bin ORDER BY bin"
+            )
+            values = binned.iloc[:, 1:].to_numpy(dtype=np.float64, na_value=np.nan)
+            labels = [str(int(bin_) * factor) for bin_ in binned["bin"]]
+        values, _, col_factor = bin_matrix(values, max(len(values), 1), max_cols, how)
+        return {
+            "values": values,
+            "row_factor": factor,
+            "col_factor": col_factor,
+            "row_labels": labels,
+            "col_labels": [str(col) for col in columns[::col_factor]],
+        }
+
+    @timed("DuckDBSource.series")
+    def series(self, x_col, y_col):
+        """A SeriesIndex of the (x, y) pairs if there are few enough to fetch, else a QuerySeries."""
+        where = f"NOT isnan({_number(x_col)}) AND NOT isnan({_number(y_col)})"
+        count = self._fetchall(f"SELECT count(*) FROM data WHERE {where}")[0][0]
+        if count > MATERIALIZE_POINTS:
+            return QuerySeries(self, x_col, y_col, count)
+        pairs = self._frame(f"SELECT {_number(x_col)} AS x, {_number(y_col)} AS y FROM data WHERE {where}")
+        return SeriesIndex(pairs["x"], pairs["y"])
+
+    @timed("DuckDBSource.group_statistics")
+    def group_statistics(self, keys, values=None, aggregations=DEFAULT_AGGREGATIONS, quantiles=()) -> pd.DataFrame:
+        """
+        group_statistics() of the whole file from one GROUP BY query, in the
+        same layout; medians and quantiles are approximate above EXACT_MEDIAN_ROWS.
+        """
+        keys = list(keys)
+        if not keys:
+            raise ValueError("Grouping needs at least one key column.")
+        if values is None:
+            values = [col for col in self.numeric_columns if col not in keys]
+        values = list(values)
+        non_numeric = [col for col in values if col not in self.numeric_columns]
+        if non_numeric:
+            raise ValueError(f"Grouped statistics need numeric value columns: {non_numeric}")
+        exact = self.row_count <= EXACT_MEDIAN_ROWS
+
+        def quantile(value, q):
+            return f"quantile_cont({value}, {q})" if exact else f"approx_quantile({value}, {q})"
+
+        sql_of = {
+            "count": lambda value: f"count({value})", "mean": lambda value: f"avg({value})",
+            "median": lambda value: quantile(value, 0.5), "std": lambda value: f"stddev_samp({value})",
+            "min": lambda value: f"min({value})", "max": lambda value: f"max({value})",
+            "sum": lambda value: f"sum({value})",
+        }
+        columns, aggregates = [], []
+        for col in values:
+            for name in aggregations:
+                columns.append((col, name))
+                aggregates.append(sql_of[name](_number(col)))
+            for q in quantiles:
+                columns.append((col, quantile_name(q)))
+                aggregates.append(quantile(_number(col), q / 100))
+        grouped = ", ".join(_quote(key) for key in keys)
+        present = " AND ".join(f"{_quote(key)} IS NOT NULL" for key in keys)
+        frame = self._frame(
+            f"SELECT {', '.join([grouped] + aggregates)} FROM data WHERE {present} "
+            f"GROUP BY {grouped} ORDER BY {grouped}"
+        )
+        result = frame.iloc[:, len(keys):].set_axis(pd.MultiIndex.from_tuples(columns), axis=1)
+        result.index = pd.MultiIndex.from_frame(frame[keys]) if len(keys) > 1 else pd.Index(frame[keys[0]])
+        return result
+
+    def _moments(self, columns, n_folds: int = None, seed: int = 0) -> dict:
+        columns = list(dict.fromkeys(columns))
+        complete = " AND ".join(f"isfinite({_number(col)})" for col in columns) or "true"
+        k = len(columns)
+        pairs = [(i, j) for i in range(k) for j in range(i, k)]
+        aggregates = ["count(*)"] + [f"avg({_number(col)})" for col in columns] + [
+            f"covar_pop({_number(columns[i])}, {_number(columns[j])})" for i, j in pairs
+        ]
+        fold = "0" if n_folds is None else f"hash(rowid + {int(seed)}) % {int(n_folds)}"
+        rows = self._fetchall(
+            f"SELECT {fold} AS fold, {', '.join(aggregates)} FROM data WHERE {complete} GROUP BY fold"
+        )
+        moments = {}
+        for row in rows:
+            count = row[1]
+            mean = np.array([_float(value) for value in row[2:2 + k]])
+            comoment = np.zeros((k, k))
+            for (i, j), value in zip(pairs, row[2 + k:]):
+                comoment[i, j] = comoment[j, i] = _float(value) * count
+            moments[int(row[0])] = SufficientStatistics.from_moments(columns, count, mean, comoment)
+        return moments
+
+    @timed("DuckDBSource.sufficient_statistics")
+    def sufficient_statistics(self, columns) -> SufficientStatistics:
+        """SufficientStatistics of the rows complete in columns, from one aggregate query."""
+        return self._moments(columns).get(0) or SufficientStatistics(list(dict.fromkeys(columns)))
+
+    @timed("DuckDBSource.fold_statistics")
+    def fold_statistics(self, columns, n_folds: int, seed: int = 0) -> list:
+        """
+        Per-fold SufficientStatistics for cross_validate(folds=...).
+
+        Rows are assigned to folds by a hash of their row id, so folds are
+        only approximately equal in size.
+        """
+        if self.row_count < n_folds:
+            raise ValueError(f"Need at least {n_folds} rows for {n_folds}-fold cross-validation.")
+        moments = self._moments(columns, n_folds, seed)
+        columns = list(dict.fromkeys(columns))
+        return [moments.get(fold) or SufficientStatistics(columns) for fold in range(n_folds)]
+
+
+class QuerySeries:
+    """
+    The SeriesIndex interface answered by aggregate queries, for series too
+    large to fetch: lines are the min and max y of equal-width x intervals,
+    scatter plots binned counts and bars interval means.
+    """
+
+    def __init__(self, source: DuckDBSource, x_col, y_col, count: int):
+        self.source = source
+        self._x = _number(x_col)
+        self._y = _number(y_col)
+        self._where = f"NOT isnan({self._x}) AND NOT isnan({self._y})"
+        self.count = count
+        x_min, x_max, y_min, y_max = source._fetchall(
+            f"SELECT min({self._x}), max({self._x}), min({self._y}), max({self._y}) FROM data WHERE {self._where}"
+        )[0]
+        self.x_range = (x_min, x_max)
+        self.y_range = (y_min, y_max)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        return 0
+
+    def _bins(self, expression: str, lo: float, hi: float, n_bins: int) -> str:
+        lo, width = float(lo), float(hi - lo) / n_bins or 1.0
+        return f"least(CAST(floor(({expression} - {lo!r}) / {width!r}) AS BIGINT), {n_bins - 1})"
+
+    def line(self, n_pixels: int, xlim=None, method: str = "minmax"):
+        lo, hi = (float(limit) for limit in (sorted(xlim) if xlim is not None else self.x_range))
+        n_bins = n_pixels * LTTB_OVERSAMPLING if method == "lttb" else n_pixels
+        extremes = self.source._frame(
+            f"SELECT arg_min({self._x}, {self._y}) AS x_low, min({self._y}) AS y_low, "
+            f"arg_max({self._x}, {self._y}) AS x_high, max({self._y}) AS y_high FROM data "
+            f"WHERE {self._where} AND {self._x} BETWEEN ? AND ? GROUP BY {self._bins(self._x, lo, hi, n_bins)}",
+            [lo, hi],
+        )
+        x = np.concatenate((extremes["x_low"].to_numpy(np.float64), extremes["x_high"].to_numpy(np.float64)))
+        y = np.concatenate((extremes["y_low"].to_numpy(np.float64), extremes["y_high"].to_numpy(np.float64)))
+        order = np.argsort(x, kind="stable")
+        x, y = x[order], y[order]
+        if method == "lttb":
+            return lttb(x, y, 2 * n_pixels)
+        return x, y
+
+    def density(self, bins, xlim=None, ylim=None):
+        nx, ny = bins
+        xlim = self.x_range if xlim is None else xlim
+        ylim = self.y_range if ylim is None else ylim
+        x_range = sorted(xlim) if xlim[0] != xlim[1] else (xlim[0] - 0.5, xlim[0] + 0.5)
+        y_range = sorted(ylim) if ylim[0] != ylim[1] else (ylim[0] - 0.5, ylim[0] + 0.5)
+        cells = self.source._fetchall(
+            f"SELECT {self._bins(self._x, *x_range, nx)} AS i, {self._bins(self._y, *y_range, ny)} AS j, "
+            f"count(*) FROM data WHERE {self._where} AND {self._x} BETWEEN ? AND ? "
+            f"AND {self._y} BETWEEN ? AND ? GROUP BY i, j",
+            [*x_range, *y_range],
+        )
+        counts = np.zeros((ny, nx))
+        for i, j, count in cells:
+            counts[j, i] = count
+        return counts, (x_range[0], x_range[1], y_range[0], y_range[1])
+
+    def bars(self, max_bars: int):
+        lo, hi = self.x_range
+        if lo == hi:
+            return np.array([lo]), np.array([self.source._fetchall(
+                f"SELECT avg({self._y}) FROM data WHERE {self._where}")[0][0]]), 0.8
+        means = self.source._frame(
+            f"SELECT {self._bins(self._x, lo, hi, max_bars)} AS bin, avg({self._y}) AS y FROM data "
+            f"WHERE {self._where} GROUP BY bin ORDER BY bin"
+        )
+        width = (hi - lo) / max_bars
+        centers = lo + (means["bin"].to_numpy(np.float64) + 0.5) * width
+        return centers, means["y"].to_numpy(np.float64), width
+
+
+def open_source(file_path: str, progress=None, is_cancelled=None, **options) -> DuckDBSource:
+    """Create a DuckDBSource for file_path and import the file; the database is removed on failure."""
+    source = DuckDBSource(file_path, **options)
+    try:
+        source.import_csv(progress, is_cancelled)
+    except BaseException:
+        source.close()
+        raise
+    log.info("Opened out-of-core source", extra={"fields": {"file": file_path, "rows": source.row_count}})
+    return source
@@ -0,0 +1,91 @@
+"""
+Time-to-first-window check.
+
+    python startup_check.py --budget 1.0 --runs 3
+
+Starts the app in fresh interpreters (offscreen, with -X importtime), reports
+the slowest imports and fails when the median time until the main window is
+shown exceeds the budget, or when a module that should only load with its
+dock is imported before the window appears.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_BUDGET_SECONDS = float(os.environ.get("DATA_ANALYZER_STARTUP_BUDGET", 1.5))
+
+# Loaded on first use of a View-menu dock, never before the window is shown
+DEFERRED_MODULES = ("matplotlib", "seaborn", "sklearn", "scipy", "joblib")
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from ui.main_window import MainWindow
+window = MainWindow()
+window.show()
+app.processEvents()
+print(json.dumps({"seconds": time.perf_counter() - start, "modules": sorted(sys.modules)}))
+"""
+
+
+def _parse_importtime(stderr: str) -> list:
+    """(cumulative microseconds, module) for every import, slowest first."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)
+
+
+def measure_startup() -> dict:
+    """Start the app once in a fresh interpreter and time it until the window is shown."""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+               DATA_ANALYZER_NO_WARMUP="1")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        capture_output=True, text=True, check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["imports"] = _parse_importtime(completed.stderr)
+    result["deferred_loaded"] = sorted(
+        {name.split(".")[0] for name in result["modules"]} & set(DEFERRED_MODULES)
+    )
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help="maximum median seconds until the window is shown")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args(argv)
+
+    runs = [measure_startup() for _ in range(args.runs)]
+    median = statistics.median(run["seconds"] for run in runs)
+    print(f"Time to first window: {median:.3f} s (median of {args.runs}, budget {args.budget:.3f} s)")
+    print("Slowest imports, including their dependencies (last run):")
+    for cumulative, name in runs[-1]["imports"][:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if median > args.budget:
+        print(f"FAIL: startup is over budget by {median - args.budget:.3f} s")
+        failed = True
+    deferred = runs[-1]["deferred_loaded"]
+    if deferred:
+        print(f"FAIL: imported before the first window: {', '.join(deferred)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
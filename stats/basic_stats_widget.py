@@ -1,11 +1,57 @@
+import os
+
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTextEdit
-from stats.statistics import get_basic_statistics
-import pandas as pd
+from PyQt6.QtCore import QThread, QTimer, pyqtSignal
+from stats.statistics import basic_statistics
+from stats.streaming import StreamingStats
+from data_loader import iter_csv_chunks
+from ui.dataset_store import CHANGE_DEBOUNCE_MS, as_store
+from utils.logger import span
+from utils.task_scheduler import TaskScheduler
+
+# Keeps running threads alive if their widget is deleted first
+_active_threads = set()
+
+
+class StreamingStatsThread(QThread):
+    """Accumulates StreamingStats over the chunks of a CSV file."""
+
+    progress = pyqtSignal('qint64', 'qint64', 'qint64')
+    finished_stats = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path: str, engine: str = "c", parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.engine = engine
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        stats = StreamingStats()
+        try:
+            with span("streaming_statistics", file=os.path.basename(self.file_path), engine=self.engine):
+                for chunk in iter_csv_chunks(self.file_path, self.engine,
+                                             progress=self.progress.emit,
+                                             is_cancelled=lambda: self._cancelled):
+                    stats.update(chunk)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished_stats.emit(stats.result(percentiles=(25, 75)))
+
 
 class StatsWidget(QWidget):
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, data=None, file_path: str = None, engine: str = "c"):
         super().__init__()
-        self.df = df
+        self.store = as_store(data, parent=self)
+        self.dataset = self.store.dataset
+        self.file_path = file_path
+        self.engine = engine
+        self.stream_thread = None
+        self.tasks = TaskScheduler(self)
 
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
@@ -17,11 +63,57 @@ class StatsWidget(QWidget):
         self.layout.addWidget(self.label)
         self.layout.addWidget(self.text_area)
 
-        self.display_statistics()
+        if self.file_path is not None:
+            self.display_file_statistics()
+        else:
+            self.change_timer = QTimer(self)
+            self.change_timer.setSingleShot(True)
+            self.change_timer.setInterval(CHANGE_DEBOUNCE_MS)
+            self.change_timer.timeout.connect(self.display_statistics)
+            self.store.data_changed.connect(self.change_timer.start)
+            self.display_statistics()
 
     def display_statistics(self):
-        stats = get_basic_statistics(self.df)
+        self.text_area.setText("Computing statistics...")
+        df, version, source = self.dataset.frame, self.dataset.version, self.store.source
+        if source is not None:
+            # Computed by the query engine over the whole file
+            self.label.setText("Basic Statistics (out-of-core)")
+            task = lambda token: self.dataset.memoize("basic_statistics", (), source.basic_statistics,
+                                                      version=version)
+        else:
+            self.label.setText("Basic Statistics")
+            task = lambda token: self._basic_statistics(df, version)[0]
+        self.tasks.submit("basic_statistics", task, self._show_stats, self.text_area.setText)
+
+    def _basic_statistics(self, df, version):
+        def extend(previous, n):
+            # The moments of appended rows are merged in; only the medians look at every row
+            moments = previous[1]
+            return basic_statistics(df, None if moments is None else moments.extended(df.iloc[len(df) - n:]))
+
+        return self.dataset.memoize("basic_statistics_moments", (), lambda: basic_statistics(df),
+                                    version=version, extend=extend)
+
+    def display_file_statistics(self):
+        # Streams the file so it never has to fit in memory
+        self.label.setText("Basic Statistics (streaming, median/percentiles approximate)")
+        self.text_area.setText("Reading file...")
+        thread = StreamingStatsThread(self.file_path, self.engine)
+        thread.progress.connect(self._on_stream_progress)
+        thread.finished_stats.connect(self._show_stats)
+        thread.failed.connect(self.text_area.setText)
+        thread.finished.connect(lambda: _active_threads.discard(thread))
+        self.destroyed.connect(thread.cancel)
+        _active_threads.add(thread)
+        self.stream_thread = thread
+        thread.start()
+
+    def _on_stream_progress(self, bytes_read, total_bytes, rows_read):
+        percent = 100 * bytes_read / total_bytes if total_bytes else 100
+        self.text_area.setText(f"Reading file... {percent:.0f}% ({rows_read:,} rows)")
 
+    def _show_stats(self, stats):
         if "error" in stats:
             self.text_area.setText(stats["error"])
         else:
@@ -0,0 +1,250 @@
+import pandas as pd
+from PyQt6.QtCore import QTimer, pyqtSignal
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QCheckBox, QLineEdit, QPushButton, QTableView
+)
+from stats.grouping import (
+    AGGREGATIONS, DEFAULT_AGGREGATIONS, flatten_columns, group_codes, group_statistics, pivot_table
+)
+from ui.dataset_store import CHANGE_DEBOUNCE_MS, as_store
+from ui.table_model import DataFrameTableModel
+from utils.task_scheduler import TaskScheduler
+
+ALL_VALUES = "(All Numeric Columns)"
+RESULT_MODES = ("Table", "Pivot")
+
+
+def parse_quantiles(text: str) -> tuple:
+    """Percentages from text like "25, 75"; raises ValueError for anything outside 0..100."""
+    quantiles = tuple(float(part) for part in text.replace(";", ",").split(",") if part.strip())
+    if any(not 0 <= q <= 100 for q in quantiles):
+        raise ValueError("Quantiles are percentages between 0 and 100.")
+    return quantiles
+
+
+def _label_index(frame: pd.DataFrame) -> pd.DataFrame:
+    """frame with one text label per row, e.g. "a / 3" for a two-key group."""
+    if isinstance(frame.index, pd.MultiIndex):
+        labels = [" / ".join(str(value) for value in key) for key in frame.index]
+        return frame.set_axis(pd.Index(labels, name=" / ".join(map(str, frame.index.names))), axis=0)
+    return frame
+
+
+class GroupByWidget(QWidget):
+    """
+    Statistics per group of the columns given the Group By role, as a table
+    or as a pivot of one statistic. show_result(kind, frame) asks for the
+    shown result in a "plot" or "heatmap" pane.
+    """
+
+    show_result = pyqtSignal(str, object)
+
+    def __init__(self, data):
+        super().__init__()
+        self.store = as_store(data, parent=self)
+        self.dataset = self.store.dataset
+        self.tasks = TaskScheduler(self)
+        self.result = None
+
+        self.layout = QVBoxLayout(self)
+        self.keys_label = QLabel()
+        self.layout.addWidget(self.keys_label)
+
+        controls = QHBoxLayout()
+        self.value_selector = QComboBox()
+        controls.addWidget(QLabel("Values:"))
+        controls.addWidget(self.value_selector)
+        self.aggregation_boxes = {}
+        for name in AGGREGATIONS:
+            box = QCheckBox(name)
+            box.setChecked(name in DEFAULT_AGGREGATIONS)
+            box.toggled.connect(self._schedule)
+            self.aggregation_boxes[name] = box
+            controls.addWidget(box)
+        self.quantile_edit = QLineEdit()
+        self.quantile_edit.setPlaceholderText("Quantiles, e.g. 25, 75")
+        self.quantile_edit.editingFinished.connect(self._schedule)
+        controls.addWidget(self.quantile_edit)
+        self.layout.addLayout(controls)
+
+        pivot_controls = QHBoxLayout()
+        self.mode_selector = QComboBox()
+        self.mode_selector.addItems(RESULT_MODES)
+        self.pivot_key_selector = QComboBox()
+        self.pivot_statistic_selector = QComboBox()
+        self.plot_button = QPushButton("Plot")
+        self.heatmap_button = QPushButton("Heat Map")
+        pivot_controls.addWidget(QLabel("Show:"))
+        pivot_controls.addWidget(self.mode_selector)
+        pivot_controls.addWidget(QLabel("Pivot Columns:"))
+        pivot_controls.addWidget(self.pivot_key_selector)
+        pivot_controls.addWidget(QLabel("Pivot Statistic:"))
+        pivot_controls.addWidget(self.pivot_statistic_selector)
+        pivot_controls.addStretch()
+        pivot_controls.addWidget(self.plot_button)
+        pivot_controls.addWidget(self.heatmap_button)
+        self.layout.addLayout(pivot_controls)
+
+        self.status = QLabel()
+        self.table_view = QTableView()
+        self.layout.addWidget(self.status)
+        self.layout.addWidget(self.table_view)
+
+        self.value_selector.currentIndexChanged.connect(self._schedule)
+        self.mode_selector.currentIndexChanged.connect(self._show_result)
+        self.pivot_key_selector.currentIndexChanged.connect(self._show_result)
+        self.pivot_statistic_selector.currentIndexChanged.connect(self._show_result)
+        self.plot_button.clicked.connect(lambda: self._emit_result("plot"))
+        self.heatmap_button.clicked.connect(lambda: self._emit_result("heatmap"))
+
+        # Role toggles and row edits come in bursts; recompute once they settle
+        self.change_timer = QTimer(self)
+        self.change_timer.setSingleShot(True)
+        self.change_timer.setInterval(CHANGE_DEBOUNCE_MS)
+        self.change_timer.timeout.connect(self.update_groups)
+        self.store.reloaded.connect(self._fill_value_selector)
+        self.store.data_changed.connect(self.change_timer.start)
+        self.store.roles_changed.connect(self._on_roles_changed)
+
+        self._fill_value_selector()
+        self._on_roles_changed()
+        self.update_groups()
+
+    def _numeric_columns(self) -> list:
+        if not self.store.has_data:
+            return []
+        if self.store.source is not None:
+            return self.store.source.numeric_columns
+        return self.dataset.memoize(
+            "numeric_columns", (), lambda: list(self.dataset.frame.select_dtypes(include="number").columns)
+        )
+
+    def _fill_value_selector(self):
+        current = self.value_selector.currentText()
+        self.value_selector.blockSignals(True)
+        self.value_selector.clear()
+        self.value_selector.addItem(ALL_VALUES)
+        self.value_selector.addItems([str(col) for col in self._numeric_columns()])
+        if self.value_selector.findText(current) >= 0:
+            self.value_selector.setCurrentText(current)
+        self.value_selector.blockSignals(False)
+
+    def _on_roles_changed(self, *_):
+        keys = self.store.group_columns()
+        if keys:
+            self.keys_label.setText("Grouped by: " + ", ".join(map(str, keys)))
+        else:
+            self.keys_label.setText("Click column headers until one shows the Group By role.")
+        current = self.pivot_key_selector.currentText()
+        self.pivot_key_selector.blockSignals(True)
+        self.pivot_key_selector.clear()
+        self.pivot_key_selector.addItems([str(key) for key in keys])
+        if self.pivot_key_selector.findText(current) >= 0:
+            self.pivot_key_selector.setCurrentText(current)
+        self.pivot_key_selector.blockSignals(False)
+        self.change_timer.start()
+
+    def _schedule(self, *_):
+        self.change_timer.start()
+
+    def _request(self):
+        """(keys, values, aggregations, quantiles) for the current controls."""
+        keys = self.store.group_columns()
+        value = self.value_selector.currentText()
+        numeric = self._numeric_columns()
+        if value == ALL_VALUES or not value:
+            values = [col for col in numeric if col not in keys]
+        else:
+            values = [next(col for col in numeric if str(col) == value)]
+        aggregations = tuple(name for name, box in self.aggregation_boxes.items() if box.isChecked())
+        return tuple(keys), tuple(values), aggregations, parse_quantiles(self.quantile_edit.text())
+
+    def update_groups(self):
+        if not self.store.has_data:
+            self.tasks.cancel("group_statistics")
+            self.status.setText("No data loaded.")
+            return
+        try:
+            keys, values, aggregations, quantiles = self._request()
+        except (ValueError, StopIteration) as e:
+            self.status.setText(f"Invalid selection: {e}")
+            return
+        if not keys:
+            self.tasks.cancel("group_statistics")
+            self.result = None
+            self.status.setText("")
+            self.table_view.setModel(None)
+            return
+        if not values or not (aggregations or quantiles):
+            self.status.setText("Select a numeric value column and at least one statistic.")
+            return
+
+        dataset, version, source = self.dataset, self.dataset.version, self.store.source
+        params = (keys, values, aggregations, quantiles)
+        if source is not None:
+            # One GROUP BY query over the whole file
+            compute = lambda: source.group_statistics(keys, values, aggregations, quantiles)
+        else:
+            df = dataset.frame
+
+            def compute():
+                # The key encoding is shared by every aggregation of the same keys
+                grouping = dataset.memoize("group_codes", keys, lambda: group_codes(df, keys), version=version)
+                return group_statistics(df, keys, values, aggregations, quantiles, n_jobs=-1, grouping=grouping)
+
+        self.status.setText("Computing groups...")
+        self.tasks.submit(
+            "group_statistics",
+            lambda token: dataset.memoize("group_statistics", params, compute, version=version),
+            self._on_result, lambda message: self.status.setText(f"Could not group: {message}"),
+        )
+
+    def _on_result(self, grouped):
+        self.result = grouped
+        statistics = [f"{value} {statistic}" for value, statistic in grouped.columns]
+        current = self.pivot_statistic_selector.currentText()
+        self.pivot_statistic_selector.blockSignals(True)
+        self.pivot_statistic_selector.clear()
+        self.pivot_statistic_selector.addItems(statistics)
+        if current in statistics:
+            self.pivot_statistic_selector.setCurrentText(current)
+        self.pivot_statistic_selector.blockSignals(False)
+        self.status.setText(f"{len(grouped):,} groups")
+        self._show_result()
+
+    def shown_frame(self) -> pd.DataFrame:
+        """The result as shown: groups with flattened "value statistic" columns, or the pivot grid."""
+        if self.result is None:
+            return None
+        if self.mode_selector.currentText() == "Pivot":
+            if self.result.index.nlevels < 2:
+                raise ValueError("A pivot needs at least two Group By columns.")
+            position = self.pivot_statistic_selector.currentIndex()
+            value, statistic = self.result.columns[max(position, 0)]
+            column_key = self.result.index.names[max(self.pivot_key_selector.currentIndex(), 0)]
+            pivot = pivot_table(self.result, column_key, value, statistic)
+            pivot.columns = [str(col) for col in pivot.columns]
+            return pivot
+        return flatten_columns(self.result)
+
+    def _show_result(self, *_):
+        try:
+            frame = self.shown_frame()
+        except ValueError as e:
+            self.status.setText(str(e))
+            return
+        if frame is None:
+            return
+        self.table_view.setModel(DataFrameTableModel(frame.reset_index(), show_actions=False,
+                                                     parent=self.table_view))
+
+    def _emit_result(self, kind: str):
+        try:
+            frame = self.shown_frame()
+        except ValueError as e:
+            self.status.setText(str(e))
+            return
+        if frame is None:
+            return
+        # The heat map labels rows by the index; the plot picks its axes among the columns
+        self.show_result.emit(kind, _label_index(frame) if kind == "heatmap" else frame.reset_index())
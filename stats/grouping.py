@@ -0,0 +1,162 @@
+"""
+Per-group statistics and pivot tables.
+
+Group keys are encoded to integer codes once (a categorical column's codes,
+or pd.factorize's hash table for anything else), several keys are combined
+into one code per row, and the values are aggregated with pandas' Cython
+groupby over those codes. Codes follow the sorted key values, so groups
+come out sorted, and callers can keep the codes of a set of keys to
+aggregate other values without encoding again. Only groups that occur are
+produced, however many categories the key columns declare. With many
+groups the rows are split by group code across a process pool; each
+worker gets whole groups, so medians and quantiles stay exact.
+"""
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+
+from utils.logger import span
+
+AGGREGATIONS = ("count", "mean", "median", "std", "min", "max", "sum")
+DEFAULT_AGGREGATIONS = ("count", "mean", "median", "std")
+# Groupings at least this large are split across processes
+PARALLEL_MIN_GROUPS = 50_000
+PARALLEL_MIN_ROWS = 1_000_000
+
+
+def quantile_name(q: float) -> str:
+    """Column label of a quantile given in percent, e.g. p25."""
+    return f"p{q:g}"
+
+
+def _encode(series: pd.Series):
+    """Integer code per row (-1 for missing), in the order of the sorted labels, and the labels."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = pd.Categorical.from_codes(np.arange(len(series.cat.categories)), dtype=series.dtype)
+        return series.cat.codes.to_numpy(dtype=np.int64), categories
+    codes, uniques = pd.factorize(series, sort=True)
+    return codes.astype(np.int64, copy=False), uniques
+
+
+def _renumber(codes: np.ndarray) -> np.ndarray:
+    """Codes 0..n-1 for the n distinct codes that occur, keeping their order."""
+    present = codes >= 0
+    dense = np.full(len(codes), -1, dtype=np.int64)
+    dense[present] = pd.factorize(codes[present], sort=True)[0]
+    return dense
+
+
+def group_codes(df: pd.DataFrame, keys):
+    """
+    One group id per row of df (-1 where a key is missing) and the key
+    labels of each group, as a list with one array per key. Group ids
+    follow the sorted key values, so aggregating by id yields sorted groups.
+    """
+    keys = list(keys)
+    if not keys:
+        raise ValueError("Grouping needs at least one key column.")
+    encoded = [_encode(df[key]) for key in keys]
+    codes = None
+    for key, (key_codes, uniques) in zip(keys, encoded):
+        if codes is None:
+            codes = key_codes
+        else:
+            combined = codes * len(uniques) + key_codes
+            combined[(codes < 0) | (key_codes < 0)] = -1
+            codes = combined
+        # Renumbered after each key, so unused categories get no group and
+        # the mixed-radix product never overflows
+        if len(keys) > 1 or isinstance(df[key].dtype, pd.CategoricalDtype):
+            codes = _renumber(codes)
+    valid = codes >= 0
+    n_groups = int(codes.max()) + 1 if valid.any() else 0
+    # First row of each group, to look up its key labels
+    rows = np.flatnonzero(valid)
+    first = np.empty(n_groups, dtype=np.int64)
+    first[codes[rows][::-1]] = rows[::-1]
+    labels = [uniques.take(key_codes[first]) for key_codes, uniques in encoded]
+    return codes, labels
+
+
+def _aggregate(values: pd.DataFrame, codes: np.ndarray, aggregations, quantiles) -> pd.DataFrame:
+    # Categorical codes are taken as they are, without hashing them again
+    groups = pd.Categorical.from_codes(codes, categories=pd.RangeIndex(int(codes.max()) + 1 if len(codes) else 0))
+    grouped = values.groupby(groups, sort=True, observed=True)
+    parts = {name: getattr(grouped, name)() for name in aggregations}
+    for q in quantiles:
+        parts[quantile_name(q)] = grouped.quantile(q / 100)
+    result = pd.concat(parts, axis=1)
+    # (value, statistic) column pairs, grouped by value column
+    return result.swaplevel(axis=1).reindex(columns=values.columns, level=0)
+
+
+def group_statistics(df: pd.DataFrame, keys, values=None, aggregations=DEFAULT_AGGREGATIONS,
+                     quantiles=(), n_jobs: int = 1, grouping=None) -> pd.DataFrame:
+    """
+    Statistics of the value columns per combination of key values.
+
+    Parameters:
+    - df: pandas.DataFrame.
+    - keys: list of column names to group by; rows missing a key are left out.
+    - values: numeric columns to aggregate (default: every numeric non-key column).
+    - aggregations: names from AGGREGATIONS; count is the non-missing values.
+    - quantiles: percentages, e.g. (25, 75), added as p25 and p75.
+    - n_jobs: worker processes for large groupings, -1 for all cores.
+    - grouping: group_codes(df, keys), if already computed for another aggregation.
+
+    Returns:
+    - DataFrame indexed by the sorted key values, with (value, statistic) columns.
+    """
+    keys = list(keys)
+    unknown = [name for name in aggregations if name not in AGGREGATIONS]
+    if unknown:
+        raise ValueError(f"Unknown aggregations {unknown}; expected some of {AGGREGATIONS}.")
+    if values is None:
+        values = [col for col in df.select_dtypes(include="number").columns if col not in keys]
+    values = list(values)
+    non_numeric = [col for col in values if not pd.api.types.is_numeric_dtype(df[col])]
+    if non_numeric:
+        raise ValueError(f"Grouped statistics need numeric value columns: {non_numeric}")
+
+    with span("group_statistics", rows=len(df), keys=len(keys)) as s:
+        codes, labels = group_codes(df, keys) if grouping is None else grouping
+        n_groups = len(labels[0])
+        s.fields["groups"] = n_groups
+        valid = codes >= 0
+        block = df[values]
+        if not valid.all():
+            block, codes = block[valid], codes[valid]
+
+        n_parts = min(effective_n_jobs(n_jobs), n_groups)
+        if n_parts > 1 and n_groups >= PARALLEL_MIN_GROUPS and len(block) >= PARALLEL_MIN_ROWS:
+            # Whole groups per part, so every statistic is computed exactly
+            parts = codes % n_parts
+            result = pd.concat(Parallel(n_jobs=n_parts)(
+                delayed(_aggregate)(block[parts == part], codes[parts == part], aggregations, quantiles)
+                for part in range(n_parts)
+            )).sort_index()
+            s.fields["processes"] = n_parts
+        else:
+            result = _aggregate(block, codes, aggregations, quantiles)
+
+        if len(keys) == 1:
+            index = pd.Index(labels[0], name=keys[0])
+        else:
+            index = pd.MultiIndex.from_arrays(labels, names=keys)
+        result.index = index[result.index.to_numpy()]
+        return result
+
+
+def pivot_table(grouped: pd.DataFrame, column_key, value, statistic: str) -> pd.DataFrame:
+    """
+    One statistic of a two-key group_statistics() result as a grid: the other
+    key's values down the rows and column_key's values across.
+    """
+    return grouped[(value, statistic)].unstack(column_key)
+
+
+def flatten_columns(grouped: pd.DataFrame) -> pd.DataFrame:
+    """Columns named "value statistic", for display and for the plot and heatmap panes."""
+    flat = grouped.copy(deep=False)
+    flat.columns = [f"{value} {statistic}" for value, statistic in grouped.columns]
+    return flat
@@ -1,5 +1,96 @@
+import warnings
+
+import numpy as np
 import pandas as pd
 
+from utils.logger import timed
+
+BASIC_METRICS = ("mean", "median", "std", "min", "max")
+
+
+def _metrics_to_dict(columns, metrics: dict) -> dict:
+    return {
+        col: {name: float(values[i]) for name, values in metrics.items()}
+        for i, col in enumerate(columns)
+    }
+
+
+def _column_moments(values: np.ndarray):
+    """Per-column count, mean and sum of squared deviations, ignoring NaNs."""
+    missing = np.isnan(values)
+    has_missing = missing.any()
+    count = values.shape[0] - missing.sum(axis=0)
+    filled = np.where(missing, 0.0, values) if has_missing else values
+    mean = filled.sum(axis=0) / np.maximum(count, 1)
+    centered = filled - mean
+    if has_missing:
+        centered[missing] = 0.0
+    m2 = np.einsum("ij,ij->j", centered, centered)
+    return count, mean, m2
+
+
+class ColumnMoments:
+    """
+    Count, mean, sum of squared deviations, min and max per numeric column.
+
+    extended() merges in more rows exactly (Chan et al.), so statistics of a
+    growing frame only scan the rows that were added.
+    """
+
+    def __init__(self, columns, count, mean, m2, minimum, maximum):
+        self.columns = list(columns)
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = minimum
+        self.max = maximum
+
+    @classmethod
+    def from_values(cls, columns, values: np.ndarray) -> "ColumnMoments":
+        count, mean, m2 = _column_moments(values)
+        with warnings.catch_warnings():
+            # All-NaN columns have no min/max and stay NaN
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            return cls(columns, count, mean, m2, np.nanmin(values, axis=0), np.nanmax(values, axis=0))
+
+    @property
+    def nbytes(self) -> int:
+        return self.mean.nbytes * 5
+
+    def extended(self, df: pd.DataFrame) -> "ColumnMoments":
+        """These moments plus the rows of df, as a new object."""
+        added = ColumnMoments.from_values(self.columns, _numeric_values(df[self.columns]))
+        total = self.count + added.count
+        delta = added.mean - self.mean
+        weight = np.divide(added.count, total, out=np.zeros(len(total)), where=total > 0)
+        return ColumnMoments(
+            self.columns, total, self.mean + delta * weight,
+            self.m2 + added.m2 + delta ** 2 * self.count * weight,
+            np.fmin(self.min, added.min), np.fmax(self.max, added.max),
+        )
+
+    def metrics(self, median: np.ndarray) -> dict:
+        count = self.count
+        return _metrics_to_dict(self.columns, {
+            "mean": np.where(count > 0, self.mean, np.nan),
+            "median": median,
+            "std": np.where(count > 1, np.sqrt(self.m2 / np.maximum(count - 1, 1)), np.nan),
+            "min": self.min,
+            "max": self.max,
+        })
+
+
+def _numeric_values(numeric_df: pd.DataFrame) -> np.ndarray:
+    # One float64 block for all columns, reduced column-wise in a single step
+    return numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _medians(values: np.ndarray) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanmedian(values, axis=0)
+
+
 def get_basic_statistics(df):
     """
     Calculate basic statistics for a given pandas DataFrame.
@@ -10,19 +101,25 @@ def get_basic_statistics(df):
     Returns:
     - dict with statistics: mean, median, std, min, max for numeric columns.
     """
+    return basic_statistics(df)[0]
+
+
+@timed()
+def basic_statistics(df, moments: ColumnMoments = None):
+    """
+    get_basic_statistics() and the ColumnMoments behind it.
+
+    With moments of the same columns (e.g. extended with appended rows) only
+    the medians are computed from df, by selection rather than a sort.
+    """
     if df is None or df.empty:
-        return {"error": "DataFrame is empty or None."}
+        return {"error": "DataFrame is empty or None."}, None
 
-    stats = {}
     numeric_df = df.select_dtypes(include=['number'])
+    if numeric_df.empty:
+        return {}, None
 
-    for col in numeric_df.columns:
-        stats[col] = {
-            "mean": numeric_df[col].mean(),
-            "median": numeric_df[col].median(),
-            "std": numeric_df[col].std(),
-            "min": numeric_df[col].min(),
-            "max": numeric_df[col].max(),
-        }
-
-    return stats
+    values = _numeric_values(numeric_df)
+    if moments is None or moments.columns != list(numeric_df.columns):
+        moments = ColumnMoments.from_values(numeric_df.columns, values)
+    return moments.metrics(_medians(values)), moments
@@ -0,0 +1,175 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from stats.statistics import _column_moments, _metrics_to_dict
+
+
+class QuantileSketch:
+    """
+    Mergeable KLL-style quantile sketch.
+
+    Values are kept in levels of sorted compactors; an item at level h stands
+    for 2**h input values. When a level outgrows its capacity, every other item
+    (random offset) is promoted to the next level, so memory stays at roughly
+    3 * k items regardless of the stream length.
+    """
+
+    def __init__(self, k: int = 200, seed=None):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                leftover = items[:items.size % 2]
+                items = items[items.size % 2:]
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.count += values.size
+            self.levels[0] = np.concatenate((self.levels[0], values))
+            self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.count += other.count
+        self._compress()
+
+    def quantiles(self, qs) -> np.ndarray:
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(lvl.size, 2.0 ** h) for h, lvl in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        ranks = qs * cumulative[-1]
+        positions = np.searchsorted(cumulative, ranks, side="left")
+        return items[np.minimum(positions, items.size - 1)]
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+
+class StreamingStats:
+    """
+    Single-pass, mergeable statistics over DataFrame chunks.
+
+    For every numeric column it keeps the count, Welford mean/M2, min, max and
+    a QuantileSketch, all updated with vectorized operations per chunk. Two
+    instances built over different parts of the data can be merged, which
+    gives exact mean/std/min/max and approximate median/percentiles.
+    """
+
+    def __init__(self, columns=None, sketch_k: int = 200):
+        self.sketch_k = sketch_k
+        self.columns = None
+        if columns is not None:
+            self._init_columns(list(columns))
+
+    def _init_columns(self, columns):
+        n = len(columns)
+        self.columns = columns
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.sketches = [QuantileSketch(self.sketch_k) for _ in columns]
+
+    def update(self, chunk: pd.DataFrame):
+        if self.columns is None:
+            self._init_columns(list(chunk.select_dtypes(include=['number']).columns))
+        if not self.columns or chunk.empty:
+            return
+
+        block = chunk.reindex(columns=self.columns)
+        # Later chunks may infer a column as text; anything unparsable is missing
+        values = np.column_stack([
+            pd.to_numeric(block[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            for col in self.columns
+        ])
+        valid = ~np.isnan(values)
+        count, mean, m2 = _column_moments(values)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            chunk_min = np.nanmin(values, axis=0)
+            chunk_max = np.nanmax(values, axis=0)
+
+        self._combine(count, mean, m2, np.where(count > 0, chunk_min, np.inf),
+                      np.where(count > 0, chunk_max, -np.inf))
+        for i, sketch in enumerate(self.sketches):
+            sketch.update(values[valid[:, i], i])
+
+    def _combine(self, count, mean, m2, chunk_min, chunk_max):
+        # Chan et al. parallel form of Welford's update
+        total = self.count + count
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / safe_total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe_total
+        self.count = total
+        self.min = np.minimum(self.min, chunk_min)
+        self.max = np.maximum(self.max, chunk_max)
+
+    def merge(self, other: "StreamingStats"):
+        if other.columns is None:
+            return
+        if self.columns is None:
+            self._init_columns(list(other.columns))
+        if list(other.columns) != list(self.columns):
+            raise ValueError("Cannot merge statistics computed over different columns.")
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+
+    def quantiles(self, qs) -> dict:
+        return {col: sketch.quantiles(qs) for col, sketch in zip(self.columns, self.sketches)}
+
+    def result(self, percentiles=()) -> dict:
+        """Same layout as get_basic_statistics(), plus optional "p<N>" entries."""
+        if self.columns is None or not self.count.sum():
+            return {"error": "DataFrame is empty or None."}
+
+        has_data = self.count > 0
+        metrics = {
+            "mean": np.where(has_data, self.mean, np.nan),
+            "median": np.array([s.quantile(0.5) for s in self.sketches]),
+            "std": np.where(self.count > 1, np.sqrt(self.m2 / np.maximum(self.count - 1, 1)), np.nan),
+            "min": np.where(has_data, self.min, np.nan),
+            "max": np.where(has_data, self.max, np.nan),
+        }
+        for p in percentiles:
+            metrics[f"p{p:g}"] = np.array([s.quantile(p / 100) for s in self.sketches])
+        return _metrics_to_dict(self.columns, metrics)
+
+
+def streaming_statistics(chunks, percentiles=()) -> dict:
+    stats = StreamingStats()
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats.result(percentiles)
@@ -0,0 +1,135 @@
+import pandas as pd
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from data_loader import extract_group_columns, extract_variable_roles, init_column_roles, toggle_column_role
+from dataset import Dataset, as_dataset
+
+# Row removals often come in bursts (clicking Remove); panes that recompute
+# on data_changed wait this long for the burst to settle
+CHANGE_DEBOUNCE_MS = 150
+
+
+class DatasetStore(QObject):
+    """
+    The one owner of the loaded data that every pane reads from.
+
+    The Dataset object stays the same for the life of the store (a new file
+    is loaded into it), so panes keep a reference to the store instead of a
+    DataFrame snapshot and never see stale rows or pin old frames in memory.
+    Changes are announced with signals:
+    - reloaded: a new frame replaced the old one (columns may differ).
+    - rows_removed(row_ids): rows were tombstoned.
+    - rows_appended(row_ids): rows were added after the last one.
+    - roles_changed(independent, dependent): a column's role changed (regression
+      variables as arguments; group_columns() for the Group By keys).
+    - data_changed: after any of the first three, for panes that only recompute.
+
+    In out-of-core mode (load_source) the dataset is empty and source, a
+    query_source.DuckDBSource, answers the panes' questions instead; its
+    rows are read-only.
+    """
+
+    reloaded = pyqtSignal()
+    rows_removed = pyqtSignal(object)
+    rows_appended = pyqtSignal(object)
+    roles_changed = pyqtSignal(object, object)
+    data_changed = pyqtSignal()
+
+    def __init__(self, dataset: Dataset = None, parent=None):
+        super().__init__(parent)
+        self.dataset = dataset if dataset is not None else Dataset()
+        self.column_roles = init_column_roles(self.dataset.columns)
+        self.file_path = None
+        # memory_usage_report() of the load's compaction, if it was compacted
+        self.memory_report = None
+        self.source = None
+
+    @property
+    def columns(self) -> list:
+        return list(self.source.columns if self.source is not None else self.dataset.columns)
+
+    @property
+    def has_data(self) -> bool:
+        return not self.dataset.empty or (self.source is not None and self.source.row_count > 0)
+
+    def load(self, df: pd.DataFrame, file_path: str = None, memory_report: pd.DataFrame = None,
+             column_roles: dict = None, close_previous: bool = True, results: tuple = None):
+        """
+        Show df in place of the current data.
+
+        close_previous=False means a workspace tab still holds the previous
+        data, so its cached results are kept too; results is the
+        Dataset.results_key() a tab saved when it was last shown.
+        """
+        self._replace(df, None, file_path, memory_report, column_roles, close_previous, results)
+
+    def load_source(self, source, column_roles: dict = None, close_previous: bool = True, results: tuple = None):
+        """
+        Switch to an out-of-core source. The previous one, if any, is closed
+        unless close_previous is False (e.g. a workspace tab still holds it);
+        results as for load().
+        """
+        self._replace(None, source, source.file_path, None, column_roles, close_previous, results)
+
+    def _replace(self, df, source, file_path, memory_report, column_roles=None, close_previous=True,
+                 results=None):
+        previous = self.source
+        self.dataset.reload(df, results, keep_results=not close_previous)
+        self.source = source
+        self.column_roles = column_roles if column_roles is not None else init_column_roles(self.columns)
+        self.file_path = file_path
+        self.memory_report = memory_report
+        self.reloaded.emit()
+        self.roles_changed.emit(*self.variables())
+        self.data_changed.emit()
+        if close_previous and previous is not None and previous is not source:
+            previous.close()
+
+    def remove_rows(self, row_ids, remove=None):
+        """
+        Tombstone rows by id and announce them.
+
+        remove: optional callable(row_ids) doing the tombstoning in place of
+        Dataset.remove_rows, e.g. a table model that brackets it with its own
+        row signals. Returns the view rows the removed rows occupied.
+        """
+        row_ids = pd.Index(row_ids)
+        view_rows = (remove or self.dataset.remove_rows)(row_ids)
+        if len(view_rows):
+            self.rows_removed.emit(row_ids)
+            self.data_changed.emit()
+        return view_rows
+
+    def append_rows(self, df: pd.DataFrame, append=None) -> pd.Index:
+        """
+        Add rows after the last one and announce them; returns their new row ids.
+
+        append: optional callable(df) doing the append in place of
+        Dataset.append, like remove in remove_rows.
+        """
+        if self.source is not None:
+            raise ValueError("Rows cannot be appended to a file opened out-of-core.")
+        if df.empty:
+            return pd.Index([])
+        row_ids = (append or self.dataset.append)(df)
+        self.rows_appended.emit(row_ids)
+        self.data_changed.emit()
+        return row_ids
+
+    def toggle_role(self, column) -> str:
+        role = toggle_column_role(column, self.column_roles)
+        self.roles_changed.emit(*self.variables())
+        return role
+
+    def variables(self):
+        """(independent, dependent) column lists."""
+        return extract_variable_roles(self.column_roles)
+
+    def group_columns(self) -> list:
+        """Columns with the Group By role, in column order."""
+        return extract_group_columns(self.column_roles)
+
+
+def as_store(data, parent=None) -> DatasetStore:
+    """Use a shared store as is; wrap a Dataset or DataFrame in a private one."""
+    return data if isinstance(data, DatasetStore) else DatasetStore(as_dataset(data), parent)
@@ -0,0 +1,85 @@
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from csv_cache import get_default_cache
+from data_compaction import compact_dataframe, memory_usage_report
+from data_loader import DEFAULT_CHUNK_SIZE, LoadCancelled, load_dataframe
+
+
+class CsvLoaderThread(QThread):
+    """
+    Parses a CSV file in chunks off the GUI thread.
+
+    With compact set, the frame is shrunk to smaller dtypes before it is
+    emitted and memory_report holds the per-column usage before and after.
+    """
+
+    progress = pyqtSignal('qint64', 'qint64', 'qint64')  # bytes read, total bytes, rows read
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, file_path: str, engine: str = "c", chunksize: int = DEFAULT_CHUNK_SIZE,
+                 use_cache: bool = True, compact: bool = False, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.engine = engine
+        self.chunksize = chunksize
+        self.compact = compact
+        self.memory_report = None
+        self.cache = get_default_cache() if use_cache else None
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        try:
+            df = load_dataframe(
+                self.file_path, self.engine, self.chunksize,
+                progress=self.progress.emit,
+                is_cancelled=self._cancel_event.is_set,
+                cache=self.cache,
+            )
+            if self.compact:
+                compacted = compact_dataframe(df)
+                self.memory_report = memory_usage_report(df, compacted)
+                df = compacted
+        except LoadCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.loaded.emit(df)
+
+
+class SourceLoaderThread(QThread):
+    """Imports a CSV file into an out-of-core query source off the GUI thread."""
+
+    progress = pyqtSignal('qint64', 'qint64', 'qint64')
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, file_path: str, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        # Imported here: the query backend is optional and only needed by this loader
+        from query_source import open_source
+
+        try:
+            source = open_source(self.file_path, progress=self.progress.emit,
+                                 is_cancelled=self._cancel_event.is_set)
+        except LoadCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.loaded.emit(source)
@@ -1,31 +1,83 @@
 from PyQt6.QtWidgets import (
     QMainWindow, QLabel, QVBoxLayout, QWidget,
-    QMenuBar, QMenu, QFileDialog, QMessageBox, QPushButton,
-    QDockWidget, QTableWidget, QTableWidgetItem
-)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QBrush, QFont
-
-from graphs.plot_generator import PlotWidget
-from stats.basic_stats_widget import StatsWidget
-from graphs.heat_map import HeatmapWidget
-from models.regression_models import RegressionModelWidget
-from data_loader import (
-    load_csv, init_column_roles, toggle_column_role,
-    extract_variable_roles
+    QMenuBar, QMenu, QFileDialog, QMessageBox,
+    QDockWidget, QTableView, QProgressDialog, QAbstractItemView,
+    QTabBar, QInputDialog
 )
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QActionGroup, QColor, QKeySequence
+import importlib.util
+import os
+import numpy as np
+
+from ui.table_model import DataFrameTableModel, PagedTableModel, RemoveButtonDelegate
+from ui.loader_thread import CsvLoaderThread, SourceLoaderThread
+from ui.dataset_store import DatasetStore
+from dataset import discard_results
+from data_quality import DataQualityIndex
+from file_follower import CsvFollower, FileReset
+from csv_cache import get_default_cache
+from utils.logger import get_logger, timed
+from utils.task_scheduler import TaskScheduler
+from utils.warmup import start_warmup
+from data_loader import available_engines
+from workspace import Workspace, frame_bytes
+
+ENGINE_LABELS = {"c": "Default (C)", "python": "Python", "pyarrow": "PyArrow (fast)"}
+# Delay after the window is first shown before dock modules are imported in the background
+WARMUP_DELAY_MS = 200
+# Choices for how often a followed file is checked for new rows
+FOLLOW_INTERVALS_MS = {"1 second": 1000, "2 seconds": 2000, "5 seconds": 5000, "10 seconds": 10_000,
+                       "30 seconds": 30_000}
+DEFAULT_FOLLOW_INTERVAL_MS = 2000
+FOLLOW_RESET_LABELS = {"reload": "Reload It", "stop": "Stop Following"}
+
+log = get_logger(__name__)
 
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.df = None
-        self.problematic_rows = []
-        self.column_roles = {}
+        # Panes share the store and follow its signals instead of holding frames
+        self.store = DatasetStore(parent=self)
+        self.store.reloaded.connect(self._on_reloaded)
+        self.store.rows_removed.connect(self._on_rows_removed)
+        self.store.rows_appended.connect(self._on_rows_appended)
+        self.store.roles_changed.connect(self._on_roles_changed)
+        self.problematic_rows = DataQualityIndex()
+        self._indexed_dtypes = None
+        # While the index is rebuilt in the background: row edits to replay on it
+        self._quality_edits = None
+        # (index, dtypes) of a tab being shown again, taken by _on_reloaded
+        self._restored_quality = None
         self.independent_vars = []
         self.dependent_vars = []
-        self.table_widget = QTableWidget()
-        
+        self.csv_engine = "pyarrow" if "pyarrow" in available_engines() else "c"
+        self.compact_on_load = True
+        self.loader_thread = None
+        self.load_progress = None
+        self.table_model = DataFrameTableModel()
+        self.paged_model = PagedTableModel()
+        self.tasks = TaskScheduler(self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.table_model)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.remove_delegate = RemoveButtonDelegate(self.table_view)
+        self.remove_delegate.removeRequested.connect(self.remove_row)
+        self._actions_column = None
+        self._warmup_started = False
+        # Follow mode: the file is polled on a timer and new rows appended
+        self.follower = None
+        self.follow_interval_ms = DEFAULT_FOLLOW_INTERVAL_MS
+        self.follow_reset_policy = "reload"
+        self._resume_follow = False
+        self.follow_timer = QTimer(self)
+        self.follow_timer.timeout.connect(self._poll_followed_file)
+        # Open files, one tab each; only the active one is in the store
+        self.workspace = Workspace()
+        self.active_entry = None
+        self._active_version = None
 
         self.setWindowTitle("Data Analysis App")
         self.setMinimumSize(800, 600)
@@ -33,8 +85,7 @@ class MainWindow(QMainWindow):
         self._create_menu_bar()
         self._create_main_layout()
 
-        
-        self.table_widget.horizontalHeader().sectionClicked.connect(self._toggle_column_role)
+        self.table_view.horizontalHeader().sectionClicked.connect(self._toggle_column_role)
 
     def _create_menu_bar(self):
         menubar = self.menuBar()
@@ -42,165 +93,769 @@ class MainWindow(QMainWindow):
         file_menu = menubar.addMenu("File")
         open_action = file_menu.addAction("Open Data File")
         open_action.triggered.connect(self.open_file)
+        # Checked without importing duckdb, which is only loaded on first use
+        if importlib.util.find_spec("duckdb") is not None:
+            open_large_action = file_menu.addAction("Open Large File (Out-of-Core)...")
+            open_large_action.setToolTip("Query the file on disk instead of loading it; the rows are read-only.")
+            open_large_action.triggered.connect(self.open_large_file)
+
+        engine_menu = file_menu.addMenu("CSV Parser Engine")
+        engine_group = QActionGroup(self)
+        for engine in available_engines():
+            engine_action = engine_menu.addAction(ENGINE_LABELS.get(engine, engine))
+            engine_action.setCheckable(True)
+            engine_action.setChecked(engine == self.csv_engine)
+            engine_action.triggered.connect(lambda _, e=engine: setattr(self, "csv_engine", e))
+            engine_group.addAction(engine_action)
+
+        compact_action = file_menu.addAction("Compact Columns After Loading")
+        compact_action.setCheckable(True)
+        compact_action.setChecked(self.compact_on_load)
+        compact_action.setToolTip("Store numbers in the smallest lossless type and repeated text as categories.")
+        compact_action.toggled.connect(lambda checked: setattr(self, "compact_on_load", checked))
+
+        file_menu.addSeparator()
+        self.follow_action = file_menu.addAction("Follow File")
+        self.follow_action.setCheckable(True)
+        self.follow_action.setToolTip("Append the rows other programs add to the open file.")
+        self.follow_action.toggled.connect(self.toggle_follow)
+
+        interval_menu = file_menu.addMenu("Follow Interval")
+        interval_group = QActionGroup(self)
+        for label, interval in FOLLOW_INTERVALS_MS.items():
+            interval_action = interval_menu.addAction(label)
+            interval_action.setCheckable(True)
+            interval_action.setChecked(interval == self.follow_interval_ms)
+            interval_action.triggered.connect(lambda _, ms=interval: self.set_follow_interval(ms))
+            interval_group.addAction(interval_action)
+
+        reset_menu = file_menu.addMenu("When the Followed File Is Truncated or Replaced")
+        reset_group = QActionGroup(self)
+        for policy, label in FOLLOW_RESET_LABELS.items():
+            reset_action = reset_menu.addAction(label)
+            reset_action.setCheckable(True)
+            reset_action.setChecked(policy == self.follow_reset_policy)
+            reset_action.triggered.connect(lambda _, p=policy: setattr(self, "follow_reset_policy", p))
+            reset_group.addAction(reset_action)
+        file_menu.addSeparator()
+
+        predict_action = file_menu.addAction("Score CSV File with Saved Model...")
+        predict_action.setToolTip("Streams the file through a model saved from the Regression pane or batch_cli.py.")
+        predict_action.triggered.connect(self.predict_with_saved_model)
+        file_menu.addSeparator()
+
+        budget_action = file_menu.addAction("Workspace Memory Budget...")
+        budget_action.setToolTip("Above this, the least recently used tabs are moved to disk until selected.")
+        budget_action.triggered.connect(self.set_workspace_budget)
+
+        clear_cache_action = file_menu.addAction("Clear CSV Cache")
+        clear_cache_action.triggered.connect(self.clear_csv_cache)
 
         exit_action = file_menu.addAction("Exit")
         exit_action.triggered.connect(self.close)
 
+        edit_menu = menubar.addMenu("Edit")
+        remove_selected_action = edit_menu.addAction("Remove Selected Rows")
+        remove_selected_action.setShortcut(QKeySequence.StandardKey.Delete)
+        remove_selected_action.triggered.connect(self.remove_selected_rows)
+        remove_problematic_action = edit_menu.addAction("Remove Problematic Rows")
+        remove_problematic_action.triggered.connect(self.remove_problematic_rows)
+
         view_menu = menubar.addMenu("View")
         plot_action = view_menu.addAction("Show Plot")
         plot_action.triggered.connect(self.show_plot_dock)
         stats_action = view_menu.addAction("Show Statistics")
         stats_action.triggered.connect(self.show_stats_dock)
+        file_stats_action = view_menu.addAction("Show Statistics for CSV File...")
+        file_stats_action.triggered.connect(self.show_file_stats_dock)
         heatmap_action = view_menu.addAction("Show Heat Map")
         heatmap_action.triggered.connect(self.show_heatmap_dock)
         regression_action = view_menu.addAction("Show Regression")
         regression_action.triggered.connect(self.show_regression_dock)
+        group_by_action = view_menu.addAction("Show Group By")
+        group_by_action.triggered.connect(self.show_group_by_dock)
+        view_menu.addSeparator()
+        memory_action = view_menu.addAction("Show Memory Report")
+        memory_action.triggered.connect(self.show_memory_dock)
+        performance_action = view_menu.addAction("Show Performance")
+        performance_action.triggered.connect(self.show_performance_dock)
 
         help_menu = menubar.addMenu("Help")
         about_action = help_menu.addAction("About")
         about_action.triggered.connect(self.show_about)
 
     def _create_main_layout(self):
+        self.tab_bar = QTabBar()
+        self.tab_bar.setTabsClosable(True)
+        self.tab_bar.setExpanding(False)
+        self.tab_bar.setDocumentMode(True)
+        self.tab_bar.currentChanged.connect(self._on_tab_changed)
+        self.tab_bar.tabCloseRequested.connect(self.close_tab)
+
         layout = QVBoxLayout()
-        layout.addWidget(self.table_widget)
+        layout.addWidget(self.tab_bar)
+        layout.addWidget(self.table_view)
         
         container = QWidget()
         container.setLayout(layout)
         self.setCentralWidget(container)
 
-    def _validate_dataframe(self):
-        if self.df is None:
-            return []
-        return self.df[self.df.isnull().any(axis=1) | self.df.duplicated()].index.tolist()
+    @property
+    def dataset(self):
+        return self.store.dataset
+
+    @property
+    def file_path(self):
+        return self.store.file_path
+
+    @property
+    def column_roles(self):
+        return self.store.column_roles
+
+    @property
+    def df(self):
+        # Consumers get the live rows; pending deletions are compacted here
+        return self.dataset.frame
+
+    @timed()
+    def _validate_dataframe(self, df=None):
+        return DataQualityIndex(self.df if df is None else df)
+
+    def _rebuild_quality_index(self):
+        """Hash every row again on the thread pool; rows are highlighted once it finishes."""
+        df = self.df
+        self.problematic_rows = DataQualityIndex()
+        self._indexed_dtypes = None
+        self.table_model.set_problematic_rows(self.problematic_rows)
+        if df is None or df.empty:
+            self.tasks.cancel("quality_index")
+            self._quality_edits = None
+            return
+        edits = self._quality_edits = []
+        self.tasks.submit(
+            "quality_index",
+            lambda token: self._validate_dataframe(df),
+            lambda index: self._on_quality_index(index, df.dtypes, edits),
+            lambda message: self._on_quality_index_failed(message, edits),
+        )
+
+    def _on_quality_index_failed(self, message, edits):
+        if edits is self._quality_edits:
+            self._quality_edits = None
+        log.warning("Could not index missing and duplicate rows: %s", message)
 
-    def _populate_table(self):
-        if self.df is None or self.df.empty:
-            return
-
-        self.table_widget.setRowCount(len(self.df))
-        self.table_widget.setColumnCount(len(self.df.columns) + 1)
-        self.table_widget.setHorizontalHeaderLabels(list(self.df.columns) + ["Actions"])
-
-        for row_idx, row in self.df.iterrows():
-            is_problematic = row_idx in self.problematic_rows
-            for col_idx, col in enumerate(self.df.columns):
-                value = row[col]
-                item = QTableWidgetItem(str(value))
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-
-                role = self.column_roles.get(col, "Unused")
-                font = QFont()
-                if role == "Independent":
-                    font.setBold(True)
-                    item.setForeground(QBrush(QColor("green")))
-                elif role == "Dependent":
-                    font.setItalic(True)
-                    item.setForeground(QBrush(QColor("darkred")))
-
-                if is_problematic:
-                    item.setBackground(QBrush(QColor("yellow")))
-
-                item.setFont(font)
-                self.table_widget.setItem(row_idx, col_idx, item)
-
-            # Add Remove button in the last column
-            if is_problematic:
-                remove_btn = QPushButton("Remove")
-                remove_btn.clicked.connect(lambda _, r=row_idx: self.remove_row(r))
-                self.table_widget.setCellWidget(row_idx, len(self.df.columns), remove_btn)
+    def _on_quality_index(self, index, dtypes, edits):
+        if edits is not self._quality_edits:
+            return
+        self._quality_edits = None
+        self.problematic_rows, self._indexed_dtypes = index, dtypes
+        # Rows removed or appended while the index was built
+        for kind, row_ids in edits:
+            if kind == "removed":
+                index.remove_rows(row_ids)
             else:
-                self.table_widget.setCellWidget(row_idx, len(self.df.columns), QWidget())
+                self._index_appended_rows(row_ids)
+                if self._quality_edits is not None:
+                    # A column was widened; that rebuild starts over
+                    return
+        self.table_model.set_problematic_rows(index)
+
+    @timed()
+    def _populate_table(self):
+        if self.store.source is not None:
+            if self._actions_column is not None:
+                self.table_view.setItemDelegateForColumn(self._actions_column, None)
+                self._actions_column = None
+            self.paged_model.set_source(self.store.source, self.column_roles)
+            self.table_view.setModel(self.paged_model)
+            return
+        self.paged_model.set_source(None)
+        self.table_view.setModel(self.table_model)
+
+        # An empty dataset (e.g. the last tab was closed) clears the table
+        self.table_model.set_dataset(self.dataset, self.column_roles, self.problematic_rows)
+        # The Actions column is painted by a delegate, not one widget per row
+        if self._actions_column is not None:
+            self.table_view.setItemDelegateForColumn(self._actions_column, None)
+        self._actions_column = len(self.dataset.columns)
+        self.table_view.setItemDelegateForColumn(self._actions_column, self.remove_delegate)
 
     def remove_row(self, row_idx):
-        if self.df is None or row_idx not in self.df.index:
+        if not 0 <= row_idx < len(self.dataset):
             return
-        self.df = self.df.drop(index=self.df.index[row_idx]).reset_index(drop=True)
-        self.problematic_rows = self._validate_dataframe()
-        self._populate_table()
-        self._update_regression_variables()
+        self.remove_rows(self.table_model.row_ids([row_idx]))
+
+    def remove_rows(self, row_ids):
+        if self.dataset.empty or not len(row_ids):
+            return
+        # Rows are tombstoned by id; only the affected view rows are updated
+        self.store.remove_rows(row_ids, self.table_model.remove_rows)
+
+    def _on_rows_removed(self, row_ids):
+        if self._quality_edits is not None:
+            self._quality_edits.append(("removed", row_ids))
+            return
+        self.problematic_rows.remove_rows(row_ids)
+
+    def _on_rows_appended(self, row_ids):
+        if self._quality_edits is not None:
+            self._quality_edits.append(("appended", row_ids))
+            return
+        self._index_appended_rows(row_ids)
+
+    def _index_appended_rows(self, row_ids):
+        df = self.df
+        if self._indexed_dtypes is not None and df.dtypes.equals(self._indexed_dtypes):
+            # Rows appended and then removed again are no longer in the frame
+            self.problematic_rows.add_rows(df.loc[df.index.intersection(row_ids)])
+        else:
+            # A column was widened, which changes the content hashes of its rows
+            self._rebuild_quality_index()
+
+    def _is_read_only(self) -> bool:
+        if self.store.source is None:
+            return False
+        QMessageBox.information(self, "Read-Only Data",
+                                "Rows of a file opened out-of-core cannot be removed; load it normally to edit it.")
+        return True
+
+    def remove_selected_rows(self):
+        if self._is_read_only():
+            return
+        selection = self.table_view.selectionModel().selection()
+        if selection.isEmpty():
+            return
+        view_rows = np.unique(np.concatenate([
+            np.arange(selection_range.top(), selection_range.bottom() + 1)
+            for selection_range in selection
+        ]))
+        self.table_view.clearSelection()
+        self.remove_rows(self.table_model.row_ids(view_rows))
+
+    def remove_problematic_rows(self):
+        if self._is_read_only():
+            return
+        if self._quality_edits is not None:
+            self.statusBar().showMessage("Still looking for missing and duplicate rows; try again in a moment.")
+            return
+        self.remove_rows(self.problematic_rows.problematic_rows())
 
     def _clean_data(self):
         if self.df is not None:
-            self.df = self.df.dropna().drop_duplicates().reset_index(drop=True)
-            self.problematic_rows = self._validate_dataframe()
-            self._populate_table()
-            self._update_regression_variables()
+            from cleaning import default_plan
+
+            # Only the ids of the dropped rows are needed; they are tombstoned
+            self.remove_rows(default_plan().run(self.df).dropped)
 
     def open_file(self):
+        if self.loader_thread is not None:
+            return
+
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Open CSV File", "", "CSV Files (*.csv);;All Files (*)"
         )
         if file_path:
-            df = load_csv(file_path)
-            if df is not None:
-                self.df = df
-                self.column_roles = init_column_roles(self.df.columns)
-                self.problematic_rows = self._validate_dataframe()
-                self._populate_table()
-                self._update_regression_variables()
+            self._start_loader(
+                CsvLoaderThread(file_path, self.csv_engine, compact=self.compact_on_load, parent=self),
+                "Loading CSV file...", self._on_csv_loaded,
+            )
+
+    def open_large_file(self):
+        if self.loader_thread is not None:
+            return
+
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Open Large CSV File", "", "CSV Files (*.csv);;All Files (*)"
+        )
+        if file_path:
+            self._start_loader(SourceLoaderThread(file_path, parent=self), "Indexing CSV file...",
+                               lambda source: self.open_dataset(source=source))
+
+    def _start_loader(self, thread, label, on_loaded):
+        self.load_progress = QProgressDialog(label, "Cancel", 0, 1000, self)
+        self.load_progress.setWindowTitle("Loading")
+        self.load_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.load_progress.setMinimumDuration(300)
+        self.load_progress.setAutoReset(False)
+
+        self.loader_thread = thread
+        self.loader_thread.progress.connect(self._on_load_progress)
+        self.loader_thread.loaded.connect(on_loaded)
+        self.loader_thread.failed.connect(self._on_load_failed)
+        self.loader_thread.finished.connect(self._on_loader_finished)
+        self.load_progress.canceled.connect(self.loader_thread.cancel)
+        self.loader_thread.start()
+
+    def _on_load_progress(self, bytes_read, total_bytes, rows_read):
+        dialog = self.load_progress
+        if dialog is None:
+            return
+        if rows_read:
+            dialog.setLabelText(f"Loaded {rows_read:,} rows...")
+        if total_bytes > 0:
+            # setValue() on a modal dialog processes events, so keep a local reference
+            dialog.setValue(int(1000 * bytes_read / total_bytes))
+
+    def _on_csv_loaded(self, df):
+        thread = self.loader_thread
+        if thread is None:
+            self.open_dataset(df)
+        else:
+            self.open_dataset(df, thread.file_path, thread.memory_report)
+
+    def _on_csv_reloaded(self, df):
+        # The active tab's file was read again; its old frame and spill file are dropped
+        entry, thread = self.active_entry, self.loader_thread
+        if entry is None:
+            self._on_csv_loaded(df)
+            return
+        entry.memory_report = thread.memory_report
+        report = thread.memory_report
+        entry.nbytes = frame_bytes(df) if report is None else int(report["bytes_after"].sum())
+        self.store.load(df, entry.file_path, entry.memory_report, close_previous=False)
+
+    def open_dataset(self, df=None, file_path: str = None, memory_report=None, source=None):
+        """Open a loaded frame or an out-of-core source in a new tab and show it."""
+        if source is not None:
+            file_path = source.file_path
+        name = os.path.basename(file_path) if file_path else "Untitled"
+        entry = self.workspace.add(name, df, source, file_path, memory_report)
+        # Signals are held back until the tab knows its entry
+        self.tab_bar.blockSignals(True)
+        index = self.tab_bar.addTab(name)
+        self.tab_bar.setTabData(index, entry.id)
+        self.tab_bar.setCurrentIndex(index)
+        self.tab_bar.blockSignals(False)
+        self._activate(entry, df)
+
+    def _entry_at(self, index):
+        return self.workspace.get(self.tab_bar.tabData(index)) if index >= 0 else None
+
+    def _on_tab_changed(self, index):
+        entry = self._entry_at(index)
+        self.tasks.cancel("workspace_restore")
+        if entry is None or entry is self.active_entry:
+            return
+        if entry.spilled:
+            # The current tab stays live (and editable) until the frame is back
+            self.statusBar().showMessage(f"Reading {entry.name} back from disk...")
+            self.tasks.submit(
+                "workspace_restore",
+                lambda token: self.workspace.restore(entry),
+                lambda df: self._activate(entry, df),
+                lambda message: self.statusBar().showMessage(f"Could not read {entry.name} back: {message}"),
+            )
+            return
+        self._activate(entry, self.workspace.restore(entry))
+
+    def _activate(self, entry, df):
+        if entry not in self.workspace.entries:
+            return
+        self._deactivate_current()
+        self.workspace.activate(entry)
+        self.active_entry = entry
+        # A tab shown before gets back its cached results and quality index instead of recomputing them
+        results, entry.results = entry.results, None
+        if entry.quality_index is not None:
+            self._restored_quality = (entry.quality_index, entry.indexed_dtypes)
+        entry.quality_index = entry.indexed_dtypes = None
+        if entry.source is not None:
+            self.store.load_source(entry.source, entry.column_roles, close_previous=False, results=results)
+        else:
+            self.store.load(df, entry.file_path, entry.memory_report, entry.column_roles, close_previous=False,
+                            results=results)
+        self._active_version = self.dataset.version
+        self._spill_over_budget()
+        self._update_tabs()
+
+    def _deactivate_current(self):
+        entry = self.active_entry
+        if entry is None:
+            return
+        entry.column_roles = self.store.column_roles
+        entry.results = self.dataset.results_key()
+        if self._quality_edits is None:
+            # An index still being built is not kept; the tab rebuilds it when shown again
+            entry.quality_index, entry.indexed_dtypes = self.problematic_rows, self._indexed_dtypes
+        frame, nbytes = None, None
+        changed = self.dataset.version != self._active_version
+        if entry.source is None:
+            frame = self.dataset.frame
+            if changed and frame is not None:
+                nbytes = self.dataset.memoize("memory_usage", (), lambda: frame_bytes(frame))
+        self.workspace.deactivate(entry, frame, changed, nbytes)
+        self.active_entry = None
+
+    def _spill_over_budget(self):
+        for entry in self.workspace.to_spill():
+            self.tasks.submit(
+                ("workspace_spill", entry.id),
+                lambda token, e=entry: self.workspace.spill(e),
+                lambda spilled: self._update_tabs(),
+                lambda message, e=entry: log.warning("Could not spill %s: %s", e.name, message),
+            )
+
+    def _update_tabs(self):
+        for index in range(self.tab_bar.count()):
+            entry = self._entry_at(index)
+            if entry is None:
+                continue
+            if entry.source is not None:
+                state = "Opened out-of-core"
+            elif entry.spilled:
+                state = "Moved to disk to save memory; read back when selected"
             else:
-                QMessageBox.warning(self, "Error", "Failed to load the CSV file.")
+                state = f"{entry.nbytes / 1e6:,.0f} MB in memory"
+            self.tab_bar.setTabToolTip(index, f"{entry.file_path or entry.name}\n{state}")
+            self.tab_bar.setTabTextColor(index, QColor("gray") if entry.spilled else QColor())
 
-    def _toggle_column_role(self, logicalIndex):
-        if self.df is None:
+    def close_tab(self, index):
+        entry = self._entry_at(index)
+        if entry is None:
             return
-        col_name = self.df.columns[logicalIndex]
-        toggle_column_role(col_name, self.column_roles)
+        self.tasks.cancel(("workspace_spill", entry.id))
+        results = entry.results
+        if entry is self.active_entry:
+            # Dropped rather than put back into the workspace
+            results = self.dataset.results_key()
+            self.active_entry = None
+            self.store.load(None, close_previous=False)
+        if results is not None:
+            discard_results(results[0])
+        self.tab_bar.removeTab(index)
+        self.workspace.remove(entry)
+        self._update_tabs()
+
+    def set_workspace_budget(self):
+        budget_mb, ok = QInputDialog.getInt(
+            self, "Workspace Memory Budget", "Keep open files in memory up to (MB):",
+            self.workspace.max_bytes >> 20, 64, 1 << 24, 256,
+        )
+        if ok:
+            self.workspace.max_bytes = budget_mb << 20
+            self._spill_over_budget()
+
+    def _on_reloaded(self):
+        restored, self._restored_quality = self._restored_quality, None
+        if restored is not None:
+            self.tasks.cancel("quality_index")
+            self._quality_edits = None
+            self.problematic_rows, self._indexed_dtypes = restored
+        else:
+            self._rebuild_quality_index()
         self._populate_table()
-        self._update_regression_variables()
+        if self._resume_follow:
+            # Reloaded after the followed file was truncated or replaced
+            self._resume_follow = False
+            self.start_following()
+        elif self.follower is not None or self.follow_action.isChecked():
+            self.follow_action.setChecked(False)
+        source = self.store.source
+        if source is None:
+            self.tasks.cancel("quality_summary")
+            self.statusBar().clearMessage()
+            return
+        # Counting duplicates reads the whole file, so it runs in the background
+        self.statusBar().showMessage(f"{os.path.basename(source.file_path)}: {source.row_count:,} rows (out-of-core)")
+        self.tasks.submit("quality_summary", lambda token: source.quality_summary(), self._show_quality_summary)
+
+    def _show_quality_summary(self, summary):
+        self.statusBar().showMessage(
+            f"{os.path.basename(self.file_path)}: {summary['rows']:,} rows (out-of-core), "
+            f"{summary['rows_with_missing']:,} with missing values, {summary['duplicate_rows']:,} duplicates"
+        )
 
-    def _update_regression_variables(self):
-        self.independent_vars, self.dependent_vars = extract_variable_roles(self.column_roles)
-        print("Independent Variables:", self.independent_vars)
-        print("Dependent Variables:", self.dependent_vars)
+    def _on_load_failed(self, message):
+        QMessageBox.warning(self, "Error", f"Failed to load the CSV file.\n{message}")
+
+    def _on_loader_finished(self):
+        if self._resume_follow:
+            # The reload of a followed file failed or was cancelled
+            self._resume_follow = False
+            self.follow_action.setChecked(False)
+        if self.load_progress is not None:
+            self.load_progress.reset()
+            self.load_progress.deleteLater()
+            self.load_progress = None
+        self.loader_thread.deleteLater()
+        self.loader_thread = None
+
+    def toggle_follow(self, enabled):
+        if enabled:
+            self.start_following()
+        else:
+            self.stop_following()
+
+    def set_follow_interval(self, interval_ms):
+        self.follow_interval_ms = interval_ms
+        if self.follow_timer.isActive():
+            self.follow_timer.setInterval(interval_ms)
+
+    def start_following(self):
+        if self.store.source is not None or self.dataset.empty or not self.file_path:
+            QMessageBox.information(self, "Follow File",
+                                    "Load a CSV file first; files opened out-of-core cannot be followed.")
+            self.follow_action.setChecked(False)
+            return
+        # Finding the read offset scans the rows already loaded, off the GUI thread
+        file_path, n_rows = self.file_path, self.dataset.next_row_id
+        self.tasks.submit(
+            "follow",
+            lambda token: CsvFollower.after_rows(file_path, n_rows),
+            self._on_follow_started,
+            self._on_follow_failed,
+        )
+
+    def _on_follow_started(self, follower):
+        self.follower = follower
+        self.follow_timer.start(self.follow_interval_ms)
+        self.statusBar().showMessage(f"Following {os.path.basename(follower.file_path)}")
+
+    def stop_following(self):
+        self.follow_timer.stop()
+        self.tasks.cancel("follow")
+        if self.follower is not None:
+            self.follower = None
+            self.statusBar().clearMessage()
+        if self.follow_action.isChecked():
+            self.follow_action.setChecked(False)
+
+    def _poll_followed_file(self):
+        follower = self.follower
+        # A slow poll is not overlapped by the next tick
+        if follower is None or self.tasks.is_busy("follow"):
+            return
+
+        def poll(token):
+            try:
+                return follower.poll(), None
+            except FileReset as e:
+                return None, str(e)
+
+        self.tasks.submit("follow", poll, lambda result: self._on_follow_polled(follower, *result),
+                          self._on_follow_failed)
+
+    def _on_follow_polled(self, follower, rows, reset):
+        if follower is not self.follower:
+            return
+        if reset is not None:
+            self._on_followed_file_reset(reset)
+            return
+        if rows is None:
+            return
+        # Panes extend their cached results with just these rows
+        self.store.append_rows(rows, self.table_model.append_rows)
+        self.statusBar().showMessage(
+            f"Following {os.path.basename(follower.file_path)}: {len(self.dataset):,} rows, "
+            f"{len(rows):,} new"
+        )
+
+    def _on_followed_file_reset(self, message):
+        file_path = self.file_path
+        if self.follow_reset_policy == "reload" and self.loader_thread is None and os.path.exists(file_path):
+            self.follow_timer.stop()
+            self.follower = None
+            self._resume_follow = True
+            self.statusBar().showMessage(f"{message} Reloading it.")
+            self._start_loader(
+                CsvLoaderThread(file_path, self.csv_engine, compact=self.compact_on_load, parent=self),
+                "Reloading CSV file...", self._on_csv_reloaded,
+            )
+            return
+        self.stop_following()
+        self.statusBar().showMessage(f"{message} Stopped following it.")
+
+    def _on_follow_failed(self, message):
+        self.stop_following()
+        QMessageBox.warning(self, "Follow File", f"Stopped following the file.\n{message}")
+
+    def clear_csv_cache(self):
+        get_default_cache().clear()
+        QMessageBox.information(self, "CSV Cache", "The CSV cache has been cleared.")
+
+    def _toggle_column_role(self, logicalIndex):
+        if not self.store.has_data or logicalIndex >= len(self.store.columns):
+            return
+        self.store.toggle_role(self.store.columns[logicalIndex])
+
+    def _on_roles_changed(self, independent_vars, dependent_vars):
+        self.independent_vars, self.dependent_vars = independent_vars, dependent_vars
+        self.table_model.set_column_roles(self.column_roles)
+        self.paged_model.set_column_roles(self.column_roles)
+        log.debug("Variable roles updated",
+                  extra={"fields": {"independent": self.independent_vars, "dependent": self.dependent_vars}})
+
+    def closeEvent(self, event):
+        self.stop_following()
+        # Deletes the spill files and out-of-core databases from the temporary directory
+        self.workspace.close()
+        super().closeEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # The dock modules are imported on first use; after the window has
+        # painted, import them in the background so the first dock opens fast
+        if not self._warmup_started:
+            self._warmup_started = True
+            QTimer.singleShot(WARMUP_DELAY_MS, start_warmup)
+
+    def predict_with_saved_model(self):
+        from models.regression_models import MODEL_FILE_FILTER, ask_prediction_paths
+        from models.saved_model import load_model, predict_csv
+
+        model_path, _ = QFileDialog.getOpenFileName(self, "Open Saved Model", "", MODEL_FILE_FILTER)
+        if not model_path:
+            return
+        try:
+            model = load_model(model_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not open the model: {e}")
+            return
+        input_path, output_path = ask_prediction_paths(self, os.path.basename(model_path))
+        if input_path is None:
+            return
+
+        name = os.path.basename(input_path)
+        self.statusBar().showMessage(f"Scoring {name} with {model.describe()}...")
+        self.tasks.submit(
+            "prediction",
+            lambda token: predict_csv(model, input_path, output_path, engine=self.csv_engine,
+                                      progress=token.report, is_cancelled=lambda: token.cancelled),
+            lambda report: self.statusBar().showMessage(f"{name}: {report}; written to {output_path}"),
+            lambda message: self.statusBar().showMessage(f"Could not score {name}: {message}"),
+            lambda bytes_read, total_bytes, rows_read: self.statusBar().showMessage(
+                f"Scoring {name}... {rows_read:,} rows"),
+        )
 
     def show_about(self):
         QMessageBox.about(self, "About", "This is a PyQt6-based Data Analysis App.")
 
     def show_plot_dock(self):
-        if self.df is None or self.df.empty:
+        if not self.store.has_data:
             QMessageBox.warning(self, "No Data", "Please load a dataset first.")
             return
 
+        from graphs.plot_generator import PlotWidget
+
         dock = QDockWidget("Data Plot", self)
         dock.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
 
-        plot_widget = PlotWidget(self.df)
+        plot_widget = PlotWidget(self.store)
         dock.setWidget(plot_widget)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, dock)
 
     def show_stats_dock(self):
-        if self.df is None or self.df.empty:
+        if not self.store.has_data:
             QMessageBox.warning(self, "No Data", "Please load a dataset first.")
             return
 
+        from stats.basic_stats_widget import StatsWidget
+
         dock = QDockWidget("Basic Statistics", self)
         dock.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
 
-        stats_widget = StatsWidget(self.df)
+        stats_widget = StatsWidget(self.store)
+        dock.setWidget(stats_widget)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, dock)
+
+    def show_file_stats_dock(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Statistics for CSV File", "", "CSV Files (*.csv);;All Files (*)"
+        )
+        if not file_path:
+            return
+
+        from stats.basic_stats_widget import StatsWidget
+
+        dock = QDockWidget("Basic Statistics (streaming)", self)
+        dock.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
+
+        stats_widget = StatsWidget(file_path=file_path, engine=self.csv_engine)
         dock.setWidget(stats_widget)
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, dock)
 
     def show_heatmap_dock(self):
-        if self.df is None or self.df.empty:
+        if not self.store.has_data:
             QMessageBox.warning(self, "No Data", "Please load a dataset first.")
             return
 
+        from graphs.heat_map import HeatmapWidget
+
         dock = QDockWidget("Heatmap", self)
         dock.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
 
-        heatmap_widget = HeatmapWidget(self.df)
+        heatmap_widget = HeatmapWidget(self.store)
         dock.setWidget(heatmap_widget)
         self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
 
     def show_regression_dock(self):
-        if self.df is None or self.df.empty:
+        if not self.store.has_data:
             QMessageBox.warning(self, "No Data", "Please load a dataset first.")
             return
 
+        from models.regression_models import RegressionModelWidget
+
         dock = QDockWidget("Regression Model", self)
         dock.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
 
-        regression_widget = RegressionModelWidget(self.df, self.independent_vars, self.dependent_vars)
+        regression_widget = RegressionModelWidget(
+            self.store, self.independent_vars, self.dependent_vars,
+            file_path=self.file_path, engine=self.csv_engine
+        )
         dock.setWidget(regression_widget)
         self.addDockWidget(Qt.DockWidgetArea.TopDockWidgetArea, dock)
+
+    def show_group_by_dock(self):
+        if not self.store.has_data:
+            QMessageBox.warning(self, "No Data", "Please load a dataset first.")
+            return
+
+        from stats.group_by_widget import GroupByWidget
+
+        dock = QDockWidget("Group By", self)
+        dock.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
+
+        group_by_widget = GroupByWidget(self.store)
+        group_by_widget.show_result.connect(self._show_group_result)
+        dock.setWidget(group_by_widget)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
+
+    def _show_group_result(self, kind, frame):
+        # The result is a snapshot; its pane does not follow later edits
+        if kind == "heatmap":
+            from graphs.heat_map import HeatmapWidget
+            dock, widget = QDockWidget("Group By Heatmap", self), HeatmapWidget(frame)
+        else:
+            from graphs.plot_generator import PlotWidget
+            dock, widget = QDockWidget("Group By Plot", self), PlotWidget(frame)
+        dock.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
+        dock.setWidget(widget)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, dock)
+
+    def show_memory_dock(self):
+        if not self.store.has_data:
+            QMessageBox.warning(self, "No Data", "Please load a dataset first.")
+            return
+
+        if self.store.source is not None:
+            QMessageBox.information(self, "Memory Report", "A file opened out-of-core is not held in memory.")
+            return
+
+        from ui.memory_report_dock import MemoryReportWidget
+
+        dock = QDockWidget("Memory Report", self)
+        dock.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
+
+        memory_widget = MemoryReportWidget(self.store)
+        dock.setWidget(memory_widget)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, dock)
+
+    def show_performance_dock(self):
+        from ui.performance_dock import PerformanceWidget
+
+        dock = QDockWidget("Performance", self)
+        dock.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
+
+        performance_widget = PerformanceWidget()
+        dock.setWidget(performance_widget)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
@@ -0,0 +1,72 @@
+from PyQt6.QtWidgets import QLabel, QTableWidget, QVBoxLayout, QWidget
+
+from data_compaction import memory_usage_report
+from ui.dataset_store import as_store
+from ui.table_model import table_item
+
+REPORT_COLUMNS = ["Column", "Type before", "Type after", "MB before", "MB after", "Saved"]
+
+
+class MemoryReportWidget(QWidget):
+    """Per-column memory of the loaded frame, before and after load-time compaction."""
+
+    def __init__(self, data):
+        super().__init__()
+        self.store = as_store(data, parent=self)
+
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        self.layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, len(REPORT_COLUMNS))
+        self.table.setHorizontalHeaderLabels(REPORT_COLUMNS)
+        self.table.setSortingEnabled(True)
+        self.layout.addWidget(self.table)
+
+        self.store.reloaded.connect(self.refresh)
+        self.store.data_changed.connect(self._update_summary)
+        self.refresh()
+
+    def _report(self):
+        if self.store.memory_report is not None:
+            return self.store.memory_report
+        # Not compacted on load: show what the frame uses now
+        frame = self.store.dataset.frame
+        return self.store.dataset.memoize("memory_usage_report", (), lambda: memory_usage_report(frame))
+
+    def refresh(self):
+        report = self._report() if not self.store.dataset.empty else None
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(0 if report is None else len(report))
+        if report is not None:
+            for row, (column, entry) in enumerate(report.iterrows()):
+                saved = entry["saved"]
+                values = [
+                    str(column), entry["dtype_before"], entry["dtype_after"],
+                    round(entry["bytes_before"] / 1e6, 2), round(entry["bytes_after"] / 1e6, 2),
+                    "-" if saved != saved else f"{saved:.0%}",
+                ]
+                for col, value in enumerate(values):
+                    self.table.setItem(row, col, table_item(value))
+        self.table.setSortingEnabled(True)
+        self._update_summary()
+
+    def _update_summary(self):
+        dataset = self.store.dataset
+        if dataset.empty:
+            self.summary_label.setText("No data loaded.")
+            return
+        report = self._report()
+        before, after = report["bytes_before"].sum(), report["bytes_after"].sum()
+        frame = dataset.frame
+        current = dataset.memoize("memory_usage", (), lambda: int(frame.memory_usage(deep=True).sum()))
+        text = f"{len(dataset):,} rows now use {current / 1e6:,.1f} MB."
+        if self.store.memory_report is not None:
+            text = (f"Compacted on load from {before / 1e6:,.1f} MB to {after / 1e6:,.1f} MB "
+                    f"({1 - after / before:.0%} saved). " + text) if before else text
+        else:
+            text += " Not compacted on load (File > Compact Columns After Loading)."
+        self.summary_label.setText(text)
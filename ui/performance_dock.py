@@ -0,0 +1,137 @@
+import time
+import tracemalloc
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import (
+    QApplication, QCheckBox, QFileDialog, QHBoxLayout, QLabel, QMessageBox, QPushButton,
+    QTableWidget, QTabWidget, QVBoxLayout, QWidget
+)
+from ui.table_model import table_item
+from utils.logger import (
+    disable_allocation_tracking, enable_allocation_tracking, format_report,
+    get_profiler, get_recorder, rss_bytes
+)
+
+REFRESH_MS = 500
+SPAN_COLUMNS = ["Time", "Span", "ms", "Memory MB", "Thread", "Details"]
+TOTAL_COLUMNS = ["Span", "Calls", "Total ms", "Max ms"]
+
+
+class PerformanceWidget(QWidget):
+    """Recent timing spans, per-stage totals and the profiling switches."""
+
+    def __init__(self):
+        super().__init__()
+        self.recorder = get_recorder()
+        self.profiler = get_profiler()
+        self._seen = None
+
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        self.tabs = QTabWidget()
+        self.spans_table = QTableWidget(0, len(SPAN_COLUMNS))
+        self.spans_table.setHorizontalHeaderLabels(SPAN_COLUMNS)
+        self.spans_table.horizontalHeader().setStretchLastSection(True)
+        self.totals_table = QTableWidget(0, len(TOTAL_COLUMNS))
+        self.totals_table.setHorizontalHeaderLabels(TOTAL_COLUMNS)
+        self.totals_table.setSortingEnabled(True)
+        self.tabs.addTab(self.spans_table, "Recent")
+        self.tabs.addTab(self.totals_table, "Totals")
+        self.layout.addWidget(self.tabs)
+
+        options_layout = QHBoxLayout()
+        self.allocations_checkbox = QCheckBox("Track allocations")
+        self.allocations_checkbox.setToolTip("Record the Python memory each span allocates (slows allocation-heavy code).")
+        self.allocations_checkbox.setChecked(tracemalloc.is_tracing())
+        self.allocations_checkbox.toggled.connect(self._toggle_allocations)
+        self.profile_checkbox = QCheckBox("Profile (cProfile)")
+        self.profile_checkbox.setChecked(self.profiler.enabled)
+        self.profile_checkbox.toggled.connect(self._toggle_profiling)
+        save_profile_button = QPushButton("Save Profile...")
+        save_profile_button.clicked.connect(self.save_profile)
+        options_layout.addWidget(self.allocations_checkbox)
+        options_layout.addWidget(self.profile_checkbox)
+        options_layout.addWidget(save_profile_button)
+        self.layout.addLayout(options_layout)
+
+        button_layout = QHBoxLayout()
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.clear)
+        copy_button = QPushButton("Copy Report")
+        copy_button.clicked.connect(self.copy_report)
+        self.memory_label = QLabel()
+        button_layout.addWidget(clear_button)
+        button_layout.addWidget(copy_button)
+        button_layout.addStretch()
+        button_layout.addWidget(self.memory_label)
+        self.layout.addLayout(button_layout)
+
+        # Spans finish on worker threads; the history is polled on the GUI thread
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh()
+
+    def refresh(self):
+        rss = rss_bytes()
+        self.memory_label.setText("" if rss is None else f"Process memory: {rss / 1e6:,.0f} MB")
+        if self.recorder.count == self._seen:
+            return
+        self._seen = self.recorder.count
+
+        records = self.recorder.records()[::-1]
+        self.spans_table.setRowCount(len(records))
+        for row, record in enumerate(records):
+            memory = record.allocated if record.allocated is not None else record.rss_delta
+            details = " ".join(f"{key}={value}" for key, value in record.fields.items())
+            if record.error:
+                details += f" error={record.error}"
+            values = [
+                time.strftime("%H:%M:%S", time.localtime(record.start)),
+                "  " * record.depth + record.name,
+                round(record.seconds * 1000, 1),
+                "-" if memory is None else round(memory / 1e6, 1),
+                record.thread,
+                details,
+            ]
+            for col, value in enumerate(values):
+                self.spans_table.setItem(row, col, table_item(value))
+
+        totals = self.recorder.summary()
+        self.totals_table.setSortingEnabled(False)
+        self.totals_table.setRowCount(len(totals))
+        for row, (name, entry) in enumerate(totals.items()):
+            values = [name, entry["calls"], round(entry["seconds"] * 1000, 1), round(entry["max_seconds"] * 1000, 1)]
+            for col, value in enumerate(values):
+                self.totals_table.setItem(row, col, table_item(value))
+        self.totals_table.setSortingEnabled(True)
+
+    def clear(self):
+        self.recorder.clear()
+        self._seen = None
+        self.refresh()
+
+    def copy_report(self):
+        QApplication.clipboard().setText(format_report())
+
+    def _toggle_allocations(self, enabled):
+        if enabled:
+            enable_allocation_tracking()
+        else:
+            disable_allocation_tracking()
+
+    def _toggle_profiling(self, enabled):
+        if enabled:
+            self.profiler.start()
+        else:
+            self.profiler.stop()
+
+    def save_profile(self):
+        if self.profiler.stats is None:
+            QMessageBox.information(self, "Profile", "Nothing profiled yet: enable profiling and run a task.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save Profile", "profile.prof", "Profile (*.prof)")
+        if path:
+            self.profiler.dump(path)
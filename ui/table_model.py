@@ -0,0 +1,318 @@
+from collections import OrderedDict
+
+import pandas as pd
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt6.QtGui import QColor, QBrush, QFont
+from PyQt6.QtWidgets import (
+    QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton, QTableWidgetItem
+)
+
+from data_quality import DataQualityIndex
+from dataset import Dataset, as_dataset, contiguous_ranges
+
+# Custom role used by the delegate to know whether a row gets a Remove button
+PROBLEMATIC_ROLE = int(Qt.ItemDataRole.UserRole) + 1
+
+ACTIONS_HEADER = "Actions"
+
+# Above this many separate row ranges a removal resets the model instead of
+# emitting one rowsRemoved signal per range
+MAX_REMOVE_RANGES = 64
+
+# Rows fetched per query by the paged model, and pages kept in memory
+PAGE_ROWS = 1000
+MAX_CACHED_PAGES = 20
+
+
+def _role_styles():
+    """Fonts and brushes per column role, and the problematic-row background."""
+    bold = QFont()
+    bold.setBold(True)
+    italic = QFont()
+    italic.setItalic(True)
+    underline = QFont()
+    underline.setUnderline(True)
+    fonts = {"Independent": bold, "Dependent": italic, "Group By": underline}
+    brushes = {
+        "Independent": QBrush(QColor("green")),
+        "Dependent": QBrush(QColor("darkred")),
+        "Group By": QBrush(QColor("darkblue")),
+    }
+    return fonts, brushes, QBrush(QColor("yellow"))
+
+
+def table_item(value) -> QTableWidgetItem:
+    """Item for a report table; numbers are stored as data so columns sort numerically."""
+    item = QTableWidgetItem()
+    if isinstance(value, (int, float)):
+        item.setData(Qt.ItemDataRole.DisplayRole, value)
+    else:
+        item.setText(value)
+    return item
+
+
+class DataFrameTableModel(QAbstractTableModel):
+    """
+    Table model that reads cells lazily from a pandas DataFrame.
+
+    Nothing is materialized per cell: values, role-based fonts/colors and
+    problematic-row highlighting are produced in data(), so only the cells
+    the view actually paints cost anything. The frame is held in a Dataset so
+    rows can be removed through tombstones and rowsRemoved signals.
+    """
+
+    def __init__(self, data=None, column_roles: dict = None,
+                 problematic_rows=None, show_actions: bool = True, parent=None):
+        super().__init__(parent)
+        self.show_actions = show_actions
+
+        self._role_fonts, self._role_brushes, self._problem_brush = _role_styles()
+
+        self._dataset = Dataset()
+        self._columns = []
+        self._column_roles = {}
+        self._problematic = set()
+        self._set_state(data, column_roles, problematic_rows)
+
+    def _set_state(self, data, column_roles, problematic_rows):
+        self._dataset = as_dataset(data)
+        self._columns = list(self._dataset.columns)
+        self._column_roles = column_roles if column_roles is not None else {}
+        self._problematic = self._as_lookup(problematic_rows)
+
+    @staticmethod
+    def _as_lookup(problematic_rows):
+        if problematic_rows is None:
+            return set()
+        if isinstance(problematic_rows, (set, frozenset, DataQualityIndex)):
+            return problematic_rows
+        return set(problematic_rows)
+
+    def set_dataset(self, data, column_roles: dict = None, problematic_rows=None):
+        self.beginResetModel()
+        self._set_state(data, column_roles, problematic_rows)
+        self.endResetModel()
+
+    def remove_rows(self, row_ids):
+        """Remove rows by id, signalling only the affected view rows."""
+        view_rows = self._dataset.view_rows(row_ids)
+        ranges = contiguous_ranges(view_rows)
+        if len(ranges) > MAX_REMOVE_RANGES:
+            self.beginResetModel()
+            self._dataset.remove_rows(row_ids)
+            self.endResetModel()
+        else:
+            for first, last in reversed(ranges):
+                self.beginRemoveRows(QModelIndex(), first, last)
+                self._dataset.remove_view_rows(first, last)
+                self.endRemoveRows()
+        self._dataset.maybe_compact()
+        return view_rows
+
+    def append_rows(self, df: pd.DataFrame) -> pd.Index:
+        """Append rows to the dataset, signalling only the inserted view rows."""
+        first = len(self._dataset)
+        if first == 0:
+            # The columns only show while there are rows
+            self.beginResetModel()
+            row_ids = self._dataset.append(df)
+            self.endResetModel()
+            return row_ids
+        self.beginInsertRows(QModelIndex(), first, first + len(df) - 1)
+        row_ids = self._dataset.append(df)
+        self.endInsertRows()
+        return row_ids
+
+    def set_column_roles(self, column_roles: dict):
+        self._column_roles = column_roles
+        self._emit_all_changed()
+
+    def set_problematic_rows(self, problematic_rows):
+        self._problematic = self._as_lookup(problematic_rows)
+        self._emit_all_changed()
+
+    def _emit_all_changed(self):
+        # The view only repaints what is visible, so this stays cheap
+        if self.rowCount() and self.columnCount():
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(self.rowCount() - 1, self.columnCount() - 1)
+            )
+
+    def dataset(self) -> Dataset:
+        return self._dataset
+
+    def row_ids(self, view_rows) -> pd.Index:
+        return self._dataset.row_ids(view_rows)
+
+    def is_actions_column(self, column: int) -> bool:
+        return self.show_actions and column == len(self._columns)
+
+    def is_problematic(self, row: int) -> bool:
+        return self._dataset.row_id(row) in self._problematic
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._dataset)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._dataset.empty:
+            return 0
+        return len(self._columns) + (1 if self.show_actions else 0)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, column = index.row(), index.column()
+
+        if role == PROBLEMATIC_ROLE:
+            return self.is_problematic(row)
+
+        if self.is_actions_column(column):
+            if role == Qt.ItemDataRole.DisplayRole:
+                return "Remove" if self.is_problematic(row) else None
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(self._dataset.value(row, column))
+        if role == Qt.ItemDataRole.FontRole:
+            return self._role_fonts.get(self._column_roles.get(self._columns[column], "Unused"))
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self._role_brushes.get(self._column_roles.get(self._columns[column], "Unused"))
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self._problem_brush if self.is_problematic(row) else None
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            if section < len(self._columns):
+                return str(self._columns[section])
+            return ACTIONS_HEADER
+        return str(section + 1)
+
+
+class PagedTableModel(QAbstractTableModel):
+    """
+    Read-only table over an out-of-core source, fetched PAGE_ROWS rows at a time.
+
+    A page is queried when the view first paints one of its cells and the
+    MAX_CACHED_PAGES most recently used pages are kept, so scrolling through
+    a file larger than memory holds a few thousand rows at most. Rows with a
+    missing cell are highlighted; duplicates can only be found over the whole
+    file, so they are counted (DuckDBSource.quality_summary) but not marked.
+    """
+
+    def __init__(self, source=None, column_roles: dict = None, parent=None):
+        super().__init__(parent)
+        self._role_fonts, self._role_brushes, self._problem_brush = _role_styles()
+        self._source = None
+        self._columns = []
+        self._column_roles = {}
+        self._pages = OrderedDict()
+        self._set_state(source, column_roles)
+
+    def _set_state(self, source, column_roles):
+        self._source = source
+        self._columns = list(source.columns) if source is not None else []
+        self._column_roles = column_roles if column_roles is not None else {}
+        self._pages.clear()
+
+    def set_source(self, source, column_roles: dict = None):
+        self.beginResetModel()
+        self._set_state(source, column_roles)
+        self.endResetModel()
+
+    def set_column_roles(self, column_roles: dict):
+        self._column_roles = column_roles
+        if self.rowCount() and self.columnCount():
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+    def _page(self, number: int):
+        page = self._pages.get(number)
+        if page is None:
+            frame = self._source.page(number * PAGE_ROWS, PAGE_ROWS)
+            page = (frame, frame.isna().any(axis=1).to_numpy())
+            self._pages[number] = page
+            if len(self._pages) > MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page
+
+    def is_problematic(self, row: int) -> bool:
+        _, missing = self._page(row // PAGE_ROWS)
+        return bool(missing[row % PAGE_ROWS])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._source is None:
+            return 0
+        return self._source.row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._columns)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, column = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            frame, _ = self._page(row // PAGE_ROWS)
+            return str(frame.iat[row % PAGE_ROWS, column])
+        if role == Qt.ItemDataRole.FontRole:
+            return self._role_fonts.get(self._column_roles.get(self._columns[column], "Unused"))
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self._role_brushes.get(self._column_roles.get(self._columns[column], "Unused"))
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self._problem_brush if self.is_problematic(row) else None
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return str(self._columns[section]) if section < len(self._columns) else None
+        return str(section + 1)
+
+
+class RemoveButtonDelegate(QStyledItemDelegate):
+    """Paints a Remove button for problematic rows instead of a real widget per row."""
+
+    removeRequested = pyqtSignal(int)
+
+    def paint(self, painter, option, index):
+        if not index.data(PROBLEMATIC_ROLE):
+            return
+
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = "Remove"
+        button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and index.data(PROBLEMATIC_ROLE)
+                and option.rect.contains(event.position().toPoint())):
+            self.removeRequested.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
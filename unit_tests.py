@@ -1,22 +1,46 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
 import unittest
+import weakref
+import numpy as np
 import pandas as pd
 
-def suggest_data_cleaning(df: pd.DataFrame) -> str:
-    messages = []
-    missing_count = df.isnull().sum().sum()
-    if missing_count > 0:
-        messages.append(f"Found {missing_count} missing values.")
-    duplicate_count = df.duplicated().sum()
-    if duplicate_count > 0:
-        messages.append(f"Found {duplicate_count} duplicate rows.")
-    return "\n".join(messages) if messages else "No cleaning needed."
-
-def clean_data(df: pd.DataFrame, drop_missing=True, drop_duplicates=True) -> pd.DataFrame:
-    if drop_missing:
-        df = df.dropna()
-    if drop_duplicates:
-        df = df.drop_duplicates()
-    return df
+import csv_cache
+from csv_cache import CsvCache
+from data_compaction import compact_dataframe, memory_usage_report
+from data_quality import DataQualityIndex
+from dataset import Dataset, contiguous_ranges
+from utils.result_cache import ResultCache
+from utils.task_scheduler import TaskScheduler
+from ui.dataset_store import DatasetStore
+from utils import logger
+from models.sufficient_stats import (
+    SufficientStatistics, dataset_statistics, fit_csv, fit_sufficient, frame_statistics
+)
+from models.model_selection import BudgetExceeded, cross_validate
+from models.saved_model import load_model, predict_csv, save_model
+import batch_cli
+import query_source
+import startup_check
+from benchmarks.compare import compare
+from benchmarks.datasets import make_dataset, parse_rows
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from PyQt6.QtCore import QCoreApplication
+from graphs.render import SeriesIndex, aggregate_bars, bin_matrix, heatmap_grid, lttb, minmax_decimate
+from stats.statistics import get_basic_statistics
+from stats.streaming import StreamingStats
+from data_loader import (
+    LoadCancelled, available_engines, clean_data, iter_csv_chunks, load_dataframe, read_csv_chunked,
+    suggest_data_cleaning
+)
+from cleaning import CleaningPlan
+from file_follower import CsvFollower, FileReset, offset_after_rows
+from workspace import Workspace
+from stats import grouping
 
 class TestDataCleaning(unittest.TestCase):
 
@@ -60,5 +84,917 @@ class TestDataCleaning(unittest.TestCase):
         second = clean_data(first)
         pd.testing.assert_frame_equal(first, second)
 
+class TestCleaningPlan(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            "a": rng.integers(0, 20, 5000).astype(float),
+            "b": rng.integers(0, 3, 5000),
+            "label": rng.choice(["x", "y", "nan"], 5000),
+        })
+        self.df.loc[::17, "a"] = np.nan
+
+    def test_matches_pandas_across_chunks(self):
+        for keep in ("first", "last", False):
+            result = CleaningPlan().drop_missing().drop_duplicates(["a", "b"], keep=keep).run(
+                self.df, chunk_rows=700, n_jobs=2)
+            expected = self.df.dropna().drop_duplicates(["a", "b"], keep=keep)
+            pd.testing.assert_frame_equal(result.frame, expected)
+            self.assertEqual(list(result.dropped), list(self.df.index.difference(expected.index)))
+        pd.testing.assert_frame_equal(clean_data(self.df), self.df.dropna().drop_duplicates())
+
+    def test_value_rules_and_report(self):
+        result = (CleaningPlan()
+                  .mark_missing(["nan"])
+                  .fill(["a"], "median")
+                  .drop_missing()
+                  .drop_duplicates()
+                  .run(self.df, chunk_rows=1000))
+        expected = self.df.replace("nan", np.nan)
+        expected["a"] = expected["a"].fillna(expected["a"].median())
+        expected = expected.dropna()
+        report = result.report.as_dict()
+        self.assertEqual([rule.get("cells", rule.get("rows")) for rule in report["rules"]], [
+            (self.df["label"] == "nan").sum(), self.df["a"].isna().sum(),
+            len(self.df) - len(expected), expected.duplicated().sum(),
+        ])
+        pd.testing.assert_frame_equal(result.frame, expected.drop_duplicates())
+        self.assertEqual(report["rows_after"], len(result.frame))
+        self.assertTrue(self.df["a"].isna().any(), "the input frame was modified")
+
+    def test_negative_zero_is_a_duplicate_of_zero(self):
+        df = pd.DataFrame({"a": [0.0, -0.0], "b": ["x", "x"]})
+        self.assertEqual(list(CleaningPlan().drop_duplicates().run(df).dropped), [1])
+
+    def test_fill_value_on_compacted_frame(self):
+        df = self.df.replace("nan", np.nan)
+        compact = compact_dataframe(df)
+        self.assertIsInstance(compact["label"].dtype, pd.CategoricalDtype)
+        result = CleaningPlan().fill(["label"], "value", "unknown").run(compact, chunk_rows=1000)
+        self.assertIsInstance(result.frame["label"].dtype, pd.CategoricalDtype)
+        self.assertEqual(result.frame["label"].astype(object).tolist(), df["label"].fillna("unknown").tolist())
+        self.assertEqual(result.report.as_dict()["rules"][0]["cells"], df["label"].isna().sum())
+
+
+class TestChunkedLoading(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as f:
+            f.write("a,b\n")
+            for i in range(250):
+                f.write(f"{i},{'nan' if i % 50 == 0 else i * 0.5}\n")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_chunks_match_single_read(self):
+        expected = pd.read_csv(self.path)
+        for engine in available_engines():
+            df = read_csv_chunked(self.path, engine=engine, chunksize=64)
+            pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+    def test_na_normalized_during_parse(self):
+        df = read_csv_chunked(self.path, chunksize=64)
+        self.assertEqual(df["b"].isnull().sum(), 5)
+
+    def test_progress_and_cancel(self):
+        updates = []
+        with self.assertRaises(LoadCancelled):
+            for _ in iter_csv_chunks(self.path, chunksize=64,
+                                     progress=lambda *p: updates.append(p),
+                                     is_cancelled=lambda: len(updates) >= 2):
+                pass
+        self.assertEqual(updates[-1][2], 128)
+
+@unittest.skipIf(csv_cache.pa is None, "pyarrow is not installed")
+class TestCsvCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = CsvCache(os.path.join(self.tmp_dir, "cache"), max_bytes=1 << 30)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_csv(self, name, rows):
+        path = os.path.join(self.tmp_dir, name)
+        pd.DataFrame({"a": range(rows), "b": ["x", None] * (rows // 2)}).to_csv(path, index=False)
+        return path
+
+    def test_round_trip(self):
+        path = self._write_csv("data.csv", 100)
+        self.assertIsNone(self.cache.get(path))
+        parsed = load_dataframe(path, cache=self.cache)
+        cached = self.cache.get(path)
+        pd.testing.assert_frame_equal(cached, parsed)
+
+    def test_keyed_by_parser_engine(self):
+        path = self._write_csv("data.csv", 100)
+        load_dataframe(path, engine="c", cache=self.cache)
+        self.assertIsNone(self.cache.get(path, engine="python"))
+        load_dataframe(path, engine="python", cache=self.cache)
+        self.assertIsNotNone(self.cache.get(path, engine="python"))
+        self.assertIsNone(self.cache.get(path, engine="c"))
+
+    def test_invalidated_when_source_changes(self):
+        path = self._write_csv("data.csv", 100)
+        load_dataframe(path, cache=self.cache)
+        time.sleep(0.01)
+        self._write_csv("data.csv", 50)
+        self.assertIsNone(self.cache.get(path))
+        self.assertEqual(len(load_dataframe(path, cache=self.cache)), 50)
+
+    def test_lru_eviction(self):
+        first = self._write_csv("first.csv", 1000)
+        second = self._write_csv("second.csv", 1000)
+        load_dataframe(first, cache=self.cache)
+        self.cache.max_bytes = self.cache.total_bytes() + 1
+        load_dataframe(second, cache=self.cache)
+        self.assertIsNone(self.cache.get(first))
+        self.assertIsNotNone(self.cache.get(second))
+
+class TestDataQualityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "a": [1.0, 1.0, None, 2.0, 1.0, 3.0],
+            "b": ["x", "x", "y", "z", "x", "w"],
+        })
+
+    @staticmethod
+    def _expected(df):
+        return set(df.index[df.isnull().any(axis=1) | df.duplicated()])
+
+    def test_matches_full_validation(self):
+        index = DataQualityIndex(self.df)
+        self.assertEqual(set(index.problematic_rows()), self._expected(self.df))
+        self.assertEqual(index.missing_count(), self.df.isnull().sum().sum())
+        self.assertIn(1, index)
+        self.assertNotIn(0, index)
+
+    def test_incremental_remove_and_update(self):
+        index = DataQualityIndex(self.df)
+        df = self.df.drop(index=[0])
+        index.remove_rows([0])
+        self.assertEqual(set(index.problematic_rows()), self._expected(df))
+        self.assertNotIn(1, index)
+
+        df.loc[5, ["a", "b"]] = [2.0, "z"]
+        index.update_rows(df, [5])
+        self.assertEqual(set(index.problematic_rows()), self._expected(df))
+
+    def test_negative_zero_matches_zero(self):
+        df = pd.DataFrame({"a": [0.0, -0.0, 1.0], "b": ["x", "x", "y"]})
+        index = DataQualityIndex(df)
+        self.assertEqual(list(index.problematic_rows()), [1])
+        index.add_rows(pd.DataFrame({"a": [-0.0], "b": ["x"]}, index=[3]))
+        self.assertEqual(list(index.problematic_rows()), [1, 3])
+
+class TestDatasetTombstones(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = Dataset(pd.DataFrame({"a": range(10), "b": list("abcdefghij")}))
+
+    def test_remove_rows_keeps_stable_ids(self):
+        removed = self.dataset.remove_rows([2, 3, 7, 42])
+        self.assertEqual(removed.tolist(), [2, 3, 7])
+        self.assertEqual(len(self.dataset), 7)
+        self.assertEqual(self.dataset.row_id(2), 4)
+        self.assertEqual(self.dataset.value(2, 1), "e")
+        self.assertEqual(self.dataset.view_rows([8, 4]).tolist(), [2, 5])
+
+    def test_compaction_is_deferred(self):
+        self.dataset.remove_view_rows(0, 1)
+        self.assertEqual(self.dataset.tombstone_count(), 2)
+        self.dataset.maybe_compact(ratio=0.5)
+        self.assertEqual(self.dataset.tombstone_count(), 2)
+        frame = self.dataset.frame
+        self.assertEqual(self.dataset.tombstone_count(), 0)
+        self.assertEqual(frame.index.tolist(), list(range(2, 10)))
+
+    def test_contiguous_ranges(self):
+        self.assertEqual(contiguous_ranges(pd.Series([1, 2, 3, 7, 9, 10]).to_numpy()),
+                         [(1, 3), (7, 7), (9, 10)])
+
+class TestStatistics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(7)
+        cls.df = pd.DataFrame({
+            "x": rng.normal(10, 3, 20000),
+            "y": rng.integers(0, 50, 20000),
+            "label": "a",
+        })
+        cls.df.loc[::97, "x"] = np.nan
+
+    def test_basic_statistics_match_pandas(self):
+        stats = get_basic_statistics(self.df)
+        self.assertEqual(set(stats), {"x", "y"})
+        for col in ("x", "y"):
+            series = self.df[col]
+            for key, expected in (("mean", series.mean()), ("median", series.median()),
+                                  ("std", series.std()), ("min", series.min()), ("max", series.max())):
+                self.assertAlmostEqual(stats[col][key], expected, places=8)
+
+    def test_streaming_merge_matches_exact(self):
+        exact = get_basic_statistics(self.df)
+        left, right = StreamingStats(), StreamingStats()
+        for start in range(0, len(self.df), 3000):
+            (left if start % 6000 else right).update(self.df.iloc[start:start + 3000])
+        left.merge(right)
+        streamed = left.result()
+        for col in ("x", "y"):
+            for key in ("mean", "std", "min", "max"):
+                self.assertAlmostEqual(streamed[col][key], exact[col][key], places=8)
+            # The median comes from the sketch, within a small rank error
+            self.assertLess(abs(streamed[col]["median"] - exact[col]["median"]), 0.1 * exact[col]["std"])
+
+class TestResultCache(unittest.TestCase):
+
+    def test_lru_eviction_under_memory_cap(self):
+        cache = ResultCache(max_bytes=2500)
+        for key in "abc":
+            cache.put(key, np.zeros(100))  # 800 bytes each
+        cache.get("a")
+        cache.put("d", np.zeros(100))
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertLessEqual(cache.total_bytes, 2500)
+
+    def test_dataset_memoize_tracks_version(self):
+        dataset = Dataset(pd.DataFrame({"a": range(5)}))
+        calls = []
+        compute = lambda: calls.append(1) or len(dataset.frame)
+        self.assertEqual(dataset.memoize("rows", (), compute), 5)
+        self.assertEqual(dataset.memoize("rows", (), compute), 5)
+        dataset.remove_rows([0])
+        self.assertEqual(dataset.memoize("rows", (), compute), 4)
+        self.assertEqual(len(calls), 2)
+
+class TestHeatmapBinning(unittest.TestCase):
+
+    def test_bins_rows_and_columns(self):
+        values = np.arange(70, dtype=float).reshape(10, 7)
+        binned, row_factor, col_factor = bin_matrix(values, max_rows=4, max_cols=7, how="max")
+        self.assertEqual((row_factor, col_factor), (3, 1))
+        self.assertEqual(binned.shape, (4, 7))
+        np.testing.assert_array_equal(binned[0], values[2])
+        np.testing.assert_array_equal(binned[-1], values[9])
+
+    def test_mean_ignores_missing(self):
+        values = np.array([[1.0, np.nan], [3.0, np.nan], [5.0, 2.0]])
+        binned, _, _ = bin_matrix(values, max_rows=1, max_cols=2)
+        np.testing.assert_array_equal(binned, [[3.0, 2.0]])
+
+
+class TestSeriesDecimation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.arange(10_000, dtype=float)
+        self.y = rng.normal(size=10_000)
+
+    def test_minmax_keeps_extremes(self):
+        x, y = minmax_decimate(self.x, self.y, 100)
+        self.assertLessEqual(len(x), 200)
+        self.assertEqual(y.max(), self.y.max())
+        self.assertEqual(y.min(), self.y.min())
+        self.assertTrue(np.all(np.diff(x) > 0))
+
+    def test_lttb_keeps_endpoints(self):
+        x, y = lttb(self.x, self.y, 300)
+        self.assertEqual(len(x), 300)
+        self.assertEqual((x[0], x[-1]), (self.x[0], self.x[-1]))
+
+    def test_aggregate_bars(self):
+        self.assertIsNone(aggregate_bars(self.x[:10], self.y[:10], max_bars=20))
+        centers, heights, width = aggregate_bars(self.x, np.ones_like(self.x), max_bars=50)
+        self.assertEqual(len(centers), 50)
+        np.testing.assert_allclose(heights, 1.0)
+
+    def test_series_index_visible_range(self):
+        index = SeriesIndex(self.x[::-1], self.y[::-1])
+        x, _ = index.visible((100, 200))
+        self.assertEqual((x[0], x[-1]), (99, 201))
+
+    def test_undecimated_line_keeps_row_order(self):
+        x, y = np.array([2.0, 0.0, np.nan, 1.0]), np.array([5.0, 6.0, 7.0, 8.0])
+        index = SeriesIndex(x, y).extended([0.5], [9.0])
+        np.testing.assert_array_equal(index.x, [0.0, 0.5, 1.0, 2.0])
+        np.testing.assert_array_equal(index.line(100)[0], [2.0, 0.0, 1.0, 0.5])
+        np.testing.assert_array_equal(index.line(100, (0.0, 1.0))[1], [5.0, 6.0, 8.0, 9.0])
+        big = SeriesIndex(self.x[::-1], self.y[::-1])
+        self.assertTrue(np.all(np.diff(big.line(10)[0]) >= 0))
+
+
+
+class TestTaskScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication([])
+        self.scheduler = TaskScheduler()
+
+    def _wait(self, channel):
+        deadline = time.time() + 10
+        while self.scheduler.is_busy(channel) and time.time() < deadline:
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def slow(self, value):
+        def task(token):
+            for _ in range(50):
+                time.sleep(0.002)
+                token.check()
+            return value
+        return task
+
+    def test_newer_request_supersedes(self):
+        results = []
+        first = self.scheduler.submit("plot", self.slow(1), results.append)
+        self.scheduler.submit("plot", self.slow(2), results.append)
+        self._wait("plot")
+        self.scheduler.pool.waitForDone()
+        self.app.processEvents()
+        self.assertTrue(first.cancelled)
+        self.assertEqual(results, [2])
+
+    def test_errors_are_reported(self):
+        errors = []
+        self.scheduler.submit("stats", lambda token: 1 / 0, print, errors.append)
+        self._wait("stats")
+        self.assertEqual(len(errors), 1)
+
+
+
+class TestCompaction(unittest.TestCase):
+
+    def setUp(self):
+        rows = 1000
+        self.df = pd.DataFrame({
+            "small_int": np.arange(rows) % 100,
+            "nullable": pd.array([None if i % 7 == 0 else i for i in range(rows)], dtype="Int64"),
+            "halves": np.where(np.arange(rows) % 5 == 0, np.nan, np.arange(rows) / 2),
+            "precise": np.linspace(0, 1, rows) / 3,
+            "label": pd.Series(["red", "green", None, "blue"] * (rows // 4), dtype=object),
+            "unique": [f"id{i}" for i in range(rows)],
+            "mixed": pd.Series([1, "x"] * (rows // 2), dtype=object),
+        })
+
+    def test_dtypes_shrink_without_changing_values(self):
+        compact = compact_dataframe(self.df)
+        self.assertEqual(compact["small_int"].dtype, np.int16)
+        self.assertEqual(compact["nullable"].dtype, pd.Int16Dtype())
+        self.assertEqual(compact["halves"].dtype, np.float32)
+        self.assertEqual(compact["precise"].dtype, np.float64)
+        self.assertIsInstance(compact["label"].dtype, pd.CategoricalDtype)
+        self.assertEqual(compact["mixed"].dtype, object)
+        pd.testing.assert_frame_equal(compact.isna(), self.df.isna())
+        pd.testing.assert_series_equal(compact.duplicated(), self.df.duplicated())
+        # Headroom: 100 - (-100) would wrap around in int8
+        extremes = compact_dataframe(pd.DataFrame({"a": [100, -100], "b": [-16383, 16383], "c": [0, 16384]}))
+        self.assertEqual((extremes["a"] - extremes["a"][::-1].to_numpy()).tolist(), [200, -200])
+        self.assertEqual(list(extremes.dtypes), [np.int16, np.int16, np.int32])
+        for col in self.df.columns:
+            values = [[None if pd.isna(v) else v for v in frame[col]] for frame in (compact, self.df)]
+            self.assertEqual(values[0], values[1])
+
+    def test_memory_report(self):
+        report = memory_usage_report(self.df, compact_dataframe(self.df))
+        self.assertEqual(list(report.index), list(self.df.columns))
+        self.assertEqual(report.loc["small_int", "bytes_after"], 2000)
+        self.assertAlmostEqual(report.loc["small_int", "saved"], 3 / 4)
+        self.assertLess(report["bytes_after"].sum(), report["bytes_before"].sum())
+
+
+class TestDatasetStore(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication([])
+        self.store = DatasetStore()
+        self.events = []
+        self.store.reloaded.connect(lambda: self.events.append("reloaded"))
+        self.store.rows_removed.connect(lambda ids: self.events.append(("removed", list(ids))))
+        self.store.roles_changed.connect(lambda ind, dep: self.events.append(("roles", ind, dep)))
+        self.store.data_changed.connect(lambda: self.events.append("changed"))
+
+    def test_changes_are_signalled(self):
+        dataset = self.store.dataset
+        self.store.load(pd.DataFrame({"a": range(5), "b": range(5)}), "a.csv")
+        self.store.remove_rows([1, 3])
+        self.store.remove_rows([99])
+        self.store.toggle_role("b")
+        self.assertIs(self.store.dataset, dataset)
+        self.assertEqual(self.events, [
+            "reloaded", ("roles", [], []), "changed",
+            ("removed", [1, 3]), "changed",
+            ("roles", ["b"], []),
+        ])
+        self.assertEqual(list(dataset.frame["a"]), [0, 2, 4])
+
+    def test_reload_releases_the_old_frame(self):
+        df = pd.DataFrame({"a": np.arange(1000.0)})
+        self.store.load(df)
+        old_frame, old_version = weakref.ref(df), self.store.dataset.version
+        self.store.dataset.memoize("numeric_columns", (), lambda: ["a"])
+        del df
+        self.store.load(pd.DataFrame({"b": [1.0]}))
+        self.assertIsNone(old_frame())
+        self.assertGreater(self.store.dataset.version, old_version)
+        self.assertEqual(self.store.column_roles, {"b": "Unused"})
+
+    def test_tab_shown_again_reuses_its_results(self):
+        first, second = pd.DataFrame({"a": [1.0, 2.0]}), pd.DataFrame({"a": [3.0]})
+        dataset, calls = self.store.dataset, []
+        compute = lambda: calls.append(1) or len(calls)
+        self.store.load(first, close_previous=False)
+        self.assertEqual(dataset.memoize("probe", (), compute), 1)
+        saved = dataset.results_key()
+        self.store.load(second, close_previous=False)
+        self.assertEqual(dataset.memoize("probe", (), compute), 2)
+        self.store.load(first, close_previous=False, results=saved)
+        self.assertEqual(dataset.memoize("probe", (), compute), 1)
+        self.assertEqual(len(calls), 2)
+        self.store.load(first)
+        self.assertEqual(dataset.memoize("probe", (), compute), 3)
+
+
+class TestFollowMode(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "log.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, text, mode="a"):
+        with open(self.path, mode, newline="") as f:
+            f.write(text)
+
+    def test_follower_reads_only_complete_appended_rows(self):
+        self._write("a,b\n1,x\n\n2,y\n", "w")
+        self.assertEqual(offset_after_rows(self.path, 2), len("a,b\n1,x\n\n2,y\n"))
+        follower = CsvFollower.after_rows(self.path, 1)
+        self.assertEqual(follower.poll()["a"].tolist(), [2])
+        self.assertIsNone(follower.poll())
+        self._write("3,z\n4,")
+        self.assertEqual(follower.poll()["b"].tolist(), ["z"])
+        self._write("w\n")
+        self.assertEqual(follower.poll()["a"].tolist(), [4])
+        self._write("a,b\n9,q\n", "w")
+        with self.assertRaises(FileReset):
+            follower.poll()
+
+    def test_append_extends_cached_results(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({"x": rng.integers(0, 50, 500).astype(np.int8), "y": rng.normal(size=500)})
+        added = pd.DataFrame({"x": [3, 3, 7], "y": [0.5, np.nan, 0.5]})
+        dataset = Dataset(df)
+        index = DataQualityIndex(df)
+        extended = []
+
+        def series():
+            frame = dataset.frame
+            return dataset.memoize("series", (), lambda: SeriesIndex(frame["x"], frame["y"]), extend=lambda prev, n: (
+                extended.append(n) or prev.extended(frame["x"].iloc[-n:], frame["y"].iloc[-n:])))
+
+        series()
+        row_ids = dataset.append(added)
+        index.add_rows(dataset.frame.loc[row_ids])
+        dataset.append(added.iloc[:1])
+        merged = series()
+        full = pd.concat([df, added, added.iloc[:1]], ignore_index=True)
+        self.assertEqual(extended, [4])
+        self.assertEqual(list(row_ids), [500, 501, 502])
+        self.assertEqual(dataset.frame["x"].dtype, np.int8)
+        expected = SeriesIndex(full["x"], full["y"])
+        np.testing.assert_array_equal(merged.x, expected.x)
+        np.testing.assert_array_equal(merged.y, expected.y)
+        np.testing.assert_array_equal(index.problematic_rows(), DataQualityIndex(full.iloc[:503]).problematic_rows())
+        with self.assertRaises(ValueError):
+            dataset.append(added.rename(columns={"y": "z"}))
+
+    def test_append_text_to_numeric_column_widens_it(self):
+        dataset = Dataset(pd.DataFrame({"x": np.arange(3, dtype=np.int8), "y": [0.5, 1.5, 2.5]}))
+        dataset.memoize("sum", (), lambda: dataset.frame["x"].sum(), extend=lambda prev, n: prev + 1)
+        dataset.append(pd.DataFrame({"x": ["oops"], "y": [3.5]}))
+        self.assertEqual(dataset.frame["x"].tolist(), [0, 1, 2, "oops"])
+        # Not extended: the column the cached result was computed over has changed type
+        self.assertIsNone(dataset.memoize("sum", (), lambda: None, extend=lambda prev, n: prev + 1))
+
+
+class TestWorkspace(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_spills_least_recently_used_and_restores(self):
+        workspace = Workspace(max_bytes=1, spill_dir=self.tmpdir)
+        frames = [
+            pd.DataFrame({"a": np.arange(1000) * i, "b": pd.Categorical(["x", "y"] * 500)},
+                         index=pd.RangeIndex(5, 1005))
+            for i in range(3)
+        ]
+        entries = [workspace.add(f"f{i}", frame) for i, frame in enumerate(frames)]
+        workspace.activate(entries[2])
+        entries[1].last_used = 0.0
+        self.assertEqual(workspace.to_spill(), [entries[1], entries[0]])
+        for entry in (entries[1], entries[0]):
+            self.assertTrue(workspace.spill(entry))
+        self.assertTrue(entries[0].spilled and not entries[2].spilled)
+        self.assertEqual(workspace.resident_bytes(), entries[2].nbytes)
+
+        restored = workspace.restore(entries[1])
+        pd.testing.assert_frame_equal(restored, frames[1])
+        # An unedited entry is dropped again without rewriting its file
+        path = entries[1].spill_path
+        workspace.activate(entries[1])
+        workspace.deactivate(entries[1], restored, changed=False)
+        self.assertTrue(workspace.spill(entries[1]))
+        self.assertEqual(entries[1].spill_path, path)
+
+        workspace.close()
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+
+class TestGrouping(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            "k": pd.Categorical(rng.choice(["a", "b"], 2000), categories=["b", "a", "unused"]),
+            "j": rng.integers(0, 30, 2000).astype(float),
+            "v": rng.normal(size=2000),
+            "n": rng.integers(0, 9, 2000),
+        })
+        self.df.loc[::37, "j"] = np.nan
+        self.df.loc[::11, "v"] = np.nan
+
+    def test_matches_pandas_groupby(self):
+        aggregations = ("count", "mean", "median", "std", "min", "max", "sum")
+        result = grouping.group_statistics(self.df, ["k", "j"], aggregations=aggregations, quantiles=(10, 90))
+        grouped = self.df.groupby(["k", "j"], observed=True)
+        expected = grouped[["v", "n"]].agg(list(aggregations))
+        pd.testing.assert_frame_equal(result[expected.columns], expected, check_index_type=False)
+        np.testing.assert_allclose(result[("v", "p90")], grouped["v"].quantile(0.9))
+
+        pivot = grouping.pivot_table(result, "k", "n", "mean")
+        self.assertEqual(list(pivot.columns), ["b", "a"])
+        np.testing.assert_allclose(pivot["a"].dropna(), expected[("n", "mean")].xs("a", level="k"))
+
+    def test_parallel_split_matches_serial(self):
+        serial = grouping.group_statistics(self.df, ["j"], quantiles=(50,))
+        thresholds = grouping.PARALLEL_MIN_GROUPS, grouping.PARALLEL_MIN_ROWS
+        grouping.PARALLEL_MIN_GROUPS = grouping.PARALLEL_MIN_ROWS = 1
+        try:
+            parallel = grouping.group_statistics(self.df, ["j"], quantiles=(50,), n_jobs=2)
+        finally:
+            grouping.PARALLEL_MIN_GROUPS, grouping.PARALLEL_MIN_ROWS = thresholds
+        pd.testing.assert_frame_equal(parallel, serial)
+        self.assertEqual(len(serial), self.df["j"].nunique())
+
+
+@unittest.skipUnless(query_source.out_of_core_available(), "duckdb is not installed")
+class TestQuerySource(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "data.csv")
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            "x": rng.normal(size=3000), "y": rng.normal(size=3000),
+            "label": rng.choice(["a", "b"], 3000), "n": rng.integers(0, 9, 3000),
+        })
+        df.loc[::31, "y"] = np.nan
+        pd.concat([df, df.iloc[:5]]).to_csv(self.path, index=False)
+        self.df = read_csv_chunked(self.path)
+        self.source = query_source.open_source(self.path)
+
+    def tearDown(self):
+        self.source.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_aggregates_match_pandas(self):
+        self.assertEqual(self.source.numeric_columns, ["x", "y", "n"])
+        statistics, expected = self.source.basic_statistics(), get_basic_statistics(self.df)
+        for col, metrics in expected.items():
+            for name, value in metrics.items():
+                self.assertAlmostEqual(statistics[col][name], value, places=9)
+        summary = self.source.quality_summary()
+        self.assertEqual(summary["rows_with_missing"], self.df.isna().any(axis=1).sum())
+        self.assertEqual(summary["duplicate_rows"], self.df.duplicated().sum())
+
+        grid = self.source.heatmap_grid(["x", "y", "n"], 50, 2, "max")
+        expected = heatmap_grid(self.df[["x", "y", "n"]], 50, 2, "max")
+        np.testing.assert_allclose(grid["values"], expected["values"])
+        self.assertEqual(grid["row_labels"], expected["row_labels"])
+        self.assertEqual(grid["col_labels"], expected["col_labels"])
+
+        stats = self.source.sufficient_statistics(["x", "y", "n"])
+        expected = frame_statistics(self.df, ["x", "y", "n"])
+        self.assertEqual(stats.count, expected.count)
+        np.testing.assert_allclose(stats.comoment, expected.comoment)
+        folds = self.source.fold_statistics(["x", "y"], 5)
+        self.assertEqual(sum(fold.count for fold in folds), self.df[["x", "y"]].dropna().shape[0])
+
+        grouped = self.source.group_statistics(["label", "n"], ["y"], quantiles=(25,))
+        expected = grouping.group_statistics(self.df, ["label", "n"], ["y"], quantiles=(25,))
+        np.testing.assert_allclose(grouped.to_numpy(dtype=float), expected.to_numpy(dtype=float))
+        self.assertEqual(list(grouped.index), list(expected.index))
+
+    def test_pages_and_series(self):
+        page = self.source.page(2995, 10)
+        self.assertEqual(list(page.index), list(range(2995, 3005)))
+        np.testing.assert_allclose(page["x"], self.df["x"].iloc[2995:3005])
+
+        self.assertIsInstance(self.source.series("x", "y"), SeriesIndex)
+        index = SeriesIndex(self.df["x"], self.df["y"])
+        queried = query_source.QuerySeries(self.source, "x", "y", len(index))
+        x, y = queried.line(100)
+        self.assertLessEqual(len(x), 200)
+        self.assertTrue(np.all(np.diff(x) >= 0))
+        self.assertEqual((y.min(), y.max()), (index.y.min(), index.y.max()))
+        counts, extent = queried.density((20, 10))
+        expected, expected_extent = index.density((20, 10))
+        np.testing.assert_array_equal(counts, expected)
+        self.assertEqual(extent, expected_extent)
+
+    def test_import_can_be_cancelled(self):
+        with self.assertRaises(LoadCancelled):
+            query_source.open_source(self.path, is_cancelled=lambda: True)
+
+
+class TestSufficientStatistics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        X = rng.normal(size=(5000, 3)) * [1, 50, 0.1] + [10, -5, 2]
+        self.df = pd.DataFrame(X, columns=["a", "b", "c"])
+        self.df["y"] = X @ [2.0, -0.1, 4.0] + rng.normal(size=5000) + 3
+        self.stats = SufficientStatistics(self.df.columns)
+        for start in range(0, len(self.df), 700):
+            self.stats.update(self.df.iloc[start:start + 700])
+        self.features = ["a", "b", "c"]
+
+    def assertMatches(self, fit, model):
+        model.fit(self.df[self.features], self.df["y"])
+        np.testing.assert_allclose(fit.coef_, model.coef_, rtol=1e-6, atol=1e-8)
+        self.assertAlmostEqual(fit.intercept_, model.intercept_, places=6)
+        self.assertAlmostEqual(fit.r2, model.score(self.df[self.features], self.df["y"]), places=8)
+
+    def test_chunked_fits_match_in_memory(self):
+        self.assertMatches(self.stats.solve(self.features, "y"), LinearRegression())
+        self.assertMatches(self.stats.solve(self.features, "y", alpha=10.0), Ridge(alpha=10.0))
+        self.assertMatches(self.stats.solve_lasso(self.features, "y", alpha=0.5), Lasso(alpha=0.5))
+
+    def test_merge_and_missing_rows(self):
+        left, right = SufficientStatistics(self.df.columns), SufficientStatistics(self.df.columns)
+        left.update(self.df.iloc[:1000])
+        right.update(self.df.iloc[1000:])
+        with_missing = self.df.iloc[:10].copy()
+        with_missing.loc[:, "a"] = np.nan
+        right.update(with_missing)
+        left.merge(right)
+        self.assertEqual(left.count, len(self.df))
+        np.testing.assert_allclose(left.comoment, self.stats.comoment, rtol=1e-9)
+
+    def test_fit_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.csv")
+            self.df.to_csv(path, index=False)
+            fit = fit_csv(path, "linear", self.features, "y")
+        self.assertMatches(fit, LinearRegression())
+
+    def test_standard_errors(self):
+        fit = self.stats.solve(self.features, "y")
+        X = np.column_stack([np.ones(len(self.df)), self.df[self.features]])
+        residuals = self.df["y"] - X @ np.r_[fit.intercept_, fit.coef_]
+        variance = residuals @ residuals / (len(self.df) - 4)
+        expected = np.sqrt(np.diag(variance * np.linalg.inv(X.T @ X)))
+        self.assertAlmostEqual(fit.residual_variance, variance)
+        np.testing.assert_allclose(fit.standard_errors, expected[1:], rtol=1e-6)
+        self.assertAlmostEqual(fit.intercept_se, expected[0])
+
+    def test_dataset_gram_is_shared_by_subsets(self):
+        dataset = Dataset(self.df)
+        df = dataset.frame
+        self.assertIs(dataset_statistics(dataset, df, ["a", "y"]), dataset_statistics(dataset, df, ["b", "c", "y"]))
+
+        df = self.df.copy()
+        df["label"] = "x"
+        df.loc[:10, "c"] = np.nan
+        dataset = Dataset(df)
+        # The warm-up call (no columns yet) must not shadow the full Gram matrix
+        self.assertEqual(dataset_statistics(dataset, df, []).count, len(df) - 11)
+        stats = dataset_statistics(dataset, df, ["a", "y"])
+        self.assertEqual(stats.count, len(df))
+        self.assertEqual(dataset_statistics(dataset, df, ["a", "c", "y"]).count, len(df) - 11)
+
+
+
+class TestSavedModel(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.default_rng(4)
+        self.df = pd.DataFrame({"a": rng.normal(size=500), "b": rng.normal(size=500), "id": np.arange(500)})
+        self.df["y"] = 2 * self.df["a"] - self.df["b"] + 0.5
+        self.df["z"] = self.df["a"] + 3
+        self.fit = fit_sufficient(frame_statistics(self.df, ["a", "b", "y", "z"]), "linear", ["a", "b"], ["y", "z"])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip_and_streamed_prediction(self):
+        path = os.path.join(self.tmpdir, "model.joblib")
+        roles = {"a": "Independent", "b": "Independent", "y": "Dependent", "z": "Dependent"}
+        save_model(path, self.fit, roles, "train.csv", self.df[["a", "b"]].mean())
+        model = load_model(path)
+        self.assertEqual((model.features, model.targets, model.column_roles), (["a", "b"], ["y", "z"], roles))
+
+        scored = self.df[["id", "a", "b"]].copy()
+        scored.loc[[3, 250], "a"] = np.nan
+        input_path, output_path = os.path.join(self.tmpdir, "new.csv"), os.path.join(self.tmpdir, "out.csv")
+        scored.to_csv(input_path, index=False)
+        report = predict_csv(model, input_path, output_path, keep_columns=["id"], chunksize=64)
+        self.assertEqual((report.rows, report.predicted), (500, 498))
+        result = pd.read_csv(output_path)
+        self.assertEqual(list(result.columns), ["id", "y_predicted", "z_predicted"])
+        np.testing.assert_allclose(result["y_predicted"].drop([3, 250]), self.df["y"].drop([3, 250]))
+        self.assertTrue(result.loc[[3, 250], "y_predicted"].isna().all())
+
+        predict_csv(model, input_path, output_path, fill="mean")
+        self.assertAlmostEqual(pd.read_csv(output_path).loc[3, "z_predicted"], self.df["a"].mean() + 3)
+        with self.assertRaises(KeyError):
+            predict_csv(model, input_path, os.path.join(self.tmpdir, "bad.csv"), keep_columns=["missing"])
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ["model.joblib", "new.csv", "out.csv"])
+
+
+class TestModelSelection(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        X = rng.normal(size=(2000, 4))
+        self.df = pd.DataFrame(X, columns=["a", "b", "c", "d"])
+        self.df["y"] = X @ [1.0, 0.0, -2.0, 0.5] + rng.normal(size=2000)
+        self.df["z"] = X[:, 0] + rng.normal(size=2000)
+        self.features = ["a", "b", "c", "d"]
+
+    def sklearn_cv_mse(self, model, target):
+        folds = np.array_split(np.random.default_rng(0).permutation(len(self.df)), 3)
+        errors = []
+        for rows in folds:
+            held_out = self.df.index.isin(rows)
+            train, test = self.df[~held_out], self.df[held_out]
+            model.fit(train[self.features], train[target])
+            errors.append(np.mean((model.predict(test[self.features]) - test[target]) ** 2))
+        return np.mean(errors)
+
+    def test_cv_error_matches_sklearn(self):
+        result = cross_validate(self.df, "ridge", self.features, ["y", "z"], alphas=[0.1, 100.0], n_folds=3)
+        self.assertEqual(result.mse.shape, (2, 2))
+        self.assertAlmostEqual(result.mse[1, 0], self.sklearn_cv_mse(Ridge(alpha=100.0), "y"))
+        # Two worker processes, so the lasso folds also run outside this interpreter
+        result = cross_validate(self.df, "lasso", self.features, ["y"], alphas=[0.05, 0.5], n_folds=3, n_jobs=2)
+        self.assertAlmostEqual(result.mse[0, 0], self.sklearn_cv_mse(Lasso(alpha=0.05), "y"), places=6)
+        self.assertEqual(result.best_alphas, {"y": 0.05})
+        self.assertEqual(result.folds_completed, 3)
+
+    def test_budget(self):
+        with self.assertRaises(BudgetExceeded):
+            cross_validate(self.df, "lasso", self.features, ["y"], budget_seconds=0.0)
+
+
+
+class TestBatchCli(unittest.TestCase):
+
+    def test_analyze_file(self):
+        rng = np.random.default_rng(5)
+        df = pd.DataFrame({"a": rng.normal(size=300), "label": ["x"] * 300})
+        df["y"] = 3 * df["a"] + 1
+        df.loc[5, "a"] = np.nan
+        options = dict(engine="c", clean=True, targets=["y"], features=[], model="linear", alpha=1.0,
+                       cv=False, folds=5, format="json", figures=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "input", "data.csv")
+            os.makedirs(os.path.dirname(path))
+            df.to_csv(path, index=False)
+            self.assertEqual(batch_cli.find_inputs([os.path.join(tmp, "input")]), [path])
+
+            summary = batch_cli.analyze_file(path, os.path.join(tmp, "out"), options)
+            self.assertIsNone(summary["error"])
+            self.assertEqual(summary["rows"], {"loaded": 300, "clean": 299})
+            self.assertEqual(set(summary["timings"]), set(batch_cli.STAGES))
+            self.assertTrue(all(os.path.exists(output) for output in summary["outputs"]))
+            with open(next(o for o in summary["outputs"] if o.endswith("model.json"))) as handle:
+                fit = json.load(handle)["fits"][0]
+            self.assertAlmostEqual(fit["coefficients"][0], 3.0)
+
+            model_path = next(o for o in summary["outputs"] if o.endswith("model.joblib"))
+            scored = batch_cli.predict_file(path, os.path.join(tmp, "scored"), model_path,
+                                            dict(engine="c", keep=["a"], fill="none"))
+            self.assertIsNone(scored["error"])
+            self.assertEqual((scored["rows"], scored["predicted"]), (300, 299))
+            np.testing.assert_allclose(pd.read_csv(scored["output"])["y_predicted"].drop(5), df["y"].drop(5))
+
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_first_window_is_lean(self):
+        # The time budget is checked by startup_check.py; wall-clock limits are flaky in the unit suite
+        result = startup_check.measure_startup()
+        self.assertEqual(result["deferred_loaded"], [])
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.recorder = logger.get_recorder()
+        self.recorder.clear()
+
+    def test_spans_nest_and_record_fields(self):
+        @logger.timed()
+        def inner():
+            time.sleep(0.01)
+
+        with logger.span("outer", file="a.csv") as s:
+            inner()
+            s.fields["rows"] = 3
+        with self.assertRaises(ValueError), logger.span("failing"):
+            raise ValueError()
+
+        records = {record.name: record for record in self.recorder.records()}
+        self.assertEqual(records["outer"].fields, {"file": "a.csv", "rows": 3})
+        inner_record = records["TestInstrumentation.test_spans_nest_and_record_fields.<locals>.inner"]
+        self.assertEqual((inner_record.depth, inner_record.parent), (1, "outer"))
+        self.assertGreaterEqual(records["outer"].seconds, inner_record.seconds)
+        self.assertEqual(records["failing"].error, "ValueError")
+        self.assertIn("rows=3", logger.format_report())
+
+    def test_allocation_tracking_and_profiler(self):
+        logger.enable_allocation_tracking()
+        profiler = logger.get_profiler()
+        profiler.reset()
+        profiler.start()
+        try:
+            with logger.span("allocate"):
+                data = [0] * 1_000_000
+        finally:
+            profiler.stop()
+            logger.disable_allocation_tracking()
+        record = self.recorder.records()[-1]
+        self.assertGreater(record.allocated, 7_000_000)
+        self.assertIsNotNone(profiler.stats)
+        del data
+
+    def test_spans_keep_an_enclosing_peak(self):
+        tracemalloc.start()
+        try:
+            with logger.span("outer"):
+                with logger.span("large"):
+                    data = [0] * 1_000_000
+                    del data
+            with logger.span("small"):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        records = {record.name: record for record in self.recorder.records()}
+        self.assertGreater(peak, 7_000_000)
+        self.assertGreater(records["large"].peak, 7_000_000)
+        self.assertGreater(records["outer"].peak, 7_000_000)
+        self.assertIsNone(records["small"].peak)
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_synthetic_dataset(self):
+        self.assertEqual(parse_rows("10k"), 10_000)
+        self.assertEqual(parse_rows("1M"), 1_000_000)
+        df = make_dataset(10_000, "wide", na_ratio=0.02, dup_ratio=0.05)
+        self.assertEqual(df.shape, (10_000, 64))
+        self.assertAlmostEqual(df.isna().to_numpy().mean(), 0.02, delta=0.002)
+        self.assertGreater(df.duplicated().sum(), 0)
+        pd.testing.assert_frame_equal(df, make_dataset(10_000, "wide", na_ratio=0.02, dup_ratio=0.05))
+
+    def test_compare_flags_regressions_above_noise(self):
+        def report(clean_seconds, stats_mb):
+            return {"results": {
+                ("clean_data", 1000, "narrow"): {"median": clean_seconds, "peak_mb": 5.0},
+                ("basic_statistics", 1000, "narrow"): {"median": 0.001, "peak_mb": stats_mb},
+            }}
+        rows = {row["key"][0]: row["regressed"] for row in compare(report(1.0, 10.0), report(1.2, 30.0))}
+        self.assertEqual(rows, {"clean_data": ["time"], "basic_statistics": ["memory"]})
+        # Slowdowns below the absolute floor are timer noise
+        self.assertFalse(any(row["regressed"] for row in compare(report(0.001, 10.0), report(0.003, 10.5))))
+
+
 if __name__ == "__main__":
     unittest.main()
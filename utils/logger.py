@@ -1 +1,329 @@
-# logger.py
+"""
+Logging, timing spans and opt-in profiling.
+
+    from utils.logger import get_logger, span, timed
+
+    log = get_logger(__name__)
+
+    with span("load_csv", file=path) as s:
+        df = ...
+        s.fields["rows"] = len(df)
+
+    @timed()  # the span is named after the function
+    def get_basic_statistics(df): ...
+
+Finished spans are logged at DEBUG level and kept in a bounded history
+(get_recorder()) that the Performance dock shows. Spans nest per thread.
+Environment switches, read once at import:
+- DATA_ANALYZER_LOG_LEVEL: level of the console handler (default WARNING).
+- DATA_ANALYZER_TRACE_MEMORY=1: record Python allocations per span (tracemalloc).
+- DATA_ANALYZER_PROFILE=<file>: run outermost spans under cProfile and write
+  the merged statistics to <file> at exit (view with python -m pstats).
+"""
+import atexit
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+LOGGER_NAME = "data_analyzer"
+DEFAULT_HISTORY = 500
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class _StructuredFormatter(logging.Formatter):
+    """Appends the record's "fields" extra as key=value pairs."""
+
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{key}={_format_value(value)}" for key, value in fields.items())
+        return text
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    text = str(value)
+    return f'"{text}"' if " " in text else text
+
+
+def configure_logging(level=None):
+    """Attach a console handler to the application logger (once)."""
+    root = logging.getLogger(LOGGER_NAME)
+    if level is None:
+        level = os.environ.get("DATA_ANALYZER_LOG_LEVEL", "WARNING")
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(_StructuredFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        root.addHandler(handler)
+    return root
+
+
+def get_logger(name: str = None) -> logging.Logger:
+    """Logger under the application namespace, e.g. get_logger(__name__)."""
+    return logging.getLogger(LOGGER_NAME if not name else f"{LOGGER_NAME}.{name}")
+
+
+_log = get_logger("perf")
+
+
+def rss_bytes():
+    """Resident memory of the process, or its peak where the current value is unavailable."""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    return None
+
+
+def enable_allocation_tracking():
+    """Start tracemalloc so spans report the Python memory they allocate."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable_allocation_tracking():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+class SpanRecord:
+    """
+    One finished span; memory fields are None when they were not measured.
+    peak is also None when the span stayed below an earlier traced peak.
+    """
+
+    __slots__ = ("name", "start", "seconds", "depth", "parent", "thread", "fields",
+                 "rss_delta", "allocated", "peak", "error")
+
+    def __init__(self, name, start, seconds, depth, parent, thread, fields,
+                 rss_delta=None, allocated=None, peak=None, error=None):
+        self.name = name
+        self.start = start
+        self.seconds = seconds
+        self.depth = depth
+        self.parent = parent
+        self.thread = thread
+        self.fields = fields
+        self.rss_delta = rss_delta
+        self.allocated = allocated
+        self.peak = peak
+        self.error = error
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SpanRecorder:
+    """
+    Thread-safe history of the most recent spans.
+
+    count only grows, so a reader can tell whether anything new arrived
+    since it last looked without copying the history.
+    """
+
+    def __init__(self, maxlen: int = DEFAULT_HISTORY):
+        self._records = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, record: SpanRecord):
+        with self._lock:
+            self._records.append(record)
+            self.count += 1
+
+    def records(self) -> list:
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def summary(self) -> dict:
+        """Per span name: calls, total and maximum seconds."""
+        totals = {}
+        for record in self.records():
+            entry = totals.setdefault(record.name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += record.seconds
+            entry["max_seconds"] = max(entry["max_seconds"], record.seconds)
+        return totals
+
+
+class Profiler:
+    """
+    Opt-in cProfile hook: while enabled, each thread's outermost span runs
+    under its own profiler and the results are merged into one pstats.Stats.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._stats = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stats = None
+
+    def add(self, profile: cProfile.Profile):
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    @property
+    def stats(self):
+        return self._stats
+
+    def dump(self, path: str) -> bool:
+        """Write the merged statistics to path; False if nothing was profiled."""
+        with self._lock:
+            if self._stats is None:
+                return False
+            self._stats.dump_stats(path)
+            return True
+
+
+_recorder = SpanRecorder()
+_profiler = Profiler()
+_local = threading.local()
+
+
+def get_recorder() -> SpanRecorder:
+    return _recorder
+
+
+def get_profiler() -> Profiler:
+    return _profiler
+
+
+class span:
+    """
+    Time a block of code as a named span; usable as a context manager.
+
+    Extra keyword arguments are attached to the record as fields, and the
+    block may add more through the span's fields dict (e.g. a row count
+    known only at the end). Exceptions propagate; the span is still
+    recorded, with the exception type in its error field.
+    """
+
+    def __init__(self, name: str, **fields):
+        self.name = name
+        self.fields = fields
+        self._profile = None
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+
+        self._tracing = tracemalloc.is_tracing()
+        if self._tracing:
+            # The peak is not reset: that would wipe out measurements enclosing this span
+            self._allocated_before, self._peak_before = tracemalloc.get_traced_memory()
+        self._rss_before = rss_bytes()
+        if _profiler.enabled and self.depth == 0:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+            _profiler.add(self._profile)
+            self._profile = None
+        _local.stack.pop()
+
+        allocated = peak = None
+        if self._tracing and tracemalloc.is_tracing():
+            current, traced_peak = tracemalloc.get_traced_memory()
+            allocated = current - self._allocated_before
+            # Only a new process-wide high-water mark is known to be this span's; it
+            # may include other threads' allocations
+            if traced_peak > self._peak_before:
+                peak = traced_peak - self._allocated_before
+        rss_after = rss_bytes()
+        rss_delta = None if rss_after is None or self._rss_before is None else rss_after - self._rss_before
+
+        record = SpanRecord(
+            self.name, self.start, seconds, self.depth, self.parent, threading.current_thread().name,
+            dict(self.fields), rss_delta, allocated, peak, None if exc_type is None else exc_type.__name__,
+        )
+        _recorder.add(record)
+        if _log.isEnabledFor(logging.DEBUG):
+            extra = {"seconds": seconds, "depth": self.depth, **self.fields}
+            if allocated is not None:
+                extra["allocated_mb"] = allocated / 1e6
+            if record.error:
+                extra["error"] = record.error
+            _log.debug(self.name, extra={"fields": extra})
+        return False
+
+
+def format_report(records=None) -> str:
+    """Plain-text table of spans (default: the recorded history), for bug reports."""
+    records = _recorder.records() if records is None else records
+    lines = [f"{'span':<40}{'ms':>10}{'memory MB':>12}  thread / details"]
+    for record in records:
+        memory = record.allocated if record.allocated is not None else record.rss_delta
+        memory = "-" if memory is None else f"{memory / 1e6:.1f}"
+        details = " ".join(f"{key}={_format_value(value)}" for key, value in record.fields.items())
+        if record.error:
+            details += f" error={record.error}"
+        name = "  " * record.depth + record.name
+        lines.append(f"{name:<40}{record.seconds * 1000:>10.1f}{memory:>12}  {record.thread} {details}".rstrip())
+    return "\n".join(lines)
+
+
+def timed(name: str = None):
+    """Decorator recording every call of the function as a span."""
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+if os.environ.get("DATA_ANALYZER_TRACE_MEMORY"):
+    enable_allocation_tracking()
+
+if os.environ.get("DATA_ANALYZER_PROFILE"):
+    _profiler.start()
+    atexit.register(_profiler.dump, os.environ["DATA_ANALYZER_PROFILE"])
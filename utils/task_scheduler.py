@@ -0,0 +1,156 @@
+import threading
+
+from PyQt6.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, pyqtSignal
+
+from utils.logger import get_logger, span
+
+log = get_logger(__name__)
+
+
+# Keeps queued and running tasks (and their signal objects) alive until they finish
+_active_tasks = set()
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task when a newer request on its channel superseded it."""
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self._report = None
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Stop a long task early at a convenient point once it is cancelled."""
+        if self._event.is_set():
+            raise TaskCancelled()
+
+    def report(self, *values):
+        """Send progress values to the submitter's on_progress callback."""
+        if self._report is not None and not self._event.is_set():
+            self._report(self, values)
+
+
+class _TaskSignals(QObject):
+    succeeded = pyqtSignal(object, object)
+    failed = pyqtSignal(object, str)
+    progress = pyqtSignal(object, object)
+
+
+class _Task(QRunnable):
+    def __init__(self, fn, token: CancelToken, signals: _TaskSignals, name: str = "task"):
+        super().__init__()
+        self.fn = fn
+        self.name = name
+        self.token = token
+        self.signals = signals
+
+    def run(self):
+        try:
+            if self.token.cancelled:
+                return
+            try:
+                with span(self.name):
+                    result = self.fn(self.token)
+            except TaskCancelled:
+                return
+            except Exception as e:
+                if self.token.cancelled:
+                    return
+                log.exception("Task %s failed", self.name)
+                self.signals.failed.emit(self.token, str(e))
+                return
+            if not self.token.cancelled:
+                self.signals.succeeded.emit(self.token, result)
+        finally:
+            _active_tasks.discard(self)
+
+
+class TaskScheduler(QObject):
+    """
+    Runs widget computations on the shared QThreadPool, one live task per channel.
+
+    Submitting to a channel cancels the task already running there, and results
+    of cancelled tasks are dropped, so only the latest request reaches the GUI.
+    Callbacks run on the thread that owns the scheduler. Parent it to the widget
+    so results that arrive after the widget is gone are never delivered.
+    """
+
+    def __init__(self, parent=None, pool: QThreadPool = None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._tokens = {}
+        self._callbacks = {}
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.cancel_all)
+
+    def submit(self, channel, fn, on_result, on_error=None, on_progress=None) -> CancelToken:
+        """
+        Run fn(token) on a worker thread.
+
+        Parameters:
+        - channel: hashable, requests on the same channel supersede each other.
+        - fn: callable taking the CancelToken; it must not touch Qt widgets.
+        - on_result: called with fn's return value on the scheduler's thread.
+        - on_error: optional, called with the error message instead.
+        - on_progress: optional, called with the values fn passes to token.report().
+        """
+        self.cancel(channel)
+        token = CancelToken()
+        self._tokens[channel] = token
+        self._callbacks[token] = (channel, on_result, on_error, on_progress)
+
+        signals = _TaskSignals()
+        signals.succeeded.connect(self._on_succeeded)
+        signals.failed.connect(self._on_failed)
+        signals.progress.connect(self._on_progress)
+        token._report = signals.progress.emit
+        task = _Task(fn, token, signals, f"task:{channel}")
+        _active_tasks.add(task)
+        self.pool.start(task)
+        return token
+
+    def cancel(self, channel):
+        token = self._tokens.pop(channel, None)
+        if token is not None:
+            token.cancel()
+            self._callbacks.pop(token, None)
+
+    def cancel_all(self):
+        for channel in list(self._tokens):
+            self.cancel(channel)
+
+    def is_busy(self, channel) -> bool:
+        return channel in self._tokens
+
+    def _finish(self, token):
+        entry = self._callbacks.pop(token, None)
+        if entry is None or token.cancelled:
+            return None
+        channel = entry[0]
+        if self._tokens.get(channel) is token:
+            del self._tokens[channel]
+        return entry
+
+    def _on_succeeded(self, token, result):
+        entry = self._finish(token)
+        if entry is not None:
+            entry[1](result)
+
+    def _on_progress(self, token, values):
+        entry = self._callbacks.get(token)
+        if entry is not None and entry[3] is not None and not token.cancelled:
+            entry[3](*values)
+
+    def _on_failed(self, token, message):
+        entry = self._finish(token)
+        if entry is not None and entry[2] is not None:
+            entry[2](message)
@@ -0,0 +1,39 @@
+import importlib
+import os
+import threading
+
+from utils.logger import get_logger
+
+log = get_logger(__name__)
+
+# Modules behind the View-menu docks; they pull in matplotlib, scipy and joblib
+DOCK_MODULES = (
+    "graphs.plot_generator",
+    "graphs.heat_map",
+    "stats.basic_stats_widget",
+    "stats.group_by_widget",
+    "models.regression_models",
+)
+
+
+def start_warmup(modules=DOCK_MODULES):
+    """
+    Import modules on a background thread so the first dock opens quickly.
+
+    Set DATA_ANALYZER_NO_WARMUP=1 to skip it (e.g. on machines with one core).
+    Returns the thread, or None when warm-up is disabled.
+    """
+    if os.environ.get("DATA_ANALYZER_NO_WARMUP"):
+        return None
+
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                # The dock will raise the same error when it is opened
+                log.warning("Warm-up import of %s failed: %s", name, e)
+
+    thread = threading.Thread(target=run, name="import-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,234 @@
+"""
+Several open datasets under one memory budget.
+
+Each open file is a WorkspaceEntry. Only the active one lives in the
+DatasetStore; the others keep their frames here until the frames of all
+entries exceed max_bytes, and then the least recently used ones are
+spilled to uncompressed Arrow IPC files in a private temporary directory.
+A spilled entry is read back memory-mapped when it is activated again, and
+an entry that was not edited since its last spill is dropped again without
+rewriting the file. Entries opened out-of-core hold a query source instead
+of a frame and are never spilled.
+"""
+import itertools
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from utils.logger import get_logger, span
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+DEFAULT_MAX_BYTES = 4 << 30
+
+log = get_logger(__name__)
+_entry_ids = itertools.count(1)
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+
+class WorkspaceEntry:
+    """One open dataset: its frame or spill file, where it came from, and its column roles."""
+
+    def __init__(self, name: str, frame: pd.DataFrame = None, source=None, file_path: str = None,
+                 memory_report: pd.DataFrame = None, nbytes: int = None):
+        self.id = next(_entry_ids)
+        self.name = name
+        self.frame = frame
+        self.source = source
+        self.file_path = file_path
+        self.memory_report = memory_report
+        self.nbytes = frame_bytes(frame) if nbytes is None else nbytes
+        self.column_roles = None
+        # Saved when the entry is hidden and reused when it is shown again: the
+        # Dataset.results_key() of its cached results, and its DataQualityIndex
+        # with the dtypes that index was built for
+        self.results = None
+        self.quality_index = None
+        self.indexed_dtypes = None
+        self.active = False
+        self.last_used = time.monotonic()
+        # The spill file, if it holds the current frame
+        self.spill_path = None
+        self.spill_pending = False
+
+    @property
+    def resident(self) -> bool:
+        """Whether the entry's rows are in memory (the active one's are in the store)."""
+        return self.source is None and (self.active or self.frame is not None)
+
+    @property
+    def spilled(self) -> bool:
+        return self.source is None and not self.resident
+
+
+class Workspace:
+    """
+    The open datasets, spilled least recently used first above max_bytes.
+
+    spill() and restore() do file I/O and may run on worker threads; the
+    other methods are called from the thread that owns the workspace.
+    """
+
+    def __init__(self, max_bytes: int = None, spill_dir: str = None):
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("DATA_ANALYZER_WORKSPACE_BYTES", DEFAULT_MAX_BYTES))
+        self.max_bytes = max_bytes
+        self.entries = []
+        self._spill_root = spill_dir
+        self._spill_dir = None
+        self._lock = threading.Lock()
+
+    def add(self, name: str, frame: pd.DataFrame = None, source=None, file_path: str = None,
+            memory_report: pd.DataFrame = None) -> WorkspaceEntry:
+        nbytes = None
+        if memory_report is not None:
+            # The load's compaction already measured the frame
+            nbytes = int(memory_report["bytes_after"].sum())
+        entry = WorkspaceEntry(name, frame, source, file_path, memory_report, nbytes)
+        self.entries.append(entry)
+        return entry
+
+    def get(self, entry_id) -> WorkspaceEntry:
+        return next((entry for entry in self.entries if entry.id == entry_id), None)
+
+    def resident_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self.entries if entry.resident)
+
+    def activate(self, entry: WorkspaceEntry):
+        """Mark entry as the one shown; its frame now lives in the store."""
+        with self._lock:
+            entry.active = True
+            entry.frame = None
+            entry.last_used = time.monotonic()
+
+    def deactivate(self, entry: WorkspaceEntry, frame: pd.DataFrame, changed: bool, nbytes: int = None):
+        """Take back the live frame of the entry that was shown; changed drops its spill file."""
+        with self._lock:
+            entry.active = False
+            entry.last_used = time.monotonic()
+            if entry.source is not None:
+                return
+            entry.frame = frame
+            if changed:
+                self._remove_spill_file(entry)
+                entry.nbytes = frame_bytes(frame) if nbytes is None else nbytes
+
+    def to_spill(self) -> list:
+        """Inactive entries to spill, least recently used first, to get back under max_bytes."""
+        total = self.resident_bytes()
+        chosen = []
+        for entry in sorted(self.entries, key=lambda e: e.last_used):
+            if total <= self.max_bytes:
+                break
+            if entry.active or entry.frame is None or entry.spill_pending:
+                continue
+            entry.spill_pending = True
+            chosen.append(entry)
+            total -= entry.nbytes
+        return chosen
+
+    def _spill_path(self, entry: WorkspaceEntry) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="data_analyzer_workspace_", dir=self._spill_root)
+        return os.path.join(self._spill_dir, f"{entry.id}.{'arrow' if pa is not None else 'pkl'}")
+
+    def spill(self, entry: WorkspaceEntry) -> bool:
+        """Write entry's frame to disk and drop it from memory, unless it was activated meanwhile."""
+        with self._lock:
+            frame, path = entry.frame, entry.spill_path
+        try:
+            if frame is None:
+                return False
+            if path is None:
+                path = self._spill_path(entry)
+                with span("workspace_spill", entry=entry.name, rows=len(frame)):
+                    _write_frame(frame, path)
+            with self._lock:
+                if entry.active:
+                    # Activated meanwhile: the file stays valid until an edit, which deactivate() notices
+                    entry.spill_path = path
+                    return False
+                if entry.frame is not frame:
+                    # Activated, edited and put back meanwhile
+                    os.remove(path)
+                    return False
+                entry.spill_path = path
+                entry.frame = None
+            log.info("Spilled %s (%.0f MB) to %s", entry.name, entry.nbytes / 1e6, path)
+            return True
+        finally:
+            entry.spill_pending = False
+
+    def restore(self, entry: WorkspaceEntry) -> pd.DataFrame:
+        """The entry's frame, read back from its spill file if it was spilled."""
+        with self._lock:
+            frame, path = entry.frame, entry.spill_path
+        if frame is not None or entry.source is not None:
+            return frame
+        with span("workspace_restore", entry=entry.name):
+            return _read_frame(path)
+
+    def remove(self, entry: WorkspaceEntry):
+        with self._lock:
+            if entry in self.entries:
+                self.entries.remove(entry)
+            entry.frame = None
+            self._remove_spill_file(entry)
+        if entry.source is not None:
+            entry.source.close()
+
+    @staticmethod
+    def _remove_spill_file(entry: WorkspaceEntry):
+        if entry.spill_path is not None:
+            try:
+                os.remove(entry.spill_path)
+            except OSError:
+                pass
+            entry.spill_path = None
+
+    def close(self):
+        for entry in list(self.entries):
+            self.remove(entry)
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+
+def _write_frame(df: pd.DataFrame, path: str):
+    if pa is not None:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            # Mixed-type object columns cannot be stored as Arrow
+            table = None
+        if table is not None:
+            with pa.OSFile(path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            return
+    with open(path, "wb") as f:
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_frame(path: str) -> pd.DataFrame:
+    if pa is not None:
+        try:
+            # The table's buffers point straight into the mapped file
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        except pa.ArrowInvalid:
+            table = None
+        if table is not None:
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+    with open(path, "rb") as f:
+        return pickle.load(f)